@@ -0,0 +1,136 @@
+"""
+Blob store benchmark: disk usage of captured files with and without dedup.
+
+Runs ingest_url against a synthetic content plugin that produces, per
+capture, a page (raw HTML and readable text), a full-page screenshot, a site
+logo shared by every page on the same site, and a few article images of
+which some recur across pages. A fraction of the captures are re-captures of
+unchanged pages (duplicate policy 'snapshot'). Reports the logical size of
+all artifact files against the bytes actually stored, then deletes half the
+artifacts and checks the space freed by garbage collection.
+
+    python -m benchmarks.blob_store --captures 500 --recapture 0.2
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+_TMP = tempfile.mkdtemp(prefix="pindrop-bench-")
+os.environ["DATA_PATH"] = _TMP
+
+from core.blobs import collect_garbage  # noqa: E402
+from core.db import get_connection, get_data_path, run_migrations  # noqa: E402
+from core.ingestion import ingest_url  # noqa: E402
+from core.plugins.base import ArtifactData  # noqa: E402
+
+
+class _SyntheticPlugin:
+    plugin_id = "webpage"
+    plugin_version = "bench"
+
+    def __init__(self, rng: random.Random):
+        self._rng = rng
+        self._images = [rng.randbytes(rng.randint(20_000, 120_000)) for _ in range(40)]
+
+    def ingest(self, source, artifact_id, temp_dir, config) -> ArtifactData:
+        page = random.Random(source)    # same URL → same content
+        site = random.Random(source.split("/")[2])
+        files = {
+            "raw_html": page.randbytes(page.randint(40_000, 200_000)),
+            "readable_txt": page.randbytes(page.randint(5_000, 30_000)),
+            "screenshot": page.randbytes(page.randint(150_000, 400_000)),
+            "thumbnail": site.randbytes(8_000),
+        }
+        for i, image in enumerate(page.sample(self._images, 3)):
+            files[f"image_{i}"] = image
+
+        paths = {}
+        for role, data in files.items():
+            path = temp_dir / f"{artifact_id}_{role}"
+            path.write_bytes(data)
+            paths[role] = str(path)
+        return ArtifactData(
+            title=source, excerpt="", plugin_data={}, plugin_version=self.plugin_version, files=paths
+        )
+
+    def get_fts_text(self, artifact: dict) -> str:
+        return ""
+
+
+class _Router:
+    def __init__(self, plugin):
+        self._plugin = plugin
+
+    def route(self, url):
+        return self._plugin
+
+
+def _usage(root: Path) -> tuple[int, int]:
+    """(logical bytes of every file, bytes of distinct inodes)."""
+    logical = physical = 0
+    seen: set[int] = set()
+    for path in root.rglob("*"):
+        if not path.is_file():
+            continue
+        st = path.stat()
+        logical += st.st_size
+        if st.st_ino not in seen:
+            seen.add(st.st_ino)
+            physical += st.st_size
+    return logical, physical
+
+
+def _mib(n: int) -> str:
+    return f"{n / (1024 * 1024):8.1f} MiB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--captures", type=int, default=500)
+    parser.add_argument("--sites", type=int, default=25)
+    parser.add_argument("--recapture", type=float, default=0.2, help="fraction of captures repeating an earlier URL")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    conn = get_connection()
+    run_migrations(conn)
+    router = _Router(_SyntheticPlugin(rng))
+
+    urls: list[str] = []
+    for i in range(args.captures):
+        if urls and rng.random() < args.recapture:
+            urls.append(rng.choice(urls))
+        else:
+            urls.append(f"https://site{rng.randrange(args.sites)}.example.com/post/{i}")
+
+    start = time.perf_counter()
+    ids = [ingest_url(url, conn, None, router, duplicate_policy="snapshot")["id"] for url in urls]
+    elapsed = time.perf_counter() - start
+
+    artifacts_root = get_data_path() / "users"
+    blobs_root = get_data_path() / "system" / "blobs"
+    logical, _ = _usage(artifacts_root)
+    _, stored = _usage(blobs_root)
+    print(f"\n{args.captures} captures, {len(set(urls))} distinct pages, {args.sites} sites ({elapsed:.1f}s)")
+    print(f"  artifact files (logical)  {_mib(logical)}")
+    print(f"  stored once in blobs      {_mib(stored)}   ({100 * (1 - stored / logical):.0f}% saved)")
+
+    for artifact_id in ids[: len(ids) // 2]:
+        row = conn.execute("SELECT content_path FROM artifact WHERE id = ?", (artifact_id,)).fetchone()
+        conn.execute("DELETE FROM artifact WHERE id = ?", (artifact_id,))
+        conn.commit()
+        shutil.rmtree(row["content_path"], ignore_errors=True)
+    blobs, freed = collect_garbage(conn)
+    _, remaining = _usage(blobs_root)
+    print(f"  after deleting half       {_mib(remaining)}   ({blobs} blobs, {_mib(freed).strip()} freed)")
+
+    conn.close()
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Embedding pipeline throughput with the offline stub provider.
+
+Runs the 'embed' task handler over synthetic artifacts three ways: one
+artifact per handler call, batched as the queue worker does
+(EMBED_TASK_BATCH), and again with a warm embedding cache (a re-capture or
+plugin version bump). --call-latency-ms adds a fixed delay per provider call
+to model a remote or GPU-backed provider.
+
+    python -m benchmarks.embed_throughput --artifacts 1000 --words 2000 --call-latency-ms 50
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+_TMP = tempfile.mkdtemp(prefix="pindrop-bench-")
+os.environ["DATA_PATH"] = _TMP
+
+from core.db import get_connection, get_data_path, run_migrations  # noqa: E402
+from core.embeddings import _TASK_BATCH, HashingEmbeddingProvider, handle_embed  # noqa: E402
+import core.embeddings as embeddings  # noqa: E402
+from core.plugins.loader import PluginLoader  # noqa: E402
+from core.queue import Task, TaskContext  # noqa: E402
+
+
+class _CountingProvider(HashingEmbeddingProvider):
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+        self.passages = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        self.passages += len(texts)
+        time.sleep(self.latency)
+        return super().embed(texts)
+
+
+def _populate(conn, artifacts: int, words: int) -> list[str]:
+    rng = random.Random(42)
+    vocab = [f"w{i}" for i in range(20000)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    ids = []
+    for i in range(artifacts):
+        artifact_id = f"bench{i:08d}"
+        artifact_dir = get_data_path() / "artifacts" / artifact_id
+        (artifact_dir / "processed").mkdir(parents=True)
+        sentences = [" ".join(rng.choices(vocab, weights, k=12)) + "." for _ in range(words // 12)]
+        (artifact_dir / "processed" / "readable.txt").write_text(" ".join(sentences), encoding="utf-8")
+        conn.execute(
+            """
+            INSERT INTO artifact (id, plugin_type, captured_at, created_at, updated_at, title, content_path)
+            VALUES (?, 'webpage', '2024-01-01', '2024-01-01', '2024-01-01', ?, ?)
+            """,
+            (artifact_id, f"Artifact {i}", str(artifact_dir)),
+        )
+        ids.append(artifact_id)
+    conn.commit()
+    return ids
+
+
+def _run(label: str, ctx: TaskContext, provider: _CountingProvider, ids: list[str], batch: int) -> None:
+    provider.calls = provider.passages = 0
+    start = time.perf_counter()
+    for i in range(0, len(ids), batch):
+        handle_embed(ctx, [Task(f"t{j}", aid, "embed", 5, 1) for j, aid in enumerate(ids[i:i + batch])])
+        ctx.conn.commit()
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {label:<28} {elapsed:7.2f}s   {len(ids) / elapsed:8.1f} artifacts/s"
+        f"   {provider.calls:5d} provider calls, {provider.passages} passages embedded"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifacts", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=2000, help="words of extracted text per artifact")
+    parser.add_argument("--call-latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    conn = get_connection()
+    run_migrations(conn)
+    loader = PluginLoader(conn, get_data_path())
+    loader.load_all()
+    ids = _populate(conn, args.artifacts, args.words)
+
+    provider = _CountingProvider(args.call_latency_ms / 1000)
+    embeddings.get_provider = lambda: provider
+    ctx = TaskContext(conn=conn, loader=loader, data_path=get_data_path())
+
+    print(f"\n{args.artifacts} artifacts x {args.words} words, {args.call_latency_ms:.0f} ms per provider call")
+    _run("one artifact per call", ctx, provider, ids, 1)
+    conn.execute("DELETE FROM embedding_cache")
+    conn.commit()
+    _run(f"batched ({_TASK_BATCH} per task batch)", ctx, provider, ids, _TASK_BATCH)
+    _run("batched, warm cache", ctx, provider, ids, _TASK_BATCH)
+
+    conn.close()
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
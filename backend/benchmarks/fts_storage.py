@@ -0,0 +1,121 @@
+"""
+FTS storage benchmark: regular FTS5 table (migration 0005) vs external content (0006).
+
+Builds a throwaway database with synthetic articles, measures file size and
+search latency, applies the external-content migration and measures again.
+
+    python -m benchmarks.fts_storage --artifacts 5000 --words 1500
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+_TMP = tempfile.mkdtemp(prefix="pindrop-bench-")
+os.environ["DATA_PATH"] = _TMP
+
+from core.db import _MIGRATIONS_DIR, get_connection  # noqa: E402
+
+_QUERIES = {
+    "common term": "w3",
+    "rare term": "w8000",
+    "two terms": "w12 w250",
+    "prefix": "w45*",
+}
+
+_SEARCH_SQL = {
+    # 0005: artifact_id is stored in the FTS table
+    "regular": """
+        SELECT a.id, bm25(artifact_fts) AS rank
+        FROM artifact_fts JOIN artifact a ON a.id = artifact_fts.artifact_id
+        WHERE artifact_fts MATCH ? AND a.is_archived = 0
+        ORDER BY rank, a.id LIMIT 20
+    """,
+    # 0006: join on docid so FTS5 never reads the external content row
+    "external": """
+        SELECT a.id, bm25(artifact_fts) AS rank
+        FROM artifact_fts
+        JOIN artifact_fts_doc d ON d.docid = artifact_fts.rowid
+        JOIN artifact a ON a.id = d.artifact_id
+        WHERE artifact_fts MATCH ? AND a.is_archived = 0
+        ORDER BY rank, a.id LIMIT 20
+    """,
+}
+
+
+def _apply(conn, names) -> None:
+    for path in sorted(_MIGRATIONS_DIR.glob("*.sql")):
+        if path.name in names:
+            conn.executescript(path.read_text(encoding="utf-8"))
+    conn.commit()
+
+
+def _populate(conn, artifacts: int, words: int) -> None:
+    rng = random.Random(42)
+    vocab = [f"w{i}" for i in range(20000)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]      # Zipf-like word frequencies
+    for i in range(artifacts):
+        artifact_id = f"bench{i:08d}"
+        conn.execute(
+            """
+            INSERT INTO artifact (id, plugin_type, captured_at, created_at, updated_at, title, excerpt)
+            VALUES (?, 'webpage', '2024-01-01', '2024-01-01', '2024-01-01', ?, ?)
+            """,
+            (artifact_id, " ".join(rng.choices(vocab, weights, k=8)), " ".join(rng.choices(vocab, weights, k=30))),
+        )
+        # Pre-0006 layout: extracted text is stored in the FTS table itself
+        conn.execute(
+            """
+            UPDATE artifact_fts SET full_text = ?
+            WHERE rowid = (SELECT docid FROM artifact_fts_doc WHERE artifact_id = ?)
+            """,
+            (" ".join(rng.choices(vocab, weights, k=words)), artifact_id),
+        )
+        if i % 500 == 0:
+            conn.commit()
+    conn.commit()
+
+
+def _measure(conn, label: str, sql: str, repeats: int) -> None:
+    conn.execute("VACUUM")
+    # Everything still in the WAL belongs to the database too; fold it in before the stat
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = Path(_TMP, "pindrop.db").stat().st_size
+    print(f"\n{label}: database {size / 1024 / 1024:.1f} MiB")
+    for name, query in _QUERIES.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            conn.execute(sql, (query,)).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"  {name:<12} median {statistics.median(timings):7.2f} ms   p95 {sorted(timings)[int(repeats * 0.95) - 1]:7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifacts", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=1500, help="words of extracted text per artifact")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    conn = get_connection()
+    migrations = sorted(p.name for p in _MIGRATIONS_DIR.glob("*.sql"))
+    before = [name for name in migrations if name < "0006"]
+    _apply(conn, before)
+    _populate(conn, args.artifacts, args.words)
+    _measure(conn, "regular FTS5 (0005)", _SEARCH_SQL["regular"], args.repeats)
+
+    start = time.perf_counter()
+    _apply(conn, {"0006_fts_external_content.sql"})
+    print(f"\nmigration 0006 rebuild: {time.perf_counter() - start:.1f}s")
+    _measure(conn, "external content (0006)", _SEARCH_SQL["external"], args.repeats)
+    conn.close()
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
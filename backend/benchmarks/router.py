@@ -0,0 +1,148 @@
+"""
+ContentRouter benchmark: routing throughput with many plugins installed.
+
+Builds a loader of synthetic content plugins with patterns shaped like real
+ones (reddit, youtube, twitter, arxiv, file extensions, per-site plugins,
+the webpage catch-all, a can_handle() fallback), then routes synthetic URLs
+three ways: the previous linear fnmatch scan, the compiled router with its
+decision cache disabled (every URL routed from scratch, as in a bulk import
+of distinct URLs), and with the cache on a repeating working set. Every
+decision is checked against the linear scan.
+
+    python -m benchmarks.router --urls 100000 --plugins 40
+"""
+import argparse
+import fnmatch
+import random
+import time
+from urllib.parse import urlparse
+
+from core.plugins.router import ContentRouter, _pattern_specificity
+
+_KNOWN = {
+    "reddit":  ["reddit.com/r/*/comments/*", "old.reddit.com/r/*", "redd.it/*"],
+    "youtube": ["youtube.com/watch*", "*.youtube.com/watch*", "youtu.be/*", "youtube.com/shorts/*"],
+    "twitter": ["twitter.com/*/status/*", "x.com/*/status/*", "mobile.twitter.com/*/status/*"],
+    "arxiv":   ["arxiv.org/abs/*", "arxiv.org/pdf/*"],
+    "github":  ["github.com/*/*", "gist.github.com/*"],
+    "pdf":     ["*.pdf"],
+    "image":   ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp"],
+}
+
+
+class _Plugin:
+    def __init__(self, plugin_id: str, handles: str = ""):
+        self.plugin_id = plugin_id
+        self._handles = handles
+
+    def can_handle(self, url: str) -> bool:
+        return bool(self._handles) and self._handles in url
+
+
+class _Loader:
+    def __init__(self, site_plugins: int):
+        self._manifests = {plugin_id: {"url_patterns": patterns} for plugin_id, patterns in _KNOWN.items()}
+        for i in range(site_plugins):
+            self._manifests[f"site{i}"] = {"url_patterns": [f"site{i}.com/*", f"*.site{i}.com/*", f"site{i}.net/p/*"]}
+        self._manifests["shortener"] = {"url_patterns": []}
+        self._manifests["webpage"] = {"url_patterns": ["*"]}
+        self._plugins = {plugin_id: _Plugin(plugin_id) for plugin_id in self._manifests}
+        self._plugins["shortener"] = _Plugin("shortener", handles="ftp://")
+
+    def all_content_plugins(self):
+        return dict(self._plugins)
+
+    def manifest(self, plugin_id):
+        return self._manifests.get(plugin_id)
+
+    def get_content_plugin(self, plugin_id):
+        return self._plugins.get(plugin_id)
+
+
+def _linear_route(loader: _Loader):
+    """ContentRouter.route as it was: fnmatch over every sorted pattern, then can_handle()."""
+    routes = []
+    for plugin_id in loader.all_content_plugins():
+        for pattern in (loader.manifest(plugin_id) or {}).get("url_patterns", []):
+            routes.append((pattern, plugin_id))
+    routes.sort(key=lambda r: _pattern_specificity(r[0]), reverse=True)
+
+    def route(url: str):
+        parsed = urlparse(url)
+        normalized = (parsed.netloc or "").lower().removeprefix("www.") + parsed.path
+        for pattern, plugin_id in routes:
+            if fnmatch.fnmatch(normalized, pattern):
+                plugin = loader.get_content_plugin(plugin_id)
+                if plugin:
+                    return plugin
+        for plugin in loader.all_content_plugins().values():
+            if plugin.can_handle(url):
+                return plugin
+        return None
+
+    return route
+
+
+def _urls(count: int, site_plugins: int, rng: random.Random) -> list[str]:
+    hosts = [
+        "reddit.com", "old.reddit.com", "redd.it", "youtube.com", "m.youtube.com", "youtu.be",
+        "twitter.com", "x.com", "arxiv.org", "github.com", "gist.github.com",
+    ] + [f"site{i}.com" for i in range(site_plugins)] + [f"blog.site{i}.com" for i in range(site_plugins)]
+    paths = [
+        "/r/ml/comments/{n}/title", "/watch?v={n}", "/shorts/{n}", "/user/status/{n}", "/abs/2401.{n}",
+        "/owner/repo{n}", "/p/{n}", "/articles/{n}.pdf", "/img/{n}.png", "/{n}", "",
+    ]
+    urls = []
+    for n in range(count):
+        roll = rng.random()
+        if roll < 0.6:
+            host = rng.choice(hosts)
+        else:
+            host = f"news{rng.randrange(5000)}.example.org"
+        url = f"{rng.choice(['https://', 'http://', 'https://www.'])}{host}{rng.choice(paths).format(n=n)}"
+        if roll > 0.995:
+            url = rng.choice([f"ftp://files{n}.example.org/x", f"example{n}.com/page", url.upper()])
+        urls.append(url)
+    return urls
+
+
+def _time(label: str, route, urls: list[str]) -> list:
+    start = time.perf_counter()
+    decisions = [route(url) for url in urls]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed:7.2f} s   {len(urls) / elapsed:>10,.0f} URLs/s   {elapsed / len(urls) * 1e6:6.1f} µs/URL")
+    return decisions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=100000)
+    parser.add_argument("--plugins", type=int, default=40, help="per-site plugins besides the well-known ones")
+    parser.add_argument("--working-set", type=int, default=2000, help="distinct URLs in the cached run")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    loader = _Loader(args.plugins)
+    urls = _urls(args.urls, args.plugins, rng)
+    patterns = sum(len(m["url_patterns"]) for m in loader._manifests.values())
+    print(f"{len(loader.all_content_plugins())} plugins, {patterns} patterns, {len(urls):,} URLs\n")
+
+    expected = _time("linear fnmatch scan", _linear_route(loader), urls)
+    compiled = _time("compiled index, no cache", ContentRouter(loader, cache_size=0).route, urls)
+    mismatches = sum(a is not b for a, b in zip(expected, compiled))
+
+    repeated = [rng.choice(urls[:args.working_set]) for _ in range(len(urls))]
+    cached = _time(f"compiled index, LRU ({args.working_set} URLs)", ContentRouter(loader).route, repeated)
+    by_url = dict(zip(urls, expected))
+    mismatches += sum(by_url[url] is not plugin for url, plugin in zip(repeated, cached))
+
+    counts: dict[str, int] = {}
+    for plugin in expected:
+        counts[plugin.plugin_id if plugin else "none"] = counts.get(plugin.plugin_id if plugin else "none", 0) + 1
+    top = sorted(counts.items(), key=lambda item: -item[1])[:6]
+    print(f"\n  routed to: {', '.join(f'{name} {n}' for name, n in top)}")
+    print(f"  decisions differing from the linear scan: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
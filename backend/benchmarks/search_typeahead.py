@@ -0,0 +1,90 @@
+"""
+Type-ahead search benchmark.
+
+Builds a throwaway database of synthetic artifacts, then replays queries one
+keystroke at a time through the /api/search/typeahead handler and reports
+latency per keystroke against SEARCH_TYPEAHEAD_BUDGET_MS.
+
+    python -m benchmarks.search_typeahead --artifacts 100000 --words 300
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+_TMP = tempfile.mkdtemp(prefix="pindrop-bench-")
+os.environ["DATA_PATH"] = _TMP
+
+from core.api.search import _TYPEAHEAD_BUDGET, typeahead_search  # noqa: E402
+from core.db import get_connection, run_migrations  # noqa: E402
+from core.fts import set_full_text  # noqa: E402
+
+# Typed one character at a time: common word, rare word, multi-word
+_QUERIES = ["w7 w1234", "w15023", "w3 w40 w512"]
+
+
+def _populate(conn, artifacts: int, words: int) -> None:
+    rng = random.Random(42)
+    vocab = [f"w{i}" for i in range(20000)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]      # Zipf-like word frequencies
+    start = time.perf_counter()
+    for i in range(artifacts):
+        artifact_id = f"bench{i:08d}"
+        conn.execute(
+            """
+            INSERT INTO artifact (id, plugin_type, captured_at, created_at, updated_at, title, excerpt)
+            VALUES (?, 'webpage', '2024-01-01', '2024-01-01', '2024-01-01', ?, ?)
+            """,
+            (artifact_id, " ".join(rng.choices(vocab, weights, k=8)), " ".join(rng.choices(vocab, weights, k=30))),
+        )
+        set_full_text(conn, artifact_id, " ".join(rng.choices(vocab, weights, k=words)))
+        if i % 1000 == 0:
+            conn.commit()
+    conn.commit()
+    conn.execute("VACUUM")
+    size = Path(_TMP, "pindrop.db").stat().st_size
+    print(f"{artifacts} artifacts indexed in {time.perf_counter() - start:.0f}s, database {size / 1024 / 1024:.0f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifacts", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=300, help="words of extracted text per artifact")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = get_connection()
+    run_migrations(conn)
+    _populate(conn, args.artifacts, args.words)
+
+    print(f"budget {_TYPEAHEAD_BUDGET * 1000:.0f} ms\n")
+    all_timings = []
+    for query in _QUERIES:
+        for end in range(1, len(query) + 1):
+            typed = query[:end]
+            timings, partial = [], False
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                result = typeahead_search(q=typed, limit=10, conn=conn)
+                timings.append((time.perf_counter() - start) * 1000)
+                partial = partial or result["partial"]
+            all_timings += timings
+            print(
+                f"  {typed!r:<16} median {statistics.median(timings):7.2f} ms"
+                f"   max {max(timings):7.2f} ms   {len(result['results']):2d} results"
+                f"{'   (partial)' if partial else ''}"
+            )
+
+    all_timings.sort()
+    print(f"\nall keystrokes: median {statistics.median(all_timings):.2f} ms, "
+          f"p95 {all_timings[int(len(all_timings) * 0.95) - 1]:.2f} ms, max {all_timings[-1]:.2f} ms")
+    conn.close()
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
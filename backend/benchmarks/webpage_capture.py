@@ -0,0 +1,141 @@
+"""
+Webpage capture benchmark: HTTP fast path vs the Playwright browser path.
+
+Serves a local fixture site — static articles plus pages that need
+JavaScript (an SPA shell, a noscript wall, a thin page) — and captures every
+page with the webpage plugin in each capture_mode. Reports latency per page,
+how many pages auto mode escalated to the browser, and the peak RSS of the
+process and of the browser's child processes.
+
+    python -m benchmarks.webpage_capture --articles 40
+
+The browser rows need Playwright and Chromium installed; without them they
+report the failure instead.
+"""
+import argparse
+import os
+import random
+import resource
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+_TMP = tempfile.mkdtemp(prefix="pindrop-bench-")
+os.environ["DATA_PATH"] = _TMP
+
+from core.db import get_connection, get_data_path, run_migrations  # noqa: E402
+from core.plugins.base import IngestionError  # noqa: E402
+from core.plugins.loader import PluginLoader  # noqa: E402
+
+_ARTICLE = """<!doctype html>
+<html lang="en"><head><meta charset="utf-8"><title>{title}</title>
+<meta name="description" content="Fixture article {i}.">
+<meta property="article:published_time" content="2024-05-0{day}T10:00:00Z">
+<style>body {{ font-family: serif }}</style><script>window.analytics = [];</script>
+</head><body>
+<header><nav><a href="/">Home</a> <a href="/about">About</a></nav></header>
+<main><article><h1>{title}</h1>{paragraphs}</article></main>
+<aside>Related posts</aside><footer>© Fixture</footer>
+</body></html>"""
+
+_JS_PAGES = {
+    "spa.html": """<!doctype html><html><head><title>App</title></head>
+<body><div id="root"></div><script src="/bundle.js"></script></body></html>""",
+    "noscript.html": """<!doctype html><html><head><title>Wall</title></head>
+<body><noscript>You need to enable JavaScript to run this app.</noscript>
+<div id="main">Loading…</div></body></html>""",
+    "thin.html": """<!doctype html><html><head><title>Thin</title></head>
+<body><p>Loading comments</p></body></html>""",
+}
+
+
+def _build_site(root: Path, articles: int) -> list[str]:
+    rng = random.Random(3)
+    words = [f"word{i}" for i in range(3000)]
+    pages = []
+    for i in range(articles):
+        paragraphs = "".join(
+            f"<p>{' '.join(rng.choices(words, k=rng.randint(40, 90)))}.</p>" for _ in range(rng.randint(8, 25))
+        )
+        name = f"post-{i}.html"
+        (root / name).write_text(
+            _ARTICLE.format(title=f"Fixture post {i}", i=i, day=i % 9 + 1, paragraphs=paragraphs), encoding="utf-8"
+        )
+        pages.append(name)
+    for name, body in _JS_PAGES.items():
+        (root / name).write_text(body, encoding="utf-8")
+        pages.append(name)
+    return pages
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _peak_rss_mib() -> tuple[float, float]:
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--modes", default="http,auto,browser")
+    args = parser.parse_args()
+
+    site = Path(_TMP) / "site"
+    site.mkdir()
+    pages = _build_site(site, args.articles)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(site)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    conn = get_connection()
+    run_migrations(conn)
+    loader = PluginLoader(conn, get_data_path())
+    loader.load_all()
+    plugin = loader.get_content_plugin("webpage")
+    temp_dir = get_data_path() / "system" / "temp" / "ingest"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"\n{args.articles} static articles + {len(_JS_PAGES)} JavaScript pages at {base}")
+    print(f"  {'mode':<8} {'ok':>4} {'browser':>8} {'median ms':>10} {'mean ms':>8}   peak RSS (self / children)")
+    for mode in args.modes.split(","):
+        timings, escalated, errors = [], 0, []
+        for n, name in enumerate(pages):
+            start = time.perf_counter()
+            try:
+                data = plugin.ingest(f"{base}/{name}", f"{mode}{n:04d}", temp_dir, {"capture_mode": mode})
+            except IngestionError as exc:
+                errors.append(f"{name}: {exc}")
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+            escalated += data.plugin_data["capture_mode"] == "browser"
+            for path in data.files.values():
+                Path(path).unlink(missing_ok=True)
+        own, children = _peak_rss_mib()
+        if timings:
+            print(
+                f"  {mode:<8} {len(timings):>4} {escalated:>8} {statistics.median(timings):>10.1f}"
+                f" {statistics.mean(timings):>8.1f}   {own:.0f} / {children:.0f} MiB"
+            )
+        else:
+            print(f"  {mode:<8} {0:>4}   all captures failed")
+        for error in errors[:3]:
+            print(f"      {error[:110]}")
+
+    loader.shutdown_all()
+    server.shutdown()
+    conn.close()
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
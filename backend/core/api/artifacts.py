@@ -1,33 +1,38 @@
 """
 Artifact CRUD endpoints and file serving.
 """
+import base64
+import os
 import shutil
 import sqlite3
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 
-from core.db import get_connection
+from core.blobs import collect_garbage
+from core.db import get_read_db, get_write_db, read_connection
 from core.ingestion import _ROLE_TO_PATH
+from core.pagination import InvalidCursor, decode_cursor, keyset_clause, next_cursor, order_clause
+from core.queue import registered_task_types
+from core.serving import IMMUTABLE, artifact_paths, file_etag, file_response
+from core.thumbnails import variant_for_width
 
 router = APIRouter()
 
-_SORT_MAP = {
-    "captured_at_desc": "a.captured_at DESC",
-    "captured_at_asc":  "a.captured_at ASC",
-    "title_asc":        "a.title ASC",
-    "importance_desc":  "a.importance DESC, a.captured_at DESC",
+# sort → (key columns, direction). Every ordering ends in the ULID id as a stable
+# tiebreak, which keyset pagination relies on. Migration 0004 adds a matching
+# (is_archived, [filter column,] key columns...) index for each.
+_SORT_MAP: dict[str, tuple[tuple[str, ...], str]] = {
+    "captured_at_desc": (("a.captured_at", "a.id"), "DESC"),
+    "captured_at_asc":  (("a.captured_at", "a.id"), "ASC"),
+    "title_asc":        (("a.title", "a.id"), "ASC"),
+    "importance_desc":  (("a.importance", "a.captured_at", "a.id"), "DESC"),
 }
 
-
-def _get_conn(request: Request) -> sqlite3.Connection:
-    conn = get_connection()
-    request.state.conn = conn
-    return conn
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 
 def _fetch_tags_for_artifacts(conn: sqlite3.Connection, artifact_ids: list[str]) -> dict[str, list]:
@@ -54,6 +59,63 @@ def _fetch_tags_for_artifacts(conn: sqlite3.Connection, artifact_ids: list[str])
     return result
 
 
+def _fetch_pending_tasks(conn: sqlite3.Connection, artifact_ids: list[str]) -> dict[str, list[str]]:
+    """
+    Queued or running task types per artifact — derivatives still to land.
+    Only types with a registered handler count, so a task nothing will run
+    (e.g. 'summarize' with no AI plugin) doesn't keep a client polling.
+    """
+    result: dict[str, list[str]] = {aid: [] for aid in artifact_ids}
+    task_types = registered_task_types()
+    if not artifact_ids or not task_types:
+        return result
+    id_placeholders = ",".join("?" * len(artifact_ids))
+    type_placeholders = ",".join("?" * len(task_types))
+    rows = conn.execute(
+        f"""
+        SELECT DISTINCT artifact_id, task_type FROM processing_queue
+        WHERE artifact_id IN ({id_placeholders})
+          AND task_type IN ({type_placeholders})
+          AND status IN ('pending', 'running')
+        ORDER BY artifact_id, task_type
+        """,
+        artifact_ids + task_types,
+    ).fetchall()
+    for row in rows:
+        result[row["artifact_id"]].append(row["task_type"])
+    return result
+
+
+def _filter_clauses(
+    is_archived: bool,
+    plugin_type: Optional[str] = None,
+    domain: Optional[str] = None,
+    tag_id: Optional[str] = None,
+    collection_id: Optional[str] = None,
+) -> tuple[list[str], list]:
+    """WHERE clauses (on alias a) and params for the structured filters shared by listing and search."""
+    where_clauses = ["a.is_archived = ?"]
+    params: list = [int(is_archived)]
+
+    if plugin_type:
+        where_clauses.append("a.plugin_type = ?")
+        params.append(plugin_type)
+    if domain:
+        where_clauses.append("a.source_domain = ?")
+        params.append(domain)
+    if tag_id:
+        where_clauses.append(
+            "EXISTS (SELECT 1 FROM artifact_tag at WHERE at.artifact_id = a.id AND at.tag_id = ?)"
+        )
+        params.append(tag_id)
+    if collection_id:
+        where_clauses.append(
+            "EXISTS (SELECT 1 FROM artifact_collection ac WHERE ac.artifact_id = a.id AND ac.collection_id = ?)"
+        )
+        params.append(collection_id)
+    return where_clauses, params
+
+
 def _row_to_card(row: sqlite3.Row, tags: list) -> dict:
     return {
         "id": row["id"],
@@ -62,6 +124,7 @@ def _row_to_card(row: sqlite3.Row, tags: list) -> dict:
         "excerpt": row["excerpt"],
         "thumbnail_path": row["thumbnail_path"],
         "captured_at": row["captured_at"],
+        "updated_at": row["updated_at"],
         "source_url": row["source_url"],
         "source_domain": row["source_domain"],
         "is_archived": bool(row["is_archived"]),
@@ -77,55 +140,60 @@ def _row_to_card(row: sqlite3.Row, tags: list) -> dict:
 
 @router.get("/artifacts")
 def list_artifacts(
-    request: Request,
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     sort: str = "captured_at_desc",
     tag_id: Optional[str] = None,
     collection_id: Optional[str] = None,
     plugin_type: Optional[str] = None,
     domain: Optional[str] = None,
     is_archived: bool = False,
+    conn: sqlite3.Connection = Depends(get_read_db),
 ):
     if limit > 200:
         limit = 200
 
-    order = _SORT_MAP.get(sort, "a.captured_at DESC")
-
-    conn = get_connection()
-    try:
-        where_clauses = ["a.is_archived = ?"]
-        params: list = [int(is_archived)]
-
-        if plugin_type:
-            where_clauses.append("a.plugin_type = ?")
-            params.append(plugin_type)
-        if domain:
-            where_clauses.append("a.source_domain = ?")
-            params.append(domain)
-        if tag_id:
-            where_clauses.append(
-                "EXISTS (SELECT 1 FROM artifact_tag at WHERE at.artifact_id = a.id AND at.tag_id = ?)"
-            )
-            params.append(tag_id)
-        if collection_id:
-            where_clauses.append(
-                "EXISTS (SELECT 1 FROM artifact_collection ac WHERE ac.artifact_id = a.id AND ac.collection_id = ?)"
-            )
-            params.append(collection_id)
-
-        where_sql = " AND ".join(where_clauses)
-        rows = conn.execute(
-            f"SELECT * FROM artifact a WHERE {where_sql} ORDER BY {order} LIMIT ? OFFSET ?",
-            params + [limit, offset],
-        ).fetchall()
+    if sort not in _SORT_MAP:
+        sort = "captured_at_desc"
+    key_columns, direction = _SORT_MAP[sort]
+
+    where_clauses, params = _filter_clauses(is_archived, plugin_type, domain, tag_id, collection_id)
+
+    # Cursor mode: continue after the last row of the previous page; offset is ignored
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort, len(key_columns))
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        where_clauses.append(keyset_clause(key_columns, direction))
+        params.extend(after)
+        offset = 0
+
+    where_sql = " AND ".join(where_clauses)
+    rows = conn.execute(
+        f"""
+        SELECT * FROM artifact a
+        WHERE {where_sql}
+        ORDER BY {order_clause(key_columns, direction)}
+        LIMIT ? OFFSET ?
+        """,
+        params + [limit, offset],
+    ).fetchall()
+
+    keys = tuple(column.removeprefix("a.") for column in key_columns)
+    if (next_page := next_cursor(sort, rows, keys, limit)):
+        response.headers[NEXT_CURSOR_HEADER] = next_page
 
-        artifact_ids = [r["id"] for r in rows]
-        tags_by_id = _fetch_tags_for_artifacts(conn, artifact_ids)
+    artifact_ids = [r["id"] for r in rows]
+    tags_by_id = _fetch_tags_for_artifacts(conn, artifact_ids)
+    pending_by_id = _fetch_pending_tasks(conn, artifact_ids)
 
-        return [_row_to_card(row, tags_by_id[row["id"]]) for row in rows]
-    finally:
-        conn.close()
+    return [
+        {**_row_to_card(row, tags_by_id[row["id"]]), "pending_tasks": pending_by_id[row["id"]]}
+        for row in rows
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -133,62 +201,59 @@ def list_artifacts(
 # ---------------------------------------------------------------------------
 
 @router.get("/artifacts/{artifact_id}")
-def get_artifact(artifact_id: str):
-    conn = get_connection()
-    try:
-        row = conn.execute(
-            "SELECT * FROM artifact WHERE id = ?", (artifact_id,)
-        ).fetchone()
-        if row is None:
-            raise HTTPException(status_code=404, detail="Artifact not found")
-
-        tags = conn.execute(
-            """
-            SELECT t.id, t.name, t.color, at.source
-            FROM artifact_tag at
-            JOIN tag t ON t.id = at.tag_id
-            WHERE at.artifact_id = ?
-            ORDER BY t.name
-            """,
-            (artifact_id,),
-        ).fetchall()
+def get_artifact(artifact_id: str, conn: sqlite3.Connection = Depends(get_read_db)):
+    row = conn.execute(
+        "SELECT * FROM artifact WHERE id = ?", (artifact_id,)
+    ).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    tags = conn.execute(
+        """
+        SELECT t.id, t.name, t.color, at.source
+        FROM artifact_tag at
+        JOIN tag t ON t.id = at.tag_id
+        WHERE at.artifact_id = ?
+        ORDER BY t.name
+        """,
+        (artifact_id,),
+    ).fetchall()
 
-        collections = conn.execute(
-            """
-            SELECT c.id, c.name
-            FROM artifact_collection ac
-            JOIN collection c ON c.id = ac.collection_id
-            WHERE ac.artifact_id = ?
-            ORDER BY c.name
-            """,
-            (artifact_id,),
-        ).fetchall()
+    collections = conn.execute(
+        """
+        SELECT c.id, c.name
+        FROM artifact_collection ac
+        JOIN collection c ON c.id = ac.collection_id
+        WHERE ac.artifact_id = ?
+        ORDER BY c.name
+        """,
+        (artifact_id,),
+    ).fetchall()
 
-        import json
-        return {
-            "id": row["id"],
-            "plugin_type": row["plugin_type"],
-            "source_url": row["source_url"],
-            "source_domain": row["source_domain"],
-            "captured_at": row["captured_at"],
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"],
-            "content_path": row["content_path"],
-            "title": row["title"],
-            "excerpt": row["excerpt"],
-            "thumbnail_path": row["thumbnail_path"],
-            "summary": row["summary"],
-            "user_notes": row["user_notes"],
-            "is_read": bool(row["is_read"]),
-            "is_archived": bool(row["is_archived"]),
-            "importance": row["importance"],
-            "plugin_data": json.loads(row["plugin_data"]) if row["plugin_data"] else {},
-            "plugin_version": row["plugin_version"],
-            "tags": [{"id": t["id"], "name": t["name"], "color": t["color"], "source": t["source"]} for t in tags],
-            "collections": [{"id": c["id"], "name": c["name"]} for c in collections],
-        }
-    finally:
-        conn.close()
+    import json
+    return {
+        "id": row["id"],
+        "plugin_type": row["plugin_type"],
+        "source_url": row["source_url"],
+        "source_domain": row["source_domain"],
+        "captured_at": row["captured_at"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "content_path": row["content_path"],
+        "title": row["title"],
+        "excerpt": row["excerpt"],
+        "thumbnail_path": row["thumbnail_path"],
+        "summary": row["summary"],
+        "user_notes": row["user_notes"],
+        "is_read": bool(row["is_read"]),
+        "is_archived": bool(row["is_archived"]),
+        "importance": row["importance"],
+        "plugin_data": json.loads(row["plugin_data"]) if row["plugin_data"] else {},
+        "plugin_version": row["plugin_version"],
+        "tags": [{"id": t["id"], "name": t["name"], "color": t["color"], "source": t["source"]} for t in tags],
+        "collections": [{"id": c["id"], "name": c["name"]} for c in collections],
+        "pending_tasks": _fetch_pending_tasks(conn, [artifact_id])[artifact_id],
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -204,48 +269,33 @@ class ArtifactUpdate(BaseModel):
 
 
 @router.patch("/artifacts/{artifact_id}")
-def update_artifact(artifact_id: str, body: ArtifactUpdate):
-    conn = get_connection()
-    try:
-        row = conn.execute(
-            "SELECT * FROM artifact WHERE id = ?", (artifact_id,)
-        ).fetchone()
-        if row is None:
-            raise HTTPException(status_code=404, detail="Artifact not found")
-
-        fields: dict = body.model_dump(exclude_none=True)
-        if not fields:
-            raise HTTPException(status_code=400, detail="No fields to update")
-
-        now = datetime.now(timezone.utc).isoformat()
-        set_clauses = ", ".join(f"{k} = ?" for k in fields)
-        values = list(fields.values()) + [now, artifact_id]
-        conn.execute(
-            f"UPDATE artifact SET {set_clauses}, updated_at = ? WHERE id = ?",
-            values,
-        )
+def update_artifact(
+    artifact_id: str,
+    body: ArtifactUpdate,
+    conn: sqlite3.Connection = Depends(get_write_db),
+):
+    row = conn.execute(
+        "SELECT * FROM artifact WHERE id = ?", (artifact_id,)
+    ).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    fields: dict = body.model_dump(exclude_none=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    now = datetime.now(timezone.utc).isoformat()
+    set_clauses = ", ".join(f"{k} = ?" for k in fields)
+    values = list(fields.values()) + [now, artifact_id]
+    conn.execute(
+        f"UPDATE artifact SET {set_clauses}, updated_at = ? WHERE id = ?",
+        values,
+    )
 
-        # Re-sync FTS if text fields changed
-        if "title" in fields or "user_notes" in fields:
-            fts_row = conn.execute(
-                "SELECT rowid FROM artifact_fts WHERE artifact_id = ?", (artifact_id,)
-            ).fetchone()
-            new_title = fields.get("title", row["title"])
-            new_notes = fields.get("user_notes", row["user_notes"])
-            if fts_row:
-                conn.execute("DELETE FROM artifact_fts WHERE rowid = ?", (fts_row[0],))
-            conn.execute(
-                """
-                INSERT INTO artifact_fts(artifact_id, title, excerpt, summary, user_notes, tags, full_text)
-                SELECT id, ?, excerpt, summary, ?, NULL, NULL FROM artifact WHERE id = ?
-                """,
-                (new_title, new_notes, artifact_id),
-            )
-
-        conn.commit()
-        return get_artifact(artifact_id)
-    finally:
-        conn.close()
+    # artifact_fts picks up title / user_notes changes via trigger
+
+    conn.commit()
+    return get_artifact(artifact_id, conn)
 
 
 # ---------------------------------------------------------------------------
@@ -253,33 +303,25 @@ def update_artifact(artifact_id: str, body: ArtifactUpdate):
 # ---------------------------------------------------------------------------
 
 @router.delete("/artifacts/{artifact_id}", status_code=204)
-def delete_artifact(artifact_id: str):
-    conn = get_connection()
-    try:
-        row = conn.execute(
-            "SELECT content_path FROM artifact WHERE id = ?", (artifact_id,)
-        ).fetchone()
-        if row is None:
-            raise HTTPException(status_code=404, detail="Artifact not found")
-
-        content_path = row["content_path"]
-
-        # Remove FTS row
-        fts_row = conn.execute(
-            "SELECT rowid FROM artifact_fts WHERE artifact_id = ?", (artifact_id,)
-        ).fetchone()
-        if fts_row:
-            conn.execute("DELETE FROM artifact_fts WHERE rowid = ?", (fts_row[0],))
-
-        # Remove DB row (cascades to artifact_tag, artifact_collection, processing_queue)
-        conn.execute("DELETE FROM artifact WHERE id = ?", (artifact_id,))
-        conn.commit()
-
-        # Remove files from disk
-        if content_path:
-            shutil.rmtree(content_path, ignore_errors=True)
-    finally:
-        conn.close()
+def delete_artifact(artifact_id: str, conn: sqlite3.Connection = Depends(get_write_db)):
+    row = conn.execute(
+        "SELECT content_path FROM artifact WHERE id = ?", (artifact_id,)
+    ).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    content_path = row["content_path"]
+
+    # Remove DB row (cascades to artifact_tag, artifact_collection, processing_queue
+    # and artifact_blob; the artifact_fts row is removed and blob refcounts dropped by trigger)
+    conn.execute("DELETE FROM artifact WHERE id = ?", (artifact_id,))
+    conn.commit()
+    artifact_paths.evict(artifact_id)
+
+    # Remove the artifact's links, then any blobs no other artifact shares
+    if content_path:
+        shutil.rmtree(content_path, ignore_errors=True)
+    collect_garbage(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -287,18 +329,19 @@ def delete_artifact(artifact_id: str):
 # ---------------------------------------------------------------------------
 
 @router.get("/artifacts/{artifact_id}/files/{role}")
-def get_artifact_file(artifact_id: str, role: str):
-    conn = get_connection()
-    try:
-        row = conn.execute(
-            "SELECT content_path FROM artifact WHERE id = ?", (artifact_id,)
-        ).fetchone()
-        if row is None:
-            raise HTTPException(status_code=404, detail="Artifact not found")
-    finally:
-        conn.close()
-
-    artifact_dir = Path(row["content_path"])
+def get_artifact_file(artifact_id: str, role: str, request: Request, w: Optional[int] = None):
+    """
+    Serve an artifact file by role, with caching headers (core/serving.py).
+    For 'thumbnail', w is the pixel width the client will display it at: the
+    smallest WebP derivative at least that wide is served (1x without w), or
+    the original until derivatives exist.
+    """
+    artifact_dir = artifact_paths.resolve(artifact_id, _load_content_path)
+    if artifact_dir is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    if role == "thumbnail" and (variant := variant_for_width(artifact_dir, w)) is not None:
+        return file_response(request, variant, media_type="image/webp")
 
     if role in _ROLE_TO_PATH:
         subdir, filename = _ROLE_TO_PATH[role]
@@ -312,4 +355,79 @@ def get_artifact_file(artifact_id: str, role: str):
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
 
-    return FileResponse(str(file_path))
+    # Captured originals are never replaced; derivatives may be regenerated
+    cache_control = IMMUTABLE if file_path.relative_to(artifact_dir).parts[0] == "raw" else None
+    return file_response(request, file_path, cache_control)
+
+
+def _load_content_path(artifact_id: str) -> Optional[str]:
+    with read_connection() as conn:
+        row = conn.execute("SELECT content_path FROM artifact WHERE id = ?", (artifact_id,)).fetchone()
+    return row["content_path"] if row else None
+
+
+def _load_content_paths(artifact_ids: list[str]) -> dict[str, str]:
+    placeholders = ",".join("?" * len(artifact_ids))
+    with read_connection() as conn:
+        rows = conn.execute(
+            f"SELECT id, content_path FROM artifact WHERE id IN ({placeholders})", artifact_ids
+        ).fetchall()
+    return {row["id"]: row["content_path"] for row in rows}
+
+
+# ---------------------------------------------------------------------------
+# Batch thumbnails
+# ---------------------------------------------------------------------------
+
+_THUMBNAIL_BATCH_MAX = 200
+_INLINE_MAX_BYTES = int(os.getenv("THUMBNAIL_BATCH_INLINE_BYTES", str(64 * 1024)))
+
+_THUMBNAIL_MEDIA_TYPES = {".webp": "image/webp", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+
+class ThumbnailBatch(BaseModel):
+    ids: list[str]
+    w: Optional[int] = None             # display width in pixels, as for get_artifact_file
+    known: dict[str, str] = {}          # artifact id → ETag of the thumbnail the client already has
+
+
+@router.post("/artifacts/thumbnails")
+def get_thumbnails(body: ThumbnailBatch):
+    """
+    Thumbnails for a grid page in one request. Per requested id:
+      {"etag"}          — unchanged: known[id] is still current
+      {"etag", "data"}  — a data: URI of the thumbnail
+      {"etag", "url"}   — too big to inline (THUMBNAIL_BATCH_INLINE_BYTES); fetch it
+      null              — no such artifact, or no thumbnail yet
+    ETags are the ones get_artifact_file sends for the same file.
+    """
+    if len(body.ids) > _THUMBNAIL_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {_THUMBNAIL_BATCH_MAX} ids per request")
+
+    ids = list(dict.fromkeys(body.ids))
+    directories = artifact_paths.resolve_many(ids, _load_content_paths) if ids else {}
+    thumbnail_name = _ROLE_TO_PATH["thumbnail"][1]
+    width = f"?w={body.w}" if body.w else ""
+
+    result: dict[str, Optional[dict]] = {}
+    for artifact_id in ids:
+        artifact_dir = directories.get(artifact_id)
+        path = artifact_dir and (variant_for_width(artifact_dir, body.w) or artifact_dir / thumbnail_name)
+        try:
+            stat = path.stat() if path else None
+        except FileNotFoundError:
+            stat = None
+        if stat is None:
+            result[artifact_id] = None
+            continue
+
+        etag = file_etag(stat)
+        if body.known.get(artifact_id) == etag:
+            result[artifact_id] = {"etag": etag}
+        elif stat.st_size > _INLINE_MAX_BYTES:
+            result[artifact_id] = {"etag": etag, "url": f"/api/artifacts/{artifact_id}/files/thumbnail{width}"}
+        else:
+            media_type = _THUMBNAIL_MEDIA_TYPES.get(path.suffix.lower(), "application/octet-stream")
+            encoded = base64.b64encode(path.read_bytes()).decode("ascii")
+            result[artifact_id] = {"etag": etag, "data": f"data:{media_type};base64,{encoded}"}
+    return result
@@ -0,0 +1,40 @@
+"""
+Archive export endpoint (core/export.py).
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from core.db import get_connection
+from core.export import EXPORT_FORMATS, ExportError, new_watermark, parse_since, stream_export
+
+router = APIRouter()
+
+# Response header carrying the watermark to pass as the next export's since
+WATERMARK_HEADER = "X-Export-Watermark"
+
+_MEDIA_TYPES = {"zip": "application/zip", "tar": "application/x-tar"}
+
+
+@router.get("/export")
+def export_archive(format: str = "zip", since: Optional[str] = None):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    try:
+        since = parse_since(since)
+    except ExportError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    watermark = new_watermark()
+    kind = "delta" if since else "full"
+    filename = f"pindrop-{kind}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(get_connection, format, since, watermark),
+        media_type=_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            WATERMARK_HEADER: watermark,
+        },
+    )
@@ -1,80 +1,573 @@
 """
-Full-text search endpoint (FTS5 / BM25).
+Search endpoints.
+
+/search takes FTS5 query syntax as typed; /search/typeahead compiles partial
+search-box input into a safe prefix query and answers within a latency budget;
+/search/semantic ranks by embedding similarity (core/vectors.py);
+/search/hybrid runs FTS and vector search concurrently and fuses the rankings;
+/retrieve does the same over passages (core/chunks.py) and packs the best of
+them into a size budget.
 """
-from fastapi import APIRouter, HTTPException
+import math
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Response
 
-from core.db import get_connection
+from core.api.artifacts import NEXT_CURSOR_HEADER, _fetch_tags_for_artifacts, _filter_clauses, _row_to_card
+from core.chunks import CHUNK_NAMESPACE, fetch_chunks
+from core.db import get_read_db, read_connection
+from core.embeddings import embed_query, get_provider
+from core.fts import compile_prefix_query, compile_terms_query, fetch_highlights
+from core.pagination import InvalidCursor, decode_cursor, keyset_clause, next_cursor
+from core.vectors import ARTIFACT_NAMESPACE, VectorMatch, get_index
 
 router = APIRouter()
 
+# Time allowed for ranking a type-ahead query across all columns before
+# falling back to title and tag matches only
+_TYPEAHEAD_BUDGET = float(os.getenv("SEARCH_TYPEAHEAD_BUDGET_MS", "50")) / 1000
+
+# Extra time hybrid search may spend widening a natural-language query from
+# all-words to any-word matching; past it, the all-words matches are used
+_HYBRID_WIDEN_BUDGET = float(os.getenv("SEARCH_HYBRID_WIDEN_BUDGET_MS", "50")) / 1000
+
+# Matches with card columns. Joins on rowid (docid) rather than
+# artifact_fts.artifact_id: reading any FTS column would make FTS5 fetch the
+# external content row, full_text included. artifact_fts.rank carries the
+# per-column bm25 weights configured in migration 0007. Params: the MATCH
+# expression, then the filter params.
+_MATCH_SELECT = """
+    SELECT
+        d.docid, a.id, a.plugin_type, a.title, a.excerpt,
+        a.thumbnail_path, a.captured_at, a.updated_at, a.source_url, a.source_domain,
+        a.is_archived, a.is_read, a.importance,
+        {rank} AS rank
+    FROM artifact_fts
+    JOIN artifact_fts_doc d ON d.docid = artifact_fts.rowid
+    JOIN artifact a ON a.id = d.artifact_id
+    WHERE artifact_fts MATCH ?
+      AND {filters}
+"""
+_RANKED_SELECT = _MATCH_SELECT.format(rank="artifact_fts.rank", filters="a.is_archived = 0")
+_UNRANKED_SELECT = _MATCH_SELECT.format(rank="NULL", filters="a.is_archived = 0")
+
+
+def _results(conn: sqlite3.Connection, rows: list[sqlite3.Row], match: str) -> list[dict]:
+    tags_by_id = _fetch_tags_for_artifacts(conn, [r["id"] for r in rows])
+    highlights = fetch_highlights(conn, match, [r["docid"] for r in rows])
+    return [
+        {
+            **_row_to_card(row, tags_by_id[row["id"]]),
+            "rank": row["rank"],
+            "highlights": highlights.get(row["docid"], {"title": [], "snippet": []}),
+        }
+        for row in rows
+    ]
+
 
 @router.get("/search")
-def search_artifacts(q: str, limit: int = 20, offset: int = 0):
+def search_artifacts(
+    q: str,
+    response: Response,
+    limit: int = 20,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    conn: sqlite3.Connection = Depends(get_read_db),
+):
     if not q.strip():
         raise HTTPException(status_code=400, detail="Search query cannot be empty")
     if limit > 200:
         limit = 200
 
-    conn = get_connection()
+    # Results are ordered by (rank, id); a cursor resumes after the last row of the previous page
+    keyset_sql = ""
+    params: list = [q]
+    if cursor:
+        try:
+            params.extend(decode_cursor(cursor, "rank", 2))
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        keyset_sql = f"WHERE {keyset_clause(('rank', 'id'), 'ASC')}"
+        offset = 0
+
     try:
         rows = conn.execute(
-            """
-            SELECT
-                a.id, a.plugin_type, a.title, a.excerpt,
-                a.thumbnail_path, a.captured_at, a.source_url, a.source_domain,
-                a.is_archived, a.is_read, a.importance,
-                bm25(artifact_fts) AS rank
-            FROM artifact_fts
-            JOIN artifact a ON a.id = artifact_fts.artifact_id
-            WHERE artifact_fts MATCH ?
-              AND a.is_archived = 0
-            ORDER BY rank
+            f"""
+            SELECT * FROM ({_RANKED_SELECT})
+            {keyset_sql}
+            ORDER BY rank, id
             LIMIT ? OFFSET ?
             """,
-            (q, limit, offset),
+            params + [limit, offset],
         ).fetchall()
+    except sqlite3.OperationalError as exc:
+        # FTS5 query syntax errors surface here (unbalanced quotes, bare operators, ...)
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {exc}")
 
-        if not rows:
-            return []
+    if (next_page := next_cursor("rank", rows, ("rank", "id"), limit)):
+        response.headers[NEXT_CURSOR_HEADER] = next_page
 
-        artifact_ids = [r["id"] for r in rows]
-        placeholders = ",".join("?" * len(artifact_ids))
-        tag_rows = conn.execute(
-            f"""
-            SELECT at.artifact_id, t.id, t.name, t.color
-            FROM artifact_tag at
-            JOIN tag t ON t.id = at.tag_id
-            WHERE at.artifact_id IN ({placeholders})
-            ORDER BY t.name
-            """,
-            artifact_ids,
+    return _results(conn, rows, q)
+
+
+# ---------------------------------------------------------------------------
+# Type-ahead
+# ---------------------------------------------------------------------------
+
+def _within_budget(conn: sqlite3.Connection, sql: str, params: tuple, budget: float) -> Optional[list[sqlite3.Row]]:
+    """Run a query, or return None if it doesn't finish within `budget` seconds."""
+    deadline = time.perf_counter() + budget
+    conn.set_progress_handler(lambda: time.perf_counter() > deadline, 1000)
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError as exc:
+        if "interrupted" not in str(exc):
+            raise
+        return None
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+@router.get("/search/typeahead")
+def typeahead_search(
+    q: str,
+    limit: int = 10,
+    conn: sqlite3.Connection = Depends(get_read_db),
+):
+    """
+    Search-as-you-type. The last word matches as a prefix; input never causes
+    a query syntax error.
+
+    Ranking scores every match, which for short prefixes of common words can
+    mean most of the library. If it doesn't finish within
+    SEARCH_TYPEAHEAD_BUDGET_MS, the newest matches are returned unranked
+    instead (FTS5 walks rowids newest-first and stops at the limit) and the
+    response is flagged partial; later keystrokes narrow the match set.
+    """
+    started = time.perf_counter()
+    limit = max(1, min(limit, 50))
+
+    match = compile_prefix_query(q)
+    if match is None:
+        return {"query": q, "results": [], "partial": False, "took_ms": 0.0}
+
+    rows = _within_budget(conn, f"{_RANKED_SELECT} ORDER BY rank, a.id LIMIT ?", (match, limit), _TYPEAHEAD_BUDGET)
+    partial = rows is None
+    if partial:
+        rows = conn.execute(
+            f"{_UNRANKED_SELECT} ORDER BY artifact_fts.rowid DESC LIMIT ?",
+            (match, limit),
         ).fetchall()
 
-        tags_by_id: dict[str, list] = {aid: [] for aid in artifact_ids}
-        for tag_row in tag_rows:
-            tags_by_id[tag_row["artifact_id"]].append({
-                "id": tag_row["id"],
-                "name": tag_row["name"],
-                "color": tag_row["color"],
+    return {
+        "query": q,
+        "results": _results(conn, rows, match),
+        "partial": partial,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Semantic
+# ---------------------------------------------------------------------------
+
+def _query_embedder() -> Optional[Callable[[str], Sequence[float]]]:
+    """Embeds query text into the artifact vector space; None without an embedding provider."""
+    return embed_query if get_provider() is not None else None
+
+
+@router.get("/search/semantic")
+def semantic_search(
+    artifact_id: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 20,
+    conn: sqlite3.Connection = Depends(get_read_db),
+):
+    """
+    Nearest artifacts by embedding. Pass artifact_id for "more like this", or
+    q to embed free text (requires an embedding provider).
+    """
+    if (artifact_id is None) == (q is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of artifact_id or q")
+    limit = max(1, min(limit, 200))
+
+    index = get_index()
+    if artifact_id is not None:
+        query = index.get(conn, artifact_id)
+        if query is None:
+            raise HTTPException(status_code=404, detail="Artifact has no embedding")
+    else:
+        embed = _query_embedder()
+        if embed is None:
+            raise HTTPException(status_code=503, detail="No embedding provider configured")
+        query = embed(q)
+
+    # Over-fetch a little: the query artifact itself and archived artifacts are dropped below
+    matches = [m for m in index.search(conn, query, k=limit * 2 + 1) if m.artifact_id != artifact_id]
+    if not matches:
+        return []
+
+    ids = [m.artifact_id for m in matches]
+    placeholders = ",".join("?" * len(ids))
+    rows = {
+        row["id"]: row
+        for row in conn.execute(
+            f"SELECT * FROM artifact WHERE id IN ({placeholders}) AND is_archived = 0", ids
+        ).fetchall()
+    }
+    matches = [m for m in matches if m.artifact_id in rows][:limit]
+    tags_by_id = _fetch_tags_for_artifacts(conn, [m.artifact_id for m in matches])
+    return [
+        {**_row_to_card(rows[m.artifact_id], tags_by_id[m.artifact_id]), "score": m.score}
+        for m in matches
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Hybrid
+# ---------------------------------------------------------------------------
+
+# Vector side of hybrid queries; numpy releases the GIL, so it overlaps the FTS query
+_HYBRID_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
+
+# Reciprocal rank fusion constant: damps the advantage of the very top ranks
+_RRF_K = 60
+
+# Query shape → (fts weight, vector weight). Short keyword queries are what
+# BM25 is good at; longer natural-language queries lean on embeddings.
+_SHAPE_WEIGHTS = {
+    "keyword": (1.0, 0.5),
+    "mixed": (1.0, 1.0),
+    "natural": (0.6, 1.0),
+}
+
+
+def _query_shape(q: str) -> str:
+    words = q.split()
+    if len(words) <= 2 and not q.rstrip().endswith("?"):
+        return "keyword"
+    if len(words) >= 5 or q.rstrip().endswith("?"):
+        return "natural"
+    return "mixed"
+
+
+def _fuse_rrf(ranked: list[tuple[float, list[str]]]) -> dict[str, float]:
+    scores: dict[str, float] = {}
+    for weight, ids in ranked:
+        for position, artifact_id in enumerate(ids, start=1):
+            scores[artifact_id] = scores.get(artifact_id, 0.0) + weight / (_RRF_K + position)
+    return scores
+
+
+def _fuse_scores(scored: list[tuple[float, dict[str, float]]]) -> dict[str, float]:
+    """Weighted sum of per-list min-max normalised scores (higher is better)."""
+    fused: dict[str, float] = {}
+    for weight, scores in scored:
+        if not scores:
+            continue
+        low, high = min(scores.values()), max(scores.values())
+        for artifact_id, score in scores.items():
+            normalised = (score - low) / (high - low) if high > low else 1.0
+            fused[artifact_id] = fused.get(artifact_id, 0.0) + weight * normalised
+    return fused
+
+
+def _vector_side(
+    embed: Callable[[str], Sequence[float]],
+    q: str,
+    where_clauses: list[str],
+    params: list,
+    restricted: bool,
+    depth: int,
+    namespace: str = ARTIFACT_NAMESPACE,
+) -> list[VectorMatch]:
+    """Vector top-k under the same filters as the FTS side. Runs on its own connection."""
+    query = embed(q)
+    with read_connection() as conn:
+        if restricted:
+            allowed = [r[0] for r in conn.execute(
+                f"SELECT a.id FROM artifact a WHERE {' AND '.join(where_clauses)}", params
+            )]
+            return get_index(namespace).search(conn, query, k=depth, artifact_ids=allowed)
+        # Default view: everything but the (usually few) archived artifacts
+        archived = [r[0] for r in conn.execute("SELECT id FROM artifact WHERE is_archived = 1")]
+        return get_index(namespace).search(conn, query, k=depth, exclude_artifact_ids=archived)
+
+
+@router.get("/search/hybrid")
+def hybrid_search(
+    q: str,
+    limit: int = 20,
+    fusion: str = "rrf",
+    tag_id: Optional[str] = None,
+    collection_id: Optional[str] = None,
+    plugin_type: Optional[str] = None,
+    domain: Optional[str] = None,
+    is_archived: bool = False,
+    conn: sqlite3.Connection = Depends(get_read_db),
+):
+    """
+    FTS and vector search over the same filters, run concurrently and fused.
+
+    fusion is 'rrf' (reciprocal rank fusion) or 'score' (min-max normalised
+    scores). The weight of each side follows the query's shape. Without an
+    embedding provider this degrades to FTS ranking and reports semantic: false.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query cannot be empty")
+    if fusion not in ("rrf", "score"):
+        raise HTTPException(status_code=400, detail="fusion must be 'rrf' or 'score'")
+    limit = max(1, min(limit, 100))
+
+    shape = _query_shape(q)
+    fts_weight, vector_weight = _SHAPE_WEIGHTS[shape]
+    where_clauses, params = _filter_clauses(is_archived, plugin_type, domain, tag_id, collection_id)
+    restricted = len(where_clauses) > 1 or is_archived
+    # Each side ranks a few pages deep so fusion can promote items either one ranks lower
+    depth = min(limit * 3, 150)
+
+    embed = _query_embedder()
+    vector_future = (
+        _HYBRID_POOL.submit(_vector_side, embed, q, where_clauses, params, restricted, depth)
+        if embed is not None else None
+    )
+
+    fts_sql = f"""
+        {_MATCH_SELECT.format(rank="artifact_fts.rank", filters=" AND ".join(where_clauses))}
+        ORDER BY rank, a.id
+        LIMIT ?
+    """
+    fts_rows: list[sqlite3.Row] = []
+    match = compile_terms_query(q)
+    if match is not None:
+        fts_rows = conn.execute(fts_sql, [match, *params, depth]).fetchall()
+        # Longer queries rarely match every word; widen to any-word matching if
+        # that fits the budget (common words can match most of the library)
+        if shape != "keyword" and len(fts_rows) < depth:
+            any_match = compile_terms_query(q, any_term=True)
+            widened = _within_budget(conn, fts_sql, (any_match, *params, depth), _HYBRID_WIDEN_BUDGET)
+            if widened is not None:
+                match, fts_rows = any_match, widened
+    vector_matches = vector_future.result() if vector_future is not None else []
+
+    fts_by_id = {row["id"]: row for row in fts_rows}
+    similarity = {m.artifact_id: m.score for m in vector_matches}
+    if fusion == "rrf":
+        fused = _fuse_rrf([
+            (fts_weight, [row["id"] for row in fts_rows]),
+            (vector_weight, [m.artifact_id for m in vector_matches]),
+        ])
+    else:
+        fused = _fuse_scores([
+            (fts_weight, {row["id"]: -row["rank"] for row in fts_rows}),
+            (vector_weight, similarity),
+        ])
+    top = sorted(fused, key=lambda artifact_id: (-fused[artifact_id], artifact_id))[:limit]
+
+    results = []
+    if top:
+        placeholders = ",".join("?" * len(top))
+        rows = {
+            row["id"]: row
+            for row in conn.execute(f"SELECT * FROM artifact WHERE id IN ({placeholders})", top).fetchall()
+        }
+        tags_by_id = _fetch_tags_for_artifacts(conn, top)
+        highlights = fetch_highlights(
+            conn, match, [fts_by_id[a]["docid"] for a in top if a in fts_by_id]
+        ) if match else {}
+        no_highlights = {"title": [], "snippet": []}
+        for artifact_id in top:
+            if artifact_id not in rows:
+                continue        # deleted since it was ranked
+            fts_row = fts_by_id.get(artifact_id)
+            results.append({
+                **_row_to_card(rows[artifact_id], tags_by_id[artifact_id]),
+                "score": fused[artifact_id],
+                "fts_rank": fts_row["rank"] if fts_row else None,
+                "similarity": similarity.get(artifact_id),
+                "highlights": highlights.get(fts_row["docid"], no_highlights) if fts_row else no_highlights,
             })
 
-        return [
-            {
-                "id": row["id"],
-                "plugin_type": row["plugin_type"],
-                "title": row["title"],
-                "excerpt": row["excerpt"],
-                "thumbnail_path": row["thumbnail_path"],
-                "captured_at": row["captured_at"],
-                "source_url": row["source_url"],
-                "source_domain": row["source_domain"],
-                "is_archived": bool(row["is_archived"]),
-                "is_read": bool(row["is_read"]),
-                "importance": row["importance"],
-                "rank": row["rank"],
-                "tags": tags_by_id[row["id"]],
-            }
-            for row in rows
-        ]
-    finally:
-        conn.close()
+    return {
+        "query": q,
+        "shape": shape,
+        "weights": {"fts": fts_weight, "vector": vector_weight},
+        "semantic": embed is not None,
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Passage retrieval
+# ---------------------------------------------------------------------------
+
+# Token budgets are converted at this rate rather than with a model tokenizer;
+# close for English prose under common BPE vocabularies
+_CHARS_PER_TOKEN = 4
+
+# Ranked passages considered for packing, per side
+_RETRIEVE_DEPTH = 100
+
+_CHUNK_MATCH_SELECT = """
+    SELECT c.id, chunk_fts.rank AS rank
+    FROM chunk_fts
+    JOIN artifact_chunk c ON c.id = chunk_fts.rowid
+    JOIN artifact a ON a.id = c.artifact_id
+    WHERE chunk_fts MATCH ?
+      AND {filters}
+    ORDER BY rank
+    LIMIT ?
+"""
+
+
+@router.get("/retrieve")
+def retrieve_passages(
+    q: str,
+    budget: int = 4000,
+    unit: str = "chars",
+    max_per_artifact: int = 3,
+    tag_id: Optional[str] = None,
+    collection_id: Optional[str] = None,
+    plugin_type: Optional[str] = None,
+    domain: Optional[str] = None,
+    is_archived: bool = False,
+    conn: sqlite3.Connection = Depends(get_read_db),
+):
+    """
+    The passages across all artifacts that best answer q, packed into a budget
+    of characters or (estimated) tokens — context for chat and Q&A.
+
+    Passages are ranked like /search/hybrid: FTS over chunk_fts and, with an
+    embedding provider, similarity in the 'chunk' vector namespace, fused with
+    RRF. They are then taken best-first, each one that fits in what is left
+    of the budget; one that doesn't is skipped in favour of smaller ones
+    further down. If even the best passage is larger than the whole budget,
+    it is returned cut to the budget, with truncated set. A passage
+    overlapping one already taken from the same artifact is skipped, and
+    max_per_artifact stops one long document from filling the budget.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query cannot be empty")
+    if unit not in ("chars", "tokens"):
+        raise HTTPException(status_code=400, detail="unit must be 'chars' or 'tokens'")
+    if budget < 1:
+        raise HTTPException(status_code=400, detail="budget must be positive")
+    max_per_artifact = max(1, max_per_artifact)
+
+    def cost(chars: int) -> int:
+        return math.ceil(chars / _CHARS_PER_TOKEN) if unit == "tokens" else chars
+
+    shape = _query_shape(q)
+    fts_weight, vector_weight = _SHAPE_WEIGHTS[shape]
+    where_clauses, params = _filter_clauses(is_archived, plugin_type, domain, tag_id, collection_id)
+    restricted = len(where_clauses) > 1 or is_archived
+
+    embed = _query_embedder()
+    vector_future = (
+        _HYBRID_POOL.submit(
+            _vector_side, embed, q, where_clauses, params, restricted, _RETRIEVE_DEPTH, CHUNK_NAMESPACE
+        )
+        if embed is not None else None
+    )
+
+    fts_sql = _CHUNK_MATCH_SELECT.format(filters=" AND ".join(where_clauses))
+    fts_rows: list[sqlite3.Row] = []
+    match = compile_terms_query(q)
+    if match is not None:
+        fts_rows = conn.execute(fts_sql, [match, *params, _RETRIEVE_DEPTH]).fetchall()
+        if shape != "keyword" and len(fts_rows) < _RETRIEVE_DEPTH:
+            widened = _within_budget(
+                conn, fts_sql, (compile_terms_query(q, any_term=True), *params, _RETRIEVE_DEPTH), _HYBRID_WIDEN_BUDGET
+            )
+            if widened is not None:
+                fts_rows = widened
+    vector_matches = vector_future.result() if vector_future is not None else []
+
+    fts_rank = {str(row["id"]): row["rank"] for row in fts_rows}
+    similarity = {m.key: m.score for m in vector_matches}
+    fused = _fuse_rrf([
+        (fts_weight, [str(row["id"]) for row in fts_rows]),
+        (vector_weight, [m.key for m in vector_matches]),
+    ])
+    ranked = sorted(fused, key=lambda key: (-fused[key], int(key)))
+
+    # Greedy packing, best first; smaller passages further down may still fit
+    chunks = fetch_chunks(conn, [int(key) for key in ranked])
+    taken: dict[str, list[tuple[int, int]]] = {}
+    picked: list[sqlite3.Row] = []
+    sizes: dict[int, int] = {}
+    clipped: dict[int, int] = {}       # chunk id → characters kept, for a passage cut to the budget
+    used = 0
+    for key in ranked:
+        chunk = chunks.get(int(key))
+        if chunk is None:
+            continue        # re-chunked or deleted since it was ranked
+        spans = taken.setdefault(chunk["artifact_id"], [])
+        start, end = chunk["start_offset"], chunk["end_offset"]
+        if len(spans) >= max_per_artifact or any(start < e and s < end for s, e in spans):
+            continue
+        size = cost(end - start)
+        if used + size > budget:
+            if picked:
+                continue
+            # Nothing taken yet: a budget below one passage still gets the best one, cut to fit
+            end = start + (budget * _CHARS_PER_TOKEN if unit == "tokens" else budget)
+            clipped[chunk["id"]] = end - start
+            size = cost(end - start)
+        spans.append((start, end))
+        picked.append(chunk)
+        sizes[chunk["id"]] = size
+        used += size
+
+    passages = []
+    if picked:
+        texts = fetch_chunks(conn, [chunk["id"] for chunk in picked], with_text=True)
+        artifact_ids = list(dict.fromkeys(chunk["artifact_id"] for chunk in picked))
+        placeholders = ",".join("?" * len(artifact_ids))
+        artifacts = {
+            row["id"]: row
+            for row in conn.execute(
+                f"SELECT id, plugin_type, title, source_url FROM artifact WHERE id IN ({placeholders})",
+                artifact_ids,
+            )
+        }
+        for chunk in picked:
+            if chunk["id"] not in texts or chunk["artifact_id"] not in artifacts:
+                used -= sizes[chunk["id"]]
+                continue    # removed between the two reads
+            artifact = artifacts[chunk["artifact_id"]]
+            key = str(chunk["id"])
+            text = texts[chunk["id"]]["text"]
+            end_offset = chunk["end_offset"]
+            if chunk["id"] in clipped:
+                text = text[:clipped[chunk["id"]]]
+                end_offset = chunk["start_offset"] + len(text)
+            passages.append({
+                "chunk_id": chunk["id"],
+                "artifact_id": chunk["artifact_id"],
+                "plugin_type": artifact["plugin_type"],
+                "title": artifact["title"],
+                "source_url": artifact["source_url"],
+                "seq": chunk["seq"],
+                "start_offset": chunk["start_offset"],
+                "end_offset": end_offset,
+                "text": text,
+                "truncated": chunk["id"] in clipped,
+                "score": fused[key],
+                "fts_rank": fts_rank.get(key),
+                "similarity": similarity.get(key),
+            })
+
+    return {
+        "query": q,
+        "shape": shape,
+        "semantic": embed is not None,
+        "budget": budget,
+        "unit": unit,
+        "used": used,
+        "passages": passages,
+    }
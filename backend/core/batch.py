@@ -0,0 +1,331 @@
+"""
+Bulk URL ingest with per-host politeness.
+
+A batch is a list of URLs scheduled through ingest_url. URLs may be added
+while the batch runs (open, add, close), so a streamed request body is
+scheduled as it arrives. Scheduling enforces:
+  - a global concurrency cap shared by all batches (BATCH_INGEST_CONCURRENCY)
+  - per-domain concurrency (BATCH_PER_HOST_CONCURRENCY) and a minimum interval
+    between capture starts on one domain (BATCH_PER_HOST_INTERVAL seconds),
+    keyed on the same source_domain normalisation ingestion records
+  - retries with exponential backoff (BATCH_MAX_ATTEMPTS, BATCH_RETRY_BACKOFF)
+
+Domains are served round-robin so one large site never starves the rest of
+the batch. Each batch ends with a single summary report.
+
+URLs are de-duplicated on their normalised form, within the batch and, unless
+the duplicate policy is 'snapshot', against the library with one lookup per
+add; already-archived URLs are reported as skipped with the existing
+artifact id and never scheduled.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from ulid import ULID
+
+from core.db import get_connection
+from core.ingestion import DuplicateArtifact, effective_duplicate_policy, find_duplicates, ingest_url
+from core.plugins.base import IngestionError
+from core.plugins.loader import PluginLoader
+from core.plugins.router import ContentRouter
+from core.urls import normalise_url, source_domain
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class BatchItem:
+    url: str
+    domain: str
+    status: str = "queued"          # 'queued', 'running', 'done', 'failed', 'skipped'
+    attempts: int = 0
+    artifact_id: Optional[str] = None
+    error: Optional[str] = None
+    not_before: float = 0.0         # monotonic time before which a retry may not start
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "status": self.status,
+            "attempts": self.attempts,
+            "artifact_id": self.artifact_id,
+            "error": self.error,
+        }
+
+
+@dataclass
+class Batch:
+    id: str
+    user_id: str
+    items: list[BatchItem]
+    created_at: str
+    duplicate_policy: Optional[str] = None
+    finished_at: Optional[str] = None
+    started: float = field(default_factory=time.monotonic)
+    duration: Optional[float] = None
+    # domain → items waiting to start, in submission order
+    pending: "OrderedDict[str, deque[BatchItem]]" = field(default_factory=OrderedDict)
+    running: int = 0
+    receiving: bool = True          # more URLs may still be added
+    seen: set[str] = field(default_factory=set)     # normalised URLs added so far
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def summary(self) -> dict:
+        counts = {status: 0 for status in ("queued", "running", "done", "failed", "skipped")}
+        for item in self.items:
+            counts[item.status] += 1
+        elapsed = self.duration if self.duration is not None else time.monotonic() - self.started
+        return {
+            "id": self.id,
+            "status": "done" if self.finished else "receiving" if self.receiving else "running",
+            "total": len(self.items),
+            "counts": counts,
+            "domains": len({item.domain for item in self.items}),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": round(elapsed, 3),
+            "results": [item.to_dict() for item in self.items],
+        }
+
+
+class _HostThrottle:
+    """Per-domain concurrency and start-rate bookkeeping. Guarded by the manager's condition."""
+
+    def __init__(self, per_host: int, interval: float):
+        self._per_host = max(1, per_host)
+        self._interval = max(0.0, interval)
+        self._active: dict[str, int] = {}
+        self._next_start: dict[str, float] = {}
+
+    def wait_time(self, domain: str, now: float) -> Optional[float]:
+        """Seconds until domain may start another capture; None if blocked on concurrency."""
+        if self._active.get(domain, 0) >= self._per_host:
+            return None
+        return max(self._next_start.get(domain, 0.0) - now, 0.0)
+
+    def acquire(self, domain: str, now: float) -> None:
+        self._active[domain] = self._active.get(domain, 0) + 1
+        self._next_start[domain] = now + self._interval
+
+    def release(self, domain: str) -> None:
+        remaining = self._active.get(domain, 1) - 1
+        if remaining:
+            self._active[domain] = remaining
+        else:
+            self._active.pop(domain, None)
+            # Forget the rate window once it has elapsed so the dict doesn't grow unbounded
+            if self._next_start.get(domain, 0.0) <= time.monotonic():
+                self._next_start.pop(domain, None)
+
+
+class BatchIngestManager:
+    """
+    Owns the shared worker pool and host throttle for all batches.
+
+    Each batch gets a dispatcher thread that starts items as soon as a global
+    slot, a host slot and the host's rate window allow.
+    """
+
+    def __init__(self, loader: PluginLoader, router: ContentRouter):
+        self._loader = loader
+        self._router = router
+        concurrency = max(1, int(os.getenv("BATCH_INGEST_CONCURRENCY", "4")))
+        self._max_attempts = max(1, int(os.getenv("BATCH_MAX_ATTEMPTS", "3")))
+        self._backoff = float(os.getenv("BATCH_RETRY_BACKOFF", "5"))
+        self._throttle = _HostThrottle(
+            per_host=int(os.getenv("BATCH_PER_HOST_CONCURRENCY", "1")),
+            interval=float(os.getenv("BATCH_PER_HOST_INTERVAL", "2")),
+        )
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-ingest")
+        self._cond = threading.Condition()
+        self._batches: OrderedDict[str, Batch] = OrderedDict()
+        self._retention = int(os.getenv("BATCH_RETENTION", "50"))
+        self._closed = False
+
+    def submit(self, urls: Iterable[str], user_id: str = "default", duplicate_policy: Optional[str] = None) -> dict:
+        """Schedule a complete list of URLs as one batch. Returns its summary."""
+        batch_id = self.open(user_id, duplicate_policy)
+        self.add(batch_id, urls)
+        return self.close(batch_id)
+
+    def open(self, user_id: str = "default", duplicate_policy: Optional[str] = None) -> str:
+        """Start a batch that URLs are added to as they arrive. Returns its id; close() it when done."""
+        batch = Batch(
+            id=str(ULID()), user_id=user_id, items=[], created_at=_now(),
+            duplicate_policy=effective_duplicate_policy(duplicate_policy),
+        )
+        with self._cond:
+            self._batches[batch.id] = batch
+            self._prune()
+        threading.Thread(target=self._dispatch, args=(batch,), name=f"batch-{batch.id}", daemon=True).start()
+        return batch.id
+
+    def add(self, batch_id: str, urls: Iterable[str]) -> None:
+        """Add URLs to an open batch; they are scheduled right away. Blocking (one library lookup)."""
+        with self._cond:
+            batch = self._batches[batch_id]
+        urls = [url for url in (raw.strip() for raw in urls) if url]
+        archived: dict[str, str] = {}
+        if batch.duplicate_policy != "snapshot":
+            conn = get_connection()
+            try:
+                archived = find_duplicates(conn, urls)
+            finally:
+                conn.close()
+
+        with self._cond:
+            for url in urls:
+                key = normalise_url(url) or url
+                item = BatchItem(url=url, domain=source_domain(url))
+                batch.items.append(item)
+                if key in batch.seen:
+                    item.status, item.error = "skipped", "Duplicate URL in batch"
+                elif url in archived:
+                    item.status, item.artifact_id, item.error = "skipped", archived[url], "Already archived"
+                elif not item.domain:
+                    item.status, item.error = "failed", "Invalid URL"
+                elif self._router.route(url) is None:
+                    # Routing failures are permanent — don't spend retries on them
+                    item.status, item.error = "failed", f"No content plugin found for: {url}"
+                else:
+                    batch.pending.setdefault(item.domain, deque()).append(item)
+                batch.seen.add(key)
+            self._cond.notify_all()
+
+    def close(self, batch_id: str) -> dict:
+        """Mark a batch complete: it finishes once its URLs have. Returns its summary."""
+        with self._cond:
+            batch = self._batches[batch_id]
+            batch.receiving = False
+            if not batch.pending and batch.running == 0:
+                self._finish(batch)
+            self._cond.notify_all()
+            return batch.summary()
+
+    def get(self, batch_id: str) -> Optional[dict]:
+        with self._cond:
+            batch = self._batches.get(batch_id)
+            return batch.summary() if batch else None
+
+    def is_finished(self, batch_id: str) -> bool:
+        with self._cond:
+            batch = self._batches.get(batch_id)
+            return batch is None or batch.finished
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Scheduling ---
+
+    def _dispatch(self, batch: Batch) -> None:
+        while True:
+            # Don't hold a global slot while a batch waits for more of its request body
+            with self._cond:
+                while batch.receiving and not batch.pending and not self._closed:
+                    self._cond.wait(timeout=1.0)
+            self._slots.acquire()
+            item = self._next_ready(batch)
+            if item is None:
+                self._slots.release()
+                return
+            self._executor.submit(self._run, batch, item)
+
+    def _next_ready(self, batch: Batch) -> Optional[BatchItem]:
+        """Block until an item may start and claim it; None once the batch has nothing left."""
+        with self._cond:
+            while not self._closed:
+                if not batch.pending and batch.running == 0 and not batch.receiving:
+                    self._finish(batch)
+                    return None
+
+                now = time.monotonic()
+                wake: Optional[float] = None
+                # Round-robin: check domains in order, rotate the chosen one to the back
+                for domain, items in batch.pending.items():
+                    host_wait = self._throttle.wait_time(domain, now)
+                    if host_wait is None:
+                        continue
+                    delay = max(host_wait, items[0].not_before - now)
+                    if delay <= 0:
+                        item = items.popleft()
+                        if items:
+                            batch.pending.move_to_end(domain)
+                        else:
+                            del batch.pending[domain]
+                        self._throttle.acquire(domain, now)
+                        item.status = "running"
+                        item.attempts += 1
+                        batch.running += 1
+                        return item
+                    wake = delay if wake is None else min(wake, delay)
+
+                # Nothing startable yet — sleep until the nearest rate window, or a completion
+                self._cond.wait(timeout=min(wake, 1.0) if wake is not None else 1.0)
+            return None
+
+    def _run(self, batch: Batch, item: BatchItem) -> None:
+        error: Optional[str] = None
+        artifact_id: Optional[str] = None
+        duplicate = False
+        conn = get_connection()
+        try:
+            artifact = ingest_url(
+                item.url, conn, self._loader, self._router,
+                user_id=batch.user_id, duplicate_policy=batch.duplicate_policy,
+            )
+            artifact_id, duplicate = artifact["id"], artifact["duplicate"]
+        except DuplicateArtifact as exc:
+            artifact_id, duplicate = exc.artifact_id, True
+        except IngestionError as exc:
+            error = str(exc)
+        except Exception as exc:
+            error = f"Unexpected error: {exc}"
+        finally:
+            conn.close()
+
+        with self._cond:
+            self._throttle.release(item.domain)
+            batch.running -= 1
+            if duplicate:
+                # Archived since submit, or redirected to an archived page
+                item.status, item.artifact_id, item.error = "skipped", artifact_id, "Already archived"
+            elif error is None:
+                item.status, item.artifact_id, item.error = "done", artifact_id, None
+            elif item.attempts < self._max_attempts:
+                item.status, item.error = "queued", error
+                item.not_before = time.monotonic() + self._backoff * 2 ** (item.attempts - 1)
+                batch.pending.setdefault(item.domain, deque()).append(item)
+            else:
+                item.status, item.error = "failed", error
+            self._cond.notify_all()
+        self._slots.release()
+
+    def _prune(self) -> None:
+        """Drop the oldest finished batches beyond the retention limit. Caller holds the condition."""
+        finished = [batch_id for batch_id, batch in self._batches.items() if batch.finished]
+        for batch_id in finished[: max(len(finished) - self._retention, 0)]:
+            del self._batches[batch_id]
+
+    def _finish(self, batch: Batch) -> None:
+        """Mark a batch complete. Caller holds the condition."""
+        if batch.finished:
+            return
+        batch.finished_at = _now()
+        batch.duration = time.monotonic() - batch.started
+        done = sum(1 for item in batch.items if item.status == "done")
+        print(f"  batch {batch.id}: {done}/{len(batch.items)} ingested in {batch.duration:.1f}s")
@@ -0,0 +1,215 @@
+"""
+Content-addressed blob store for artifact files.
+
+Every file ingest_url moves into an artifact directory is hashed (sha256) and
+kept once under data/system/blobs/{hash[:2]}/{hash}. The artifact's own path
+(e.g. raw/original.html) is a hard link to that blob, so identical
+screenshots, images and re-captured pages share one copy on disk, while
+everything that reads artifact files by path — file serving, plugins'
+get_fts_text, exports — is unchanged. Where hard links aren't supported the
+file is copied instead, which still works but saves nothing.
+
+artifact_blob records which artifact paths reference which blob, and triggers
+keep blob.refcount in step (migration 0012), including when an artifact row is
+deleted. collect_garbage() removes blobs nobody references any more.
+
+Blob files are immutable: code that regenerates an artifact file must write a
+new file and replace the path, never modify it in place, or every artifact
+sharing the blob would change with it.
+
+Existing libraries are converted, and orphaned blob files (plus stale
+encoded copies in the file-serving cache, core/serving.py) swept, with:
+
+    python -m core.blobs dedupe
+    python -m core.blobs gc
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from core.db import get_connection, get_data_path, run_migrations
+from core.serving import sweep_encoded
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _blob_root() -> Path:
+    return get_data_path() / "system" / "blobs"
+
+
+def blob_path(digest: str) -> Path:
+    return _blob_root() / digest[:2] / digest
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+def store_file(src: Path, dest: Path) -> tuple[str, int, bool]:
+    """
+    Move src to dest through the blob store: dest ends up a link to the blob
+    with src's content, which is created from src if it doesn't exist yet.
+    Returns (digest, size, stored) — stored is False when the content was
+    already in the store and nothing new was written.
+    """
+    digest = file_digest(src)
+    size = src.stat().st_size
+    target = blob_path(digest)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    stored = False
+    if not target.exists():
+        try:
+            # Adopt src's inode as the blob; fails if a concurrent ingest got there first
+            os.link(src, target)
+            stored = True
+        except FileExistsError:
+            pass
+        except OSError:
+            tmp = target.with_name(f"{digest}.{os.getpid()}.tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, target)
+            stored = True
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.unlink(missing_ok=True)
+    _link_or_copy(target, dest)
+    src.unlink()
+    return digest, size, stored
+
+
+def add_references(conn: sqlite3.Connection, artifact_id: str, files: list[tuple[str, str, int]]) -> None:
+    """
+    Record that artifact_id references blobs, given as (relative path, digest,
+    size). The artifact row must exist. Does not commit.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    conn.executemany(
+        "INSERT OR IGNORE INTO blob (hash, size, created_at) VALUES (?, ?, ?)",
+        [(digest, size, now) for _, digest, size in files],
+    )
+    conn.executemany(
+        """
+        INSERT INTO artifact_blob (artifact_id, path, hash) VALUES (?, ?, ?)
+        ON CONFLICT (artifact_id, path) DO UPDATE SET hash = excluded.hash
+        """,
+        [(artifact_id, path, digest) for path, digest, _ in files],
+    )
+
+
+def collect_garbage(conn: sqlite3.Connection) -> tuple[int, int]:
+    """
+    Delete blobs no artifact references. Commits. Returns (blobs, bytes) freed.
+
+    Rows go first, then files, so a blob referenced again meanwhile is at
+    worst re-created from its next copy rather than lost: every artifact path
+    holds its own link to the content.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "DELETE FROM blob WHERE refcount <= 0 RETURNING hash, size"
+        ).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    for row in rows:
+        blob_path(row["hash"]).unlink(missing_ok=True)
+    return len(rows), sum(row["size"] for row in rows)
+
+
+# ---------------------------------------------------------------------------
+# Maintenance commands
+# ---------------------------------------------------------------------------
+
+def dedupe_existing(conn: sqlite3.Connection) -> tuple[int, int]:
+    """
+    Move files of artifacts ingested before the blob store into it.
+    Returns (files adopted, bytes reclaimed).
+    """
+    adopted = reclaimed = 0
+    rows = conn.execute("SELECT id, content_path FROM artifact WHERE content_path IS NOT NULL").fetchall()
+    for row in rows:
+        artifact_dir = Path(row["content_path"])
+        if not artifact_dir.is_dir():
+            continue
+        known = {r[0] for r in conn.execute("SELECT path FROM artifact_blob WHERE artifact_id = ?", (row["id"],))}
+        files: list[tuple[str, str, int]] = []
+        for path in sorted(p for p in artifact_dir.rglob("*") if p.is_file()):
+            relative = path.relative_to(artifact_dir).as_posix()
+            if relative in known:
+                continue
+            # Re-link through a temporary name so the path is never missing
+            staged = path.with_name(f".{path.name}.blob")
+            os.replace(path, staged)
+            digest, size, stored = store_file(staged, path)
+            files.append((relative, digest, size))
+            adopted += 1
+            reclaimed += 0 if stored else size
+        if files:
+            add_references(conn, row["id"], files)
+            conn.commit()
+    return adopted, reclaimed
+
+
+def sweep_orphans(conn: sqlite3.Connection) -> tuple[int, int]:
+    """Remove blob files with no blob row (e.g. from an ingest that failed before committing)."""
+    removed = freed = 0
+    root = _blob_root()
+    if not root.is_dir():
+        return 0, 0
+    for path in root.glob("*/*"):
+        if path.name.endswith(".tmp") or conn.execute(
+            "SELECT 1 FROM blob WHERE hash = ?", (path.name,)
+        ).fetchone() is None:
+            freed += path.stat().st_size
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed, freed
+
+
+def _mib(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MiB"
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m core.blobs", description="Blob store maintenance")
+    parser.add_argument("command", choices=["dedupe", "gc"])
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    run_migrations(conn)
+    try:
+        if args.command == "dedupe":
+            adopted, reclaimed = dedupe_existing(conn)
+            print(f"  {adopted} files moved into the blob store, {_mib(reclaimed)} reclaimed")
+        else:
+            blobs, freed = collect_garbage(conn)
+            orphans, orphan_bytes = sweep_orphans(conn)
+            encoded, encoded_bytes = sweep_encoded(conn)
+            print(
+                f"  {blobs} unreferenced blobs, {orphans} orphaned files and {encoded} stale encoded copies"
+                f" removed, {_mib(freed + orphan_bytes + encoded_bytes)} freed"
+            )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
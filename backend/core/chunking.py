@@ -0,0 +1,51 @@
+"""
+Splitting extracted text into bounded, overlapping passages.
+"""
+import re
+
+_BREAKS = ("\n\n", "\n", ". ", "? ", "! ", " ")
+_SPACE_RE = re.compile(r"\s")
+
+
+def passage_spans(text: str, max_chars: int, overlap: int = 0) -> list[tuple[int, int]]:
+    """
+    Split text into passages of at most max_chars, returned as (start, end) offsets.
+
+    A passage ends at the last paragraph, line, sentence or word break in the
+    second half of its window, so words are never cut unless a single word is
+    longer than that. Consecutive passages share about `overlap` characters,
+    starting on a word boundary. Whitespace-only text yields no passages.
+    """
+    spans: list[tuple[int, int]] = []
+    n = len(text)
+    start = _skip_space(text, 0)
+    while start < n:
+        end = min(start + max_chars, n)
+        if end < n:
+            floor = start + max_chars // 2
+            for sep in _BREAKS:
+                cut = text.rfind(sep, floor, end)
+                if cut != -1:
+                    end = cut + len(sep)
+                    break
+
+        trimmed = end
+        while trimmed > start and text[trimmed - 1].isspace():
+            trimmed -= 1
+        spans.append((start, trimmed))
+        if end >= n:
+            break
+
+        next_start = max(end - overlap, start + 1)
+        if next_start < end:
+            # Start the overlap on a word boundary
+            space = _SPACE_RE.search(text, next_start, end)
+            next_start = space.end() if space else end
+        start = _skip_space(text, next_start)
+    return spans
+
+
+def _skip_space(text: str, i: int) -> int:
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return i
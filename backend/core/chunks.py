@@ -0,0 +1,77 @@
+"""
+Passage-level chunk index: the 'chunk' processing task.
+
+Every ingested artifact is queued for chunking. The handler splits the
+plugin's extracted text into overlapping passages (CHUNK_CHARS, CHUNK_OVERLAP)
+and stores them with their character offsets in artifact_chunk, indexed by
+chunk_fts (migration 0010). Re-chunking replaces an artifact's passages
+wholesale. Each chunked artifact is then queued for 'embed_chunks', which
+fills the 'chunk' vector namespace once an embedding provider is configured
+(core/embeddings.py).
+
+/api/retrieve ranks passages across artifacts and packs the best into a
+character or token budget (core/api/search.py).
+"""
+import os
+import sqlite3
+
+from core.chunking import passage_spans
+from core.queue import Task, TaskContext, enqueue, register_handler
+from core.vectors import get_index
+
+_CHUNK_CHARS = int(os.getenv("CHUNK_CHARS", "1200"))
+_CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))
+
+CHUNK_NAMESPACE = "chunk"
+
+
+def replace_chunks(conn: sqlite3.Connection, artifact_id: str, text: str) -> int:
+    """Split text into passages, replacing the artifact's chunks and their vectors. Does not commit."""
+    old_ids = [str(r[0]) for r in conn.execute("SELECT id FROM artifact_chunk WHERE artifact_id = ?", (artifact_id,))]
+    if old_ids:
+        get_index(CHUNK_NAMESPACE).delete(conn, old_ids)
+        conn.execute("DELETE FROM artifact_chunk WHERE artifact_id = ?", (artifact_id,))
+
+    spans = passage_spans(text, _CHUNK_CHARS, _CHUNK_OVERLAP)
+    conn.executemany(
+        """
+        INSERT INTO artifact_chunk (artifact_id, seq, start_offset, end_offset, text_z)
+        VALUES (?, ?, ?, ?, fts_deflate(?))
+        """,
+        [(artifact_id, seq, start, end, text[start:end]) for seq, (start, end) in enumerate(spans)],
+    )
+    return len(spans)
+
+
+def fetch_chunks(conn: sqlite3.Connection, chunk_ids: list[int], with_text: bool = False) -> dict[int, sqlite3.Row]:
+    """Chunk rows by id; ids that no longer exist are left out."""
+    found: dict[int, sqlite3.Row] = {}
+    text_column = ", fts_inflate(text_z) AS text" if with_text else ""
+    for start in range(0, len(chunk_ids), 500):
+        batch = chunk_ids[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        for row in conn.execute(
+            f"""
+            SELECT id, artifact_id, seq, start_offset, end_offset{text_column}
+            FROM artifact_chunk WHERE id IN ({placeholders})
+            """,
+            batch,
+        ):
+            found[row["id"]] = row
+    return found
+
+
+def handle_chunk(ctx: TaskContext, tasks: list[Task]) -> None:
+    ids = list(dict.fromkeys(task.artifact_id for task in tasks))
+    placeholders = ",".join("?" * len(ids))
+    rows = ctx.conn.execute(
+        f"SELECT id, plugin_type, content_path FROM artifact WHERE id IN ({placeholders})", ids
+    ).fetchall()
+    for row in rows:
+        plugin = ctx.loader.get_content_plugin(row["plugin_type"])
+        text = plugin.get_fts_text({"content_path": row["content_path"]}) if plugin else ""
+        if replace_chunks(ctx.conn, row["id"], text or ""):
+            enqueue(ctx.conn, row["id"], "embed_chunks")
+
+
+register_handler("chunk", handle_chunk, batch_size=16, concurrency=1)
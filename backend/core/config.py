@@ -0,0 +1,77 @@
+"""
+Configuration resolution for plugins and pipeline stages.
+
+A plugin is handed the user's global settings with its own plugin_registry
+config merged on top. Every stage that needs them reads through this module
+— ingestion, queued plugin tasks, thumbnail derivatives — instead of
+querying and decoding both rows per artifact.
+
+Merged configs are cached in process per (user, plugin). The cache is keyed
+to config_generation, a counter the database bumps on any write to
+user.settings or plugin_registry.config (migration 0015), so a lookup costs
+one primary-key read and settings changed by another process or connection
+are picked up on the next lookup. A connection inside a transaction may
+see its own uncommitted writes, so lookups on it bypass the cache.
+
+Returned dicts are copies of the cached ones at the top level only; treat
+nested values as read-only.
+"""
+import json
+import sqlite3
+import threading
+from typing import Callable, Optional
+
+_USER_SETTINGS = None           # plugin_id key for a user's settings on their own
+
+
+class ConfigService:
+    def __init__(self):
+        self._generation: Optional[int] = None
+        self._entries: dict[tuple[str, Optional[str]], dict] = {}
+        self._lock = threading.Lock()
+
+    def user_settings(self, conn: sqlite3.Connection, user_id: str = "default") -> dict:
+        """The user's stored settings ({} if there are none)."""
+        return dict(self._cached(conn, (user_id, _USER_SETTINGS), lambda: _load_settings(conn, user_id)))
+
+    def plugin_config(self, conn: sqlite3.Connection, plugin_id: str, user_id: str = "default") -> dict:
+        """Config handed to a plugin: global user settings (base) + plugin-specific config (overrides)."""
+        def load() -> dict:
+            settings = self._cached(conn, (user_id, _USER_SETTINGS), lambda: _load_settings(conn, user_id))
+            row = conn.execute("SELECT config FROM plugin_registry WHERE id = ?", (plugin_id,)).fetchone()
+            config: dict = json.loads(row["config"]) if row and row["config"] else {}
+            # Flat merge: plugin config wins on key conflicts — allows per-plugin overrides of globals
+            return {**settings, **config}
+
+        return dict(self._cached(conn, (user_id, plugin_id), load))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+    def _cached(self, conn: sqlite3.Connection, key: tuple[str, Optional[str]], load: Callable[[], dict]) -> dict:
+        if conn.in_transaction:
+            return load()
+        # Read the generation before the rows: an entry is never older than the generation it's stored under
+        generation = conn.execute("SELECT generation FROM config_generation WHERE id = 1").fetchone()[0]
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+            elif key in self._entries:
+                return self._entries[key]
+
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = value
+        return value
+
+
+def _load_settings(conn: sqlite3.Connection, user_id: str) -> dict:
+    row = conn.execute("SELECT settings FROM user WHERE id = ?", (user_id,)).fetchone()
+    return json.loads(row["settings"]) if row and row["settings"] else {}
+
+
+config_service = ConfigService()
@@ -1,15 +1,31 @@
 import json
 import os
+import queue
 import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator
 
 from dotenv import load_dotenv
 
+from core.urls import normalise_url
+
 load_dotenv()
 
 _MIGRATIONS_DIR = Path(__file__).parent / "migrations"
 
+# Per-connection tuning, applied once when a connection is opened.
+_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))   # bytes
+_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))                # negative = KiB
+_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))              # ms
+
+_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+_WRITE_POOL_SIZE = int(os.getenv("SQLITE_WRITE_POOL_SIZE", "2"))
+_POOL_TIMEOUT = float(os.getenv("SQLITE_POOL_TIMEOUT", "30"))              # seconds
+
 # Default settings written to the 'default' user record on first run.
 # Global knobs that apply across plugins and the application.
 DEFAULT_USER_SETTINGS: dict = {
@@ -41,19 +57,173 @@ def get_data_path() -> Path:
     return path
 
 
-def get_connection() -> sqlite3.Connection:
-    db_path = get_data_path() / "pindrop.db"
-    conn = sqlite3.connect(str(db_path))
+def _db_path() -> Path:
+    return get_data_path() / "pindrop.db"
+
+
+def _fts_deflate(text):
+    return zlib.compress(text.encode("utf-8")) if text is not None else None
+
+
+def _fts_inflate(blob):
+    return zlib.decompress(blob).decode("utf-8") if blob is not None else None
+
+
+def _normalise_url(url):
+    return normalise_url(url) if isinstance(url, str) else None
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _open(read_only: bool = False, check_same_thread: bool = True) -> sqlite3.Connection:
+    if read_only:
+        conn = sqlite3.connect(
+            f"{_db_path().as_uri()}?mode=ro", uri=True, check_same_thread=check_same_thread
+        )
+    else:
+        conn = sqlite3.connect(str(_db_path()), check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
-    conn.executescript("""
-        PRAGMA journal_mode = WAL;
-        PRAGMA foreign_keys = ON;
-        PRAGMA synchronous = NORMAL;
-        PRAGMA temp_store = MEMORY;
-    """)
+
+    pragmas = [
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA temp_store = MEMORY",
+        f"PRAGMA busy_timeout = {_BUSY_TIMEOUT}",
+        f"PRAGMA cache_size = {_CACHE_SIZE}",
+        f"PRAGMA mmap_size = {_MMAP_SIZE}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas += ["PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"]
+    for pragma in pragmas:
+        conn.execute(pragma)
+
+    # Used by the artifact_fts_source view and FTS triggers (migration 0006)
+    conn.create_function("fts_deflate", 1, _fts_deflate, deterministic=True)
+    conn.create_function("fts_inflate", 1, _fts_inflate, deterministic=True)
+    # Used by the artifact_url triggers (migration 0011)
+    conn.create_function("normalise_url", 1, _normalise_url, deterministic=True)
+    # Timestamps written by triggers, in the app's isoformat() form (migration 0017)
+    conn.create_function("now_iso", 0, _now_iso)
     return conn
 
 
+def get_connection() -> sqlite3.Connection:
+    """
+    Open a dedicated read-write connection. Caller closes it.
+
+    For migrations, scripts and long-running background work (captures, queue
+    workers) that shouldn't hold a pooled connection. Request handlers use
+    the get_read_db / get_write_db dependencies instead.
+    """
+    return _open()
+
+
+class PoolExhausted(Exception):
+    """Raised when no pooled connection frees up within SQLITE_POOL_TIMEOUT."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of configured connections, lent to one thread at a time.
+
+    Connections are opened lazily, have their PRAGMAs applied once, and are
+    reused until the pool is closed. Any transaction left open by a borrower
+    is rolled back on release.
+    """
+
+    def __init__(self, size: int, read_only: bool):
+        self._read_only = read_only
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    def acquire(self, timeout: float = _POOL_TIMEOUT) -> sqlite3.Connection:
+        if not self._slots.acquire(timeout=timeout):
+            kind = "read" if self._read_only else "write"
+            raise PoolExhausted(f"No {kind} connection available after {timeout}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            # Pooled connections hop between threadpool threads, one borrower at a time
+            return _open(self._read_only, check_same_thread=False)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools: dict[bool, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(read_only: bool) -> ConnectionPool:
+    pool = _pools.get(read_only)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(read_only)
+            if pool is None:
+                size = _READ_POOL_SIZE if read_only else _WRITE_POOL_SIZE
+                pool = _pools[read_only] = ConnectionPool(size, read_only)
+    return pool
+
+
+def get_read_db() -> Iterator[sqlite3.Connection]:
+    """
+    FastAPI dependency: a pooled read-only connection. Readers have their own
+    pool, and WAL lets them proceed while a write is in progress.
+    """
+    with _pool(read_only=True).connection() as conn:
+        yield conn
+
+
+def get_write_db() -> Iterator[sqlite3.Connection]:
+    """FastAPI dependency: a pooled read-write connection. Caller commits."""
+    with _pool(read_only=False).connection() as conn:
+        yield conn
+
+
+@contextmanager
+def read_connection() -> Iterator[sqlite3.Connection]:
+    """A pooled read-only connection for work a request hands to another thread."""
+    with _pool(read_only=True).connection() as conn:
+        yield conn
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
 def run_migrations(conn: sqlite3.Connection) -> None:
     conn.execute("""
         CREATE TABLE IF NOT EXISTS _migrations (
@@ -0,0 +1,266 @@
+"""
+Embedding generation: providers and the 'embed' / 'embed_chunks' processing tasks.
+
+The embed handler takes a batch of queued artifacts, splits each one's
+extracted text into bounded passages (EMBED_PASSAGE_CHARS), and sends every
+passage not already in embedding_cache to the provider in as few calls as
+possible (up to provider.max_batch passages each, across artifacts). The
+artifact's vector is the mean of its passage vectors, stored in the
+'artifact' vector namespace. 'embed_chunks' embeds the passages stored by
+core/chunks.py, one vector each, into the 'chunk' namespace.
+
+The cache is keyed by (sha256 of passage text, model id), so unchanged text is
+never re-embedded, whether it is re-queued, re-captured or shared between
+artifacts. Switching EMBEDDING_PROVIDER to a different model resets both
+vector namespaces and re-queues the affected artifacts.
+
+Providers register with register_provider(). The built-in 'stub' provider is
+a deterministic, offline feature-hashing model, for development and
+benchmarks; it captures word overlap, not meaning.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+
+from core.chunking import passage_spans
+from core.chunks import CHUNK_NAMESPACE
+from core.queue import Task, TaskContext, enqueue, register_handler
+from core.vectors import ARTIFACT_NAMESPACE, get_index
+
+_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "")
+_PASSAGE_CHARS = int(os.getenv("EMBED_PASSAGE_CHARS", "2000"))
+_PASSAGE_OVERLAP = int(os.getenv("EMBED_PASSAGE_OVERLAP", "200"))
+_TASK_BATCH = int(os.getenv("EMBED_TASK_BATCH", "32"))
+
+
+class EmbeddingProvider(ABC):
+    model_id: str               # stored with cached vectors; change it when outputs change
+    dim: int
+    max_batch: int = 64         # passages per embed() call
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Return a (len(texts), dim) float32 array."""
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Deterministic offline stub: signed feature hashing of words and word pairs."""
+
+    max_batch = 256
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model_id = f"stub-hash-{dim}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r"\w+", text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+_PROVIDERS: dict[str, Callable[[], EmbeddingProvider]] = {
+    "stub": HashingEmbeddingProvider,
+}
+
+
+def register_provider(name: str, factory: Callable[[], EmbeddingProvider]) -> None:
+    """Make a provider selectable with EMBEDDING_PROVIDER=name."""
+    _PROVIDERS[name] = factory
+    get_provider.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_provider() -> Optional[EmbeddingProvider]:
+    """The configured provider, or None if EMBEDDING_PROVIDER is unset or unknown."""
+    if not _PROVIDER:
+        return None
+    factory = _PROVIDERS.get(_PROVIDER)
+    if factory is None:
+        print(f"  warning: unknown EMBEDDING_PROVIDER '{_PROVIDER}'; embedding disabled")
+        return None
+    return factory()
+
+
+@lru_cache(maxsize=256)
+def embed_query(text: str) -> Optional[tuple[float, ...]]:
+    """Embed search text with the configured provider (cached for repeated queries)."""
+    provider = get_provider()
+    if provider is None:
+        return None
+    return tuple(provider.embed([text])[0].tolist())
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _cached_vectors(conn: sqlite3.Connection, hashes: list[str], model: str) -> dict[str, np.ndarray]:
+    found: dict[str, np.ndarray] = {}
+    for start in range(0, len(hashes), 500):
+        chunk = hashes[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            f"SELECT content_hash, vector FROM embedding_cache WHERE model = ? AND content_hash IN ({placeholders})",
+            [model, *chunk],
+        ):
+            found[row["content_hash"]] = np.frombuffer(row["vector"], dtype=np.float32)
+    return found
+
+
+def embed_passages(
+    conn: sqlite3.Connection,
+    provider: EmbeddingProvider,
+    passages: list[str],
+) -> tuple[list[np.ndarray], int]:
+    """
+    Vectors for passages, from the cache where possible. New vectors are added
+    to the cache (not committed). Returns (vectors, provider_calls).
+    """
+    hashes = [_content_hash(p) for p in passages]
+    vectors = _cached_vectors(conn, list(dict.fromkeys(hashes)), provider.model_id)
+
+    missing: dict[str, str] = {}
+    for h, passage in zip(hashes, passages):
+        if h not in vectors:
+            missing.setdefault(h, passage)
+
+    calls = 0
+    pending = list(missing.items())
+    now = datetime.now(timezone.utc).isoformat()
+    for start in range(0, len(pending), provider.max_batch):
+        batch = pending[start:start + provider.max_batch]
+        embedded = np.asarray(provider.embed([text for _, text in batch]), dtype=np.float32)
+        calls += 1
+        for (h, _), vector in zip(batch, embedded):
+            vectors[h] = vector
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO embedding_cache (content_hash, model, vector, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(h, provider.model_id, vector.tobytes(), now) for (h, _), vector in zip(batch, embedded)],
+        )
+    return [vectors[h] for h in hashes], calls
+
+
+# ---------------------------------------------------------------------------
+# 'embed' task
+# ---------------------------------------------------------------------------
+
+def _artifact_text(ctx: TaskContext, row: sqlite3.Row) -> str:
+    plugin = ctx.loader.get_content_plugin(row["plugin_type"])
+    body = plugin.get_fts_text({"content_path": row["content_path"]}) if plugin else ""
+    return "\n\n".join(part for part in (row["title"], row["excerpt"], body) if part)
+
+
+def _switch_model(
+    conn: sqlite3.Connection,
+    provider: EmbeddingProvider,
+    namespace: str,
+    task_type: str,
+    artifacts_sql: str,
+) -> None:
+    """
+    Drop a namespace's vectors from a previous model and queue task_type for
+    every artifact artifacts_sql selects (as column id), to re-embed them.
+    """
+    ns = conn.execute(
+        "SELECT model FROM vector_namespace WHERE name = ?", (namespace,)
+    ).fetchone()
+    if ns is None or ns["model"] in (None, provider.model_id):
+        return
+    print(f"  embedding model changed ({ns['model']} → {provider.model_id}); re-embedding '{namespace}' vectors")
+    get_index(namespace).reset(conn)
+    for row in conn.execute(
+        f"""
+        SELECT id FROM ({artifacts_sql}) a
+        WHERE NOT EXISTS (
+            SELECT 1 FROM processing_queue q
+            WHERE q.artifact_id = a.id AND q.task_type = ? AND q.status IN ('pending', 'running')
+        )
+        """,
+        (task_type,),
+    ).fetchall():
+        enqueue(conn, row["id"], task_type, priority=9)
+    conn.commit()
+
+
+def handle_embed(ctx: TaskContext, tasks: list[Task]) -> None:
+    provider = get_provider()
+    _switch_model(ctx.conn, provider, ARTIFACT_NAMESPACE, "embed", "SELECT id FROM artifact")
+
+    ids = list(dict.fromkeys(task.artifact_id for task in tasks))
+    placeholders = ",".join("?" * len(ids))
+    rows = ctx.conn.execute(
+        f"SELECT id, plugin_type, content_path, title, excerpt FROM artifact WHERE id IN ({placeholders})", ids
+    ).fetchall()
+
+    # Passages from every artifact in the batch go to the provider together
+    owners: list[str] = []
+    passages: list[str] = []
+    for row in rows:
+        text = _artifact_text(ctx, row)
+        for start, end in passage_spans(text, _PASSAGE_CHARS, _PASSAGE_OVERLAP):
+            owners.append(row["id"])
+            passages.append(text[start:end])
+
+    vectors, _ = embed_passages(ctx.conn, provider, passages)
+
+    by_artifact: dict[str, list[np.ndarray]] = {}
+    for owner, vector in zip(owners, vectors):
+        by_artifact.setdefault(owner, []).append(vector)
+    get_index(ARTIFACT_NAMESPACE).add(
+        ctx.conn,
+        [(aid, aid, np.mean(vecs, axis=0)) for aid, vecs in by_artifact.items()],
+        model=provider.model_id,
+    )
+    # Deleted artifacts and ones with no text have nothing to embed; their tasks simply complete
+
+
+def handle_embed_chunks(ctx: TaskContext, tasks: list[Task]) -> None:
+    """Embed the passages core/chunks.py stored for each artifact into the 'chunk' namespace."""
+    provider = get_provider()
+    _switch_model(
+        ctx.conn, provider, CHUNK_NAMESPACE, "embed_chunks", "SELECT DISTINCT artifact_id AS id FROM artifact_chunk"
+    )
+
+    ids = list(dict.fromkeys(task.artifact_id for task in tasks))
+    placeholders = ",".join("?" * len(ids))
+    rows = ctx.conn.execute(
+        f"""
+        SELECT id, artifact_id, fts_inflate(text_z) AS text FROM artifact_chunk
+        WHERE artifact_id IN ({placeholders})
+        ORDER BY artifact_id, seq
+        """,
+        ids,
+    ).fetchall()
+
+    vectors, _ = embed_passages(ctx.conn, provider, [row["text"] for row in rows])
+    get_index(CHUNK_NAMESPACE).add(
+        ctx.conn,
+        [(str(row["id"]), row["artifact_id"], vector) for row, vector in zip(rows, vectors)],
+        model=provider.model_id,
+    )
+
+
+# Without a provider, embedding tasks stay pending until one is configured
+if get_provider() is not None:
+    register_handler("embed", handle_embed, batch_size=_TASK_BATCH, concurrency=1, lease_seconds=600)
+    register_handler("embed_chunks", handle_embed_chunks, batch_size=_TASK_BATCH, concurrency=1, lease_seconds=600)
@@ -0,0 +1,403 @@
+"""
+Full-archive export as a streamed zip or tar.
+
+An export is generated while it is written: artifact rows are read in
+keyset pages and files are copied in chunks, so a tar export runs in
+constant memory however large the archive is. A zip's central directory has
+to be kept until the end, about 200 bytes per file; prefer tar for very
+large archives. Layout:
+
+    export.json                 format version, since, watermark, created_at
+    manifest.ndjson             one JSON object per line:
+                                  {"type": "collection", ...}   every collection
+                                  {"type": "artifact", ...}     row, tags, collections, files
+                                  {"type": "deleted", ...}      tombstones (delta exports)
+    artifacts/{id}/...          each artifact's directory as stored
+
+An export covers artifacts with since < updated_at <= watermark (all of
+them without since). The watermark is recorded in export.json and returned
+in the X-Export-Watermark header; passing it as the next export's since
+ships only what changed, including tombstones of deleted artifacts
+(migration 0013).
+
+    GET /api/export?format=zip|tar&since=...
+    python -m core.export -o backup.zip [--since ...] [--watermark-file state]
+"""
+import argparse
+import io
+import json
+import queue
+import re
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from core.db import get_connection, get_data_path, run_migrations
+
+EXPORT_FORMATS: tuple[str, ...] = ("zip", "tar")
+EXPORT_VERSION = 1
+
+_PAGE = 500
+_COPY_CHUNK = 1024 * 1024
+_PIPE_DEPTH = 16            # chunks buffered between the archive writer and the response
+
+# Rows written just before the export started may commit just after it; holding the
+# watermark back a little lets the next delta pick them up rather than skipping them
+_WATERMARK_LAG = timedelta(seconds=5)
+
+# Already-compressed files are stored, not deflated again
+_STORED_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".pdf", ".gz", ".br", ".zip", ".mp4", ".webm"})
+
+
+class ExportError(Exception):
+    """Raised for an invalid export request. Message is shown to the user."""
+
+
+def parse_since(since: Optional[str]) -> Optional[str]:
+    """since as an ISO timestamp comparable with updated_at, or None. Raises ExportError."""
+    if not since:
+        return None
+    # An unencoded '+' in a query string arrives as a space: '...15.348307 00:00'
+    since = re.sub(r" (\d\d:\d\d)$", r"+\1", since.strip())
+    try:
+        parsed = datetime.fromisoformat(since)
+    except ValueError:
+        raise ExportError(f"Invalid since timestamp: {since}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def new_watermark() -> str:
+    return (datetime.now(timezone.utc) - _WATERMARK_LAG).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def _artifact_pages(conn: sqlite3.Connection, since: Optional[str], watermark: str) -> Iterator[list[sqlite3.Row]]:
+    """Artifacts in (since, watermark], by (updated_at, id), a page at a time."""
+    after = (since or "", "")
+    while True:
+        rows = conn.execute(
+            """
+            SELECT * FROM artifact
+            WHERE updated_at > ? AND updated_at <= ? AND (updated_at, id) > (?, ?)
+            ORDER BY updated_at, id
+            LIMIT ?
+            """,
+            (since or "", watermark, *after, _PAGE),
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        after = (rows[-1]["updated_at"], rows[-1]["id"])
+
+
+def _relations(conn: sqlite3.Connection, ids: list[str]) -> tuple[dict[str, list], dict[str, list]]:
+    placeholders = ",".join("?" * len(ids))
+    tags: dict[str, list] = {aid: [] for aid in ids}
+    for row in conn.execute(
+        f"""
+        SELECT at.artifact_id, t.name, t.color, at.source
+        FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+        WHERE at.artifact_id IN ({placeholders})
+        ORDER BY t.name
+        """,
+        ids,
+    ):
+        tags[row["artifact_id"]].append({"name": row["name"], "color": row["color"], "source": row["source"]})
+    collections: dict[str, list] = {aid: [] for aid in ids}
+    for row in conn.execute(
+        f"""
+        SELECT artifact_id, collection_id, sort_order FROM artifact_collection
+        WHERE artifact_id IN ({placeholders})
+        ORDER BY collection_id
+        """,
+        ids,
+    ):
+        collections[row["artifact_id"]].append({"id": row["collection_id"], "sort_order": row["sort_order"]})
+    return tags, collections
+
+
+def _artifact_files(content_path: Optional[str]) -> list[tuple[str, Path]]:
+    """(path relative to the artifact directory, file) for every file in it."""
+    if not content_path or not Path(content_path).is_dir():
+        return []
+    root = Path(content_path)
+    return [(path.relative_to(root).as_posix(), path) for path in sorted(root.rglob("*")) if path.is_file()]
+
+
+def _manifest_lines(conn: sqlite3.Connection, since: Optional[str], watermark: str) -> Iterator[bytes]:
+    for row in conn.execute("SELECT * FROM collection ORDER BY id"):
+        yield _line({"type": "collection", **dict(row)})
+
+    for rows in _artifact_pages(conn, since, watermark):
+        tags, collections = _relations(conn, [row["id"] for row in rows])
+        for row in rows:
+            record = dict(row)
+            record.pop("content_path")
+            record["plugin_data"] = json.loads(row["plugin_data"]) if row["plugin_data"] else {}
+            record["tags"] = tags[row["id"]]
+            record["collections"] = collections[row["id"]]
+            record["files"] = [relative for relative, _ in _artifact_files(row["content_path"])]
+            yield _line({"type": "artifact", **record})
+
+    if since:
+        for row in conn.execute(
+            """
+            SELECT artifact_id, deleted_at FROM artifact_tombstone
+            WHERE deleted_at > ? AND deleted_at <= ? ORDER BY deleted_at
+            """,
+            (since, watermark),
+        ):
+            yield _line({"type": "deleted", "id": row["artifact_id"], "deleted_at": row["deleted_at"]})
+
+
+def _line(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class _Entries:
+    """Sequential archive writer: one zip or tar entry at a time, from files or generators."""
+
+    def __init__(self, out: BinaryIO, fmt: str):
+        self._fmt = fmt
+        if fmt == "zip":
+            self._zip = zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        else:
+            # Stream mode: never seeks, so out may be a pipe or a response
+            self._tar = tarfile.open(fileobj=out, mode="w|", format=tarfile.PAX_FORMAT)
+
+    def add_file(self, name: str, path: Path) -> None:
+        stat = path.stat()
+        if self._fmt == "zip":
+            info = zipfile.ZipInfo.from_file(path, name)
+            info.compress_type = zipfile.ZIP_STORED if path.suffix.lower() in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            with open(path, "rb") as src, self._zip.open(info, "w", force_zip64=stat.st_size > 2**31) as dest:
+                while chunk := src.read(_COPY_CHUNK):
+                    dest.write(chunk)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = stat.st_size
+            info.mtime = int(stat.st_mtime)
+            with open(path, "rb") as src:
+                self._tar.addfile(info, src)
+            # Only needed for reading; dropping it keeps a streamed tar at constant memory
+            self._tar.members.clear()
+
+    def add_lines(self, name: str, lines: Iterator[bytes]) -> None:
+        """An entry built from lines. tar needs the size up front, so it is spooled to a temp file first."""
+        if self._fmt == "zip":
+            info = zipfile.ZipInfo(name, datetime.now(timezone.utc).timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with self._zip.open(info, "w", force_zip64=True) as dest:
+                for line in lines:
+                    dest.write(line)
+            return
+        spool_dir = get_data_path() / "system" / "temp" / "export"
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryFile(dir=spool_dir) as tmp:
+            for line in lines:
+                tmp.write(line)
+            info = tarfile.TarInfo(name)
+            info.size = tmp.tell()
+            info.mtime = int(datetime.now(timezone.utc).timestamp())
+            tmp.seek(0)
+            self._tar.addfile(info, tmp)
+
+    def close(self) -> None:
+        if self._fmt == "zip":
+            self._zip.close()
+        else:
+            self._tar.close()
+
+    def abandon(self) -> None:
+        """Drop a half-written archive without trying to write its end records."""
+        if self._fmt == "zip":
+            self._zip.fp = None
+
+
+def write_export(
+    conn: sqlite3.Connection,
+    out: BinaryIO,
+    fmt: str = "zip",
+    since: Optional[str] = None,
+    watermark: Optional[str] = None,
+) -> dict:
+    """
+    Write an export archive to out, which needn't be seekable. Returns the
+    export.json header (with counts added). Raises ExportError.
+
+    The manifest and the files are two passes over the artifacts, made in
+    one read transaction so both see the same snapshot: an artifact updated
+    or deleted mid-export is in both or in neither.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}' (expected one of: {', '.join(EXPORT_FORMATS)})")
+    header = {
+        "version": EXPORT_VERSION,
+        "since": since,
+        "watermark": watermark or new_watermark(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    entries = _Entries(out, fmt)
+    artifacts = files = 0
+    snapshot = not conn.in_transaction
+    if snapshot:
+        conn.execute("BEGIN")
+    try:
+        entries.add_lines("export.json", iter([json.dumps(header, indent=2).encode("utf-8") + b"\n"]))
+        entries.add_lines("manifest.ndjson", _manifest_lines(conn, since, header["watermark"]))
+        for rows in _artifact_pages(conn, since, header["watermark"]):
+            for row in rows:
+                artifacts += 1
+                for relative, path in _artifact_files(row["content_path"]):
+                    try:
+                        entries.add_file(f"artifacts/{row['id']}/{relative}", path)
+                        files += 1
+                    except FileNotFoundError:
+                        continue        # replaced or deleted since it was listed
+    except BaseException:
+        entries.abandon()
+        raise
+    finally:
+        if snapshot:
+            conn.rollback()
+    entries.close()
+    return {**header, "artifacts": artifacts, "files": files}
+
+
+# ---------------------------------------------------------------------------
+# Streaming to a response
+# ---------------------------------------------------------------------------
+
+class _Closed(Exception):
+    pass
+
+
+class _Pipe(io.RawIOBase):
+    """Write end handed to the archive writer; chunks go to a bounded queue."""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self._chunks = chunks
+        self._cancelled = cancelled
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        while True:
+            if self._cancelled.is_set():
+                raise _Closed()
+            try:
+                self._chunks.put(chunk, timeout=1)
+                return len(chunk)
+            except queue.Full:
+                continue
+
+
+_DONE = object()
+
+
+def stream_export(
+    connect: Callable[[], sqlite3.Connection],
+    fmt: str = "zip",
+    since: Optional[str] = None,
+    watermark: Optional[str] = None,
+) -> Iterator[bytes]:
+    """
+    Archive bytes as they are produced. The archive is written on its own
+    thread (with its own connect() connection) into a small bounded queue, so
+    a slow client slows the writer instead of growing memory. Closing the
+    iterator early stops the writer.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=_PIPE_DEPTH)
+    cancelled = threading.Event()
+
+    def produce() -> None:
+        result: object = _DONE
+        conn = connect()
+        try:
+            pipe = io.BufferedWriter(_Pipe(chunks, cancelled), buffer_size=_COPY_CHUNK)
+            write_export(conn, pipe, fmt, since, watermark)
+            pipe.flush()
+        except _Closed:
+            return
+        except Exception as exc:
+            result = exc
+        finally:
+            conn.close()
+        while not cancelled.is_set():
+            try:
+                chunks.put(result, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    writer = threading.Thread(target=produce, name="export-writer", daemon=True)
+    writer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m core.export", description="Export the archive")
+    parser.add_argument("-o", "--output", required=True, help="archive file to write")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None, help="default: from the output suffix, else zip")
+    parser.add_argument("--since", default=None, help="only artifacts changed after this updated_at watermark")
+    parser.add_argument(
+        "--watermark-file", default=None,
+        help="read --since from this file if it exists, and write the new watermark to it on success",
+    )
+    args = parser.parse_args(argv)
+
+    output = Path(args.output)
+    fmt = args.format or ("tar" if output.suffix == ".tar" else "zip")
+    state = Path(args.watermark_file) if args.watermark_file else None
+    since = args.since
+    if since is None and state is not None and state.exists():
+        since = state.read_text(encoding="utf-8").strip() or None
+
+    conn = get_connection()
+    run_migrations(conn)
+    try:
+        tmp = output.with_name(output.name + ".partial")
+        with open(tmp, "wb") as out:
+            result = write_export(conn, out, fmt, parse_since(since))
+        tmp.replace(output)
+    except ExportError as exc:
+        raise SystemExit(f"  error: {exc}")
+    finally:
+        conn.close()
+
+    if state is not None:
+        state.write_text(result["watermark"] + "\n", encoding="utf-8")
+    print(f"  {result['artifacts']} artifacts, {result['files']} files exported to {output} (watermark {result['watermark']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Full-text index maintenance and query helpers.
+
+artifact_fts is an external-content index (migration 0006): its text lives in
+artifact and artifact_fts_doc, and triggers keep the index in sync with both.
+The one input triggers can't produce is full_text, which comes from the
+plugin's extracted text on disk. It is stored here, compressed, in
+artifact_fts_doc.full_text_z when the artifact's content is captured.
+
+Ranking uses the bm25 column weights stored as the index's 'rank' setting
+(migration 0007); queries order by artifact_fts.rank to pick them up.
+"""
+import re
+import sqlite3
+from typing import Optional
+
+from core.plugins.loader import PluginLoader
+
+
+def set_full_text(conn: sqlite3.Connection, artifact_id: str, text: str) -> None:
+    """Store and index an artifact's extracted text. Does not commit."""
+    conn.execute(
+        """
+        UPDATE artifact_fts_doc SET full_text_z = fts_deflate(?), text_indexed = 1
+        WHERE artifact_id = ?
+        """,
+        (text, artifact_id),
+    )
+
+
+def reindex_pending(conn: sqlite3.Connection, loader: PluginLoader, batch_size: int = 200) -> int:
+    """
+    Write full_text for every artifact flagged as not yet indexed — new content,
+    or rows carried over from before trigger maintenance. Only these artifacts'
+    text files are read. Returns the number of artifacts indexed.
+    """
+    indexed = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT a.id, a.plugin_type, a.content_path
+            FROM artifact_fts_doc d
+            JOIN artifact a ON a.id = d.artifact_id
+            WHERE d.text_indexed = 0
+            ORDER BY d.docid
+            LIMIT ?
+            """,
+            (batch_size,),
+        ).fetchall()
+        if not rows:
+            return indexed
+
+        for row in rows:
+            plugin = loader.get_content_plugin(row["plugin_type"])
+            text = plugin.get_fts_text({"content_path": row["content_path"]}) if plugin else ""
+            # Empty text still counts as indexed, so missing files aren't retried every run
+            set_full_text(conn, row["id"], text or "")
+        conn.commit()
+        indexed += len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+_WORD_RE = re.compile(r"\w+")
+
+# Shortest partial word expanded as a prefix; matches the smallest prefix index
+_MIN_PREFIX = 2
+
+# Highlight markers passed to snippet() / highlight(); split out by highlight_segments()
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+
+def compile_prefix_query(text: str) -> Optional[str]:
+    """
+    Turn raw search-box input into a safe FTS5 query, or None if it has no words.
+
+    Every word is quoted, so operators, quotes and column names typed by the
+    user are matched literally and never raise a syntax error. The last word
+    is treated as still being typed and matched as a prefix, unless the input
+    ends in whitespace or the word is shorter than _MIN_PREFIX.
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if not text[-1].isspace() and len(words[-1]) >= _MIN_PREFIX:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def compile_terms_query(text: str, any_term: bool = False) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query of quoted words, or None if it has none.
+
+    By default every word must match; any_term=True ORs them instead, for
+    natural-language queries where bm25 should rank partial matches.
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    return (" OR " if any_term else " ").join(f'"{word}"' for word in words)
+
+
+def highlight_segments(text: Optional[str]) -> list[dict]:
+    """Split snippet()/highlight() output into [{"text", "match"}] runs for the client to render."""
+    if not text:
+        return []
+    segments = []
+    for i, part in enumerate(re.split(f"[{MATCH_START}{MATCH_END}]", text)):
+        if part:
+            # Markers alternate start/end, so odd-numbered parts are inside a match
+            segments.append({"text": part, "match": i % 2 == 1})
+    return segments
+
+
+def fetch_highlights(conn: sqlite3.Connection, match: str, docids: list[int]) -> dict[int, dict]:
+    """
+    Title highlight and best-column snippet for each docid matching `match`.
+
+    Run separately from ranking so the (compressed) content rows are only read
+    for the page being returned, not for every match.
+    """
+    if not docids:
+        return {}
+    placeholders = ",".join("?" * len(docids))
+    rows = conn.execute(
+        f"""
+        SELECT rowid,
+               highlight(artifact_fts, 1, ?, ?) AS title,
+               snippet(artifact_fts, -1, ?, ?, '…', 16) AS snippet
+        FROM artifact_fts
+        WHERE artifact_fts MATCH ? AND rowid IN ({placeholders})
+        """,
+        [MATCH_START, MATCH_END, MATCH_START, MATCH_END, match, *docids],
+    ).fetchall()
+    return {
+        row["rowid"]: {
+            "title": highlight_segments(row["title"]),
+            "snippet": highlight_segments(row["snippet"]),
+        }
+        for row in rows
+    }
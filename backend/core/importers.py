@@ -0,0 +1,585 @@
+"""
+Bookmark imports: browser bookmarks, Pocket and Raindrop exports.
+
+Files are parsed incrementally, so memory doesn't grow with the file:
+
+  netscape — the bookmarks.html format browsers, Pocket and Raindrop export.
+             Folders become collections (nested folders joined with ' / '),
+             TAGS attributes become tags, <DD> text the excerpt.
+  csv      — Pocket (title, url, time_added, tags separated by |, status)
+             and Raindrop (title, note, excerpt, url, folder, tags, created,
+             favorite) exports, or any CSV with a url column.
+  json     — the objects of the first array in the file (a top-level array,
+             or one like {"items": [...]}), or newline-delimited JSON; the
+             same field names as csv.
+
+Each bookmark becomes an artifact right away, with its title, excerpt,
+tags and collection, inserted with multi-row statements in large
+transactions (IMPORT_BATCH_ROWS per statement, a commit every
+IMPORT_COMMIT_ROWS); the FTS triggers index it, so it is searchable within
+seconds. Content is captured afterwards by the queue: every imported
+artifact gets a 'capture' task (IMPORT_CAPTURE_CONCURRENCY at a time, at
+most one start per host every IMPORT_CAPTURE_HOST_INTERVAL seconds) that
+runs it through its content plugin like any other ingest.
+
+URLs already in the library, or repeated in the file, are skipped.
+
+    POST /api/import?format=...        body: the export file
+    python -m core.importers FILE [--format ...] [--no-capture]
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from ulid import ULID
+
+from core.db import get_connection, get_data_path, run_migrations
+from core.ingestion import capture_existing
+from core.jsonstream import JSONStreamError, iter_array, text_chunks
+from core.plugins.loader import PluginLoader
+from core.plugins.router import ContentRouter
+from core.queue import Task, TaskContext, enqueue_many, register_handler
+from core.urls import normalise_url, source_domain
+
+IMPORT_FORMATS: tuple[str, ...] = ("netscape", "csv", "json")
+
+_BATCH_ROWS = int(os.getenv("IMPORT_BATCH_ROWS", "500"))
+_COMMIT_ROWS = int(os.getenv("IMPORT_COMMIT_ROWS", "5000"))
+_CAPTURE_CONCURRENCY = int(os.getenv("IMPORT_CAPTURE_CONCURRENCY", "2"))
+_CAPTURE_HOST_INTERVAL = float(os.getenv("IMPORT_CAPTURE_HOST_INTERVAL", "2"))
+
+# Captures of imported bookmarks run after everything queued by interactive ingest
+_CAPTURE_PRIORITY = 7
+
+
+class ImportFormatError(Exception):
+    """Raised when an import file can't be parsed. Message is shown to the user."""
+
+
+@dataclass
+class Bookmark:
+    url: str
+    title: str = ""
+    excerpt: str = ""
+    notes: str = ""
+    tags: list[str] = field(default_factory=list)
+    collection: Optional[str] = None
+    added_at: Optional[str] = None      # ISO timestamp
+    is_read: bool = False
+    importance: int = 0
+
+
+def _timestamp(value) -> Optional[str]:
+    """Epoch seconds (or ms/µs), or an ISO string, as an ISO timestamp."""
+    if value in (None, ""):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).astimezone(timezone.utc).isoformat()
+    if number > 1e14:
+        number /= 1e6
+    elif number > 1e11:
+        number /= 1e3
+    try:
+        return datetime.fromtimestamp(number, timezone.utc).isoformat()
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _split_tags(value) -> list[str]:
+    if isinstance(value, list):
+        names = [str(v) for v in value]
+    elif value:
+        text = str(value)
+        names = text.split("|") if "|" in text else text.split(",")
+    else:
+        names = []
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
+def _first(record: dict, *keys: str):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _from_record(record: dict) -> Optional[Bookmark]:
+    """A Bookmark from a CSV row or JSON object (keys lowercased), or None without a URL."""
+    url = _first(record, "url", "link", "href", "given_url", "resolved_url")
+    if not isinstance(url, str) or not url.strip():
+        return None
+    collection = _first(record, "folder", "collection")
+    if isinstance(collection, dict):
+        collection = collection.get("title") or collection.get("name")
+    status = str(record.get("status") or "").lower()
+    favorite = str(record.get("favorite") or "").lower()
+    return Bookmark(
+        url=url.strip(),
+        title=str(_first(record, "title", "name", "resolved_title", "given_title") or "").strip(),
+        excerpt=str(_first(record, "excerpt", "description") or "").strip(),
+        notes=str(_first(record, "note", "notes") or "").strip(),
+        tags=_split_tags(_first(record, "tags", "tag")),
+        collection=str(collection).strip() if collection else None,
+        added_at=_timestamp(_first(record, "time_added", "created", "add_date", "created_at", "date_added")),
+        is_read=status in ("archive", "archived", "read", "1"),
+        importance=1 if favorite in ("true", "1", "yes") else 0,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Parsers
+# ---------------------------------------------------------------------------
+
+class _NetscapeParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parsed: list[Bookmark] = []
+        self._folders: list[Optional[str]] = []     # one entry per open <DL>
+        self._pending_folder: Optional[str] = None
+        self._folder_text: Optional[list[str]] = None
+        self._current: Optional[Bookmark] = None
+        self._title_text: Optional[list[str]] = None
+        self._note_text: Optional[list[str]] = None
+
+    def _finish(self) -> None:
+        if self._current is not None:
+            if self._note_text is not None:
+                self._current.excerpt = " ".join("".join(self._note_text).split())
+            self.parsed.append(self._current)
+        self._current = None
+        self._note_text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("dt", "dl", "h3", "a"):
+            self._finish()
+        if tag == "h3":
+            self._folder_text = []
+        elif tag == "dl":
+            self._folders.append(self._pending_folder)
+            self._pending_folder = None
+        elif tag == "a":
+            attributes = {key.lower(): value for key, value in attrs}
+            href = attributes.get("href") or ""
+            if href.startswith(("http://", "https://")):
+                path = [name for name in self._folders if name]
+                self._current = Bookmark(
+                    url=href,
+                    tags=_split_tags(attributes.get("tags")),
+                    collection=" / ".join(path) or None,
+                    added_at=_timestamp(attributes.get("add_date")),
+                )
+                self._title_text = []
+        elif tag == "dd" and self._current is not None:
+            self._note_text = []
+
+    def handle_endtag(self, tag):
+        if tag == "h3" and self._folder_text is not None:
+            self._pending_folder = " ".join("".join(self._folder_text).split()) or None
+            self._folder_text = None
+        elif tag == "a" and self._title_text is not None:
+            if self._current is not None:
+                self._current.title = " ".join("".join(self._title_text).split())
+            self._title_text = None
+        elif tag == "dl":
+            self._finish()
+            if self._folders:
+                self._folders.pop()
+
+    def handle_data(self, data):
+        if self._folder_text is not None:
+            self._folder_text.append(data)
+        elif self._title_text is not None:
+            self._title_text.append(data)
+        elif self._note_text is not None:
+            self._note_text.append(data)
+
+    def close(self):
+        super().close()
+        self._finish()
+
+
+def parse_netscape(stream: BinaryIO) -> Iterator[Bookmark]:
+    parser = _NetscapeParser()
+    for text in text_chunks(stream):
+        parser.feed(text)
+        yield from parser.parsed
+        parser.parsed.clear()
+    parser.close()
+    yield from parser.parsed
+
+
+def parse_csv(stream: BinaryIO) -> Iterator[Bookmark]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.DictReader(text)
+    if not reader.fieldnames:
+        return
+    fields = [name.strip().lower() for name in reader.fieldnames]
+    if not {"url", "link", "href"} & set(fields):
+        raise ImportFormatError("CSV has no url column")
+    reader.fieldnames = fields
+    for row in reader:
+        bookmark = _from_record(row)
+        if bookmark is not None:
+            yield bookmark
+
+
+def _records(value) -> Iterator[Bookmark]:
+    """Bookmarks from a decoded JSON value: an entry, or a wrapper object holding a list of them."""
+    if not isinstance(value, dict):
+        return
+    bookmark = _from_record({str(k).lower(): v for k, v in value.items()})
+    if bookmark is not None:
+        yield bookmark
+        return
+    for item in next((v for v in value.values() if isinstance(v, list)), []):
+        yield from _records(item)
+
+
+def parse_json(stream: BinaryIO) -> Iterator[Bookmark]:
+    """
+    Entries of a JSON export. A top-level array, or the first array in a
+    pretty-printed wrapper object, is decoded one element at a time; a file
+    whose first line is a complete object is read as NDJSON.
+    """
+    chunks = text_chunks(stream)
+    buffer = ""
+    while not buffer.lstrip():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        buffer += chunk
+    buffer = buffer.lstrip()
+
+    if buffer.startswith("{"):
+        while "\n" not in buffer:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            buffer += chunk
+        try:
+            json.loads(buffer.partition("\n")[0])
+        except json.JSONDecodeError:
+            pass            # the object spans lines: a wrapper around the entry array
+        else:
+            yield from _parse_ndjson(buffer, chunks)
+            return
+
+    try:
+        for value in iter_array(itertools.chain([buffer], chunks)):
+            yield from _records(value)
+    except JSONStreamError as exc:
+        raise ImportFormatError(f"Invalid JSON file: {exc}")
+
+
+def _parse_ndjson(buffer: str, chunks: Iterator[str]) -> Iterator[Bookmark]:
+    while True:
+        chunk = next(chunks, None)
+        if chunk is None:
+            lines, buffer = buffer.split("\n"), ""
+        else:
+            buffer += chunk
+            *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    value = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ImportFormatError(f"Invalid JSON line: {exc}")
+                yield from _records(value)
+        if chunk is None:
+            return
+
+
+_PARSERS = {"netscape": parse_netscape, "csv": parse_csv, "json": parse_json}
+
+
+def detect_format(head: bytes) -> str:
+    """Import format from the first bytes of a file."""
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(b"<"):
+        return "netscape"
+    if text.startswith((b"[", b"{")):
+        return "json"
+    return "csv"
+
+
+def parse(stream: BinaryIO, fmt: str) -> Iterator[Bookmark]:
+    if fmt not in _PARSERS:
+        raise ImportFormatError(f"Unknown import format '{fmt}' (expected one of: {', '.join(IMPORT_FORMATS)})")
+    return _PARSERS[fmt](stream)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class _NameIds:
+    """name → id for tags or collections, created on first use."""
+
+    def __init__(self, conn: sqlite3.Connection, table: str):
+        self._conn = conn
+        self._table = table
+        self._ids: dict[str, str] = {}
+
+    def ids(self, names: Iterable[str]) -> dict[str, str]:
+        wanted = [name for name in dict.fromkeys(names) if name not in self._ids]
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row in self._conn.execute(
+                f"SELECT id, name FROM {self._table} WHERE name IN ({placeholders}) ORDER BY id DESC", batch
+            ):
+                self._ids[row["name"]] = row["id"]
+        missing = [name for name in wanted if name not in self._ids]
+        if missing:
+            now = datetime.now(timezone.utc).isoformat()
+            rows = [(str(ULID()), name) for name in missing]
+            if self._table == "tag":
+                self._conn.executemany("INSERT INTO tag (id, name) VALUES (?, ?)", rows)
+            else:
+                self._conn.executemany(
+                    "INSERT INTO collection (id, name, created_at) VALUES (?, ?, ?)",
+                    [(cid, name, now) for cid, name in rows],
+                )
+            self._ids.update({name: cid for cid, name in rows})
+        return self._ids
+
+
+def import_bookmarks(
+    conn: sqlite3.Connection,
+    bookmarks: Iterable[Bookmark],
+    router: ContentRouter,
+    source: str,
+    capture: bool = True,
+    user_id: str = "default",
+) -> dict:
+    """
+    Create an artifact per new bookmark, with its tags and collection, and
+    queue its content capture. Commits every IMPORT_COMMIT_ROWS artifacts
+    and at the end. Returns counts: imported, duplicates, invalid.
+
+    If the file turns out malformed partway, the bookmarks read before the
+    error are imported and committed, then the ImportFormatError is raised.
+    Any other error rolls back to the last commit.
+    """
+    counts = {"imported": 0, "duplicates": 0, "invalid": 0}
+    tags = _NameIds(conn, "tag")
+    collections = _NameIds(conn, "collection")
+    artifacts_root = get_data_path() / "users" / user_id / "artifacts"
+    since_commit = 0
+
+    def flush(batch: list[Bookmark]) -> None:
+        nonlocal since_commit
+        # The file's own repeats, then what the library (including earlier batches) has
+        unique: dict[str, Bookmark] = {}
+        for bookmark in batch:
+            key = normalise_url(bookmark.url)
+            if key is None:
+                counts["invalid"] += 1
+            elif key in unique:
+                counts["duplicates"] += 1
+            else:
+                unique[key] = bookmark
+        if not unique:
+            return
+        # As find_duplicates, but with the keys already normalised above
+        placeholders = ",".join("?" * len(unique))
+        existing = {
+            row[0] for row in conn.execute(f"SELECT url FROM artifact_url WHERE url IN ({placeholders})", list(unique))
+        }
+        counts["duplicates"] += len(existing)
+        new = [bookmark for key, bookmark in unique.items() if key not in existing]
+        if not new:
+            return
+
+        now = datetime.now(timezone.utc).isoformat()
+        rows, tag_links, collection_links = [], [], []
+        tag_ids = tags.ids(name for b in new for name in b.tags)
+        collection_ids = collections.ids(b.collection for b in new if b.collection)
+        for bookmark in new:
+            plugin = router.route(bookmark.url)
+            if plugin is None:
+                counts["invalid"] += 1
+                continue
+            artifact_id = str(ULID())
+            plugin_data = {"imported_from": source}
+            if bookmark.added_at:
+                plugin_data["bookmarked_at"] = bookmark.added_at
+            rows.append((
+                artifact_id, plugin.plugin_id, bookmark.url, source_domain(bookmark.url),
+                bookmark.added_at or now, now, now,
+                str(artifacts_root / artifact_id),
+                bookmark.title or bookmark.url, bookmark.excerpt or None, bookmark.notes or None,
+                int(bookmark.is_read), bookmark.importance,
+                json.dumps(plugin_data), plugin.plugin_version,
+            ))
+            tag_links += [(artifact_id, tag_ids[name]) for name in bookmark.tags]
+            if bookmark.collection:
+                collection_links.append((artifact_id, collection_ids[bookmark.collection]))
+
+        # Links go in ahead of their artifacts (foreign keys are checked at commit): the
+        # per-link FTS and updated_at triggers then have nothing to update, and the
+        # artifact is indexed once with all its tags (migration 0014)
+        conn.execute("PRAGMA defer_foreign_keys = ON")
+        conn.executemany("INSERT INTO artifact_tag (artifact_id, tag_id, source) VALUES (?, ?, 'user')", tag_links)
+        conn.executemany(
+            "INSERT INTO artifact_collection (artifact_id, collection_id) VALUES (?, ?)", collection_links
+        )
+        conn.executemany(
+            """
+            INSERT INTO artifact (
+                id, plugin_type, source_url, source_domain,
+                captured_at, created_at, updated_at, content_path,
+                title, excerpt, user_notes, is_read, importance,
+                plugin_data, plugin_version
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        if capture:
+            enqueue_many(conn, [row[0] for row in rows], "capture", priority=_CAPTURE_PRIORITY)
+
+        counts["imported"] += len(rows)
+        since_commit += len(rows)
+        if since_commit >= _COMMIT_ROWS:
+            conn.commit()
+            since_commit = 0
+
+    batch: list[Bookmark] = []
+    try:
+        try:
+            for bookmark in bookmarks:
+                batch.append(bookmark)
+                if len(batch) >= _BATCH_ROWS:
+                    flush(batch)
+                    batch = []
+        except (ImportFormatError, JSONStreamError):
+            # Raised by the parser, between flushes: whatever was read before it is kept
+            flush(batch)
+            conn.commit()
+            raise
+        flush(batch)
+    except BaseException:
+        # A flush that failed partway may have left links without their artifacts
+        conn.rollback()
+        raise
+    conn.commit()
+    return counts
+
+
+def import_file(
+    conn: sqlite3.Connection,
+    stream: BinaryIO,
+    router: ContentRouter,
+    fmt: Optional[str] = None,
+    source: Optional[str] = None,
+    capture: bool = True,
+) -> dict:
+    """Parse and import an export file. fmt is detected from the content if not given. Raises ImportFormatError."""
+    if fmt is None:
+        if not stream.seekable():
+            raise ImportFormatError("Import format must be given for a non-seekable stream")
+        fmt = detect_format(stream.read(512))
+        stream.seek(0)
+    counts = import_bookmarks(conn, parse(stream, fmt), router, source or fmt, capture)
+    return {"format": fmt, **counts}
+
+
+# ---------------------------------------------------------------------------
+# Content capture
+# ---------------------------------------------------------------------------
+
+class _HostThrottle:
+    """At most one capture start per host every IMPORT_CAPTURE_HOST_INTERVAL seconds."""
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._next_start: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self._interval
+            if len(self._next_start) > 10_000:
+                self._next_start = {h: t for h, t in self._next_start.items() if t > now}
+        if start > now:
+            time.sleep(start - now)
+
+
+_throttle = _HostThrottle(_CAPTURE_HOST_INTERVAL)
+
+
+# One router per loader: routes are compiled when it is built, and it caches decisions
+_routers: "weakref.WeakKeyDictionary[PluginLoader, ContentRouter]" = weakref.WeakKeyDictionary()
+
+
+def handle_capture(ctx: TaskContext, tasks: list[Task]) -> None:
+    router = _routers.get(ctx.loader)
+    if router is None:
+        router = _routers.setdefault(ctx.loader, ContentRouter(ctx.loader))
+    for task in tasks:
+        row = ctx.conn.execute("SELECT source_domain FROM artifact WHERE id = ?", (task.artifact_id,)).fetchone()
+        if row is None:
+            continue        # deleted since it was imported
+        _throttle.wait(row["source_domain"] or "")
+        capture_existing(task.artifact_id, ctx.conn, router)
+
+
+register_handler(
+    "capture", handle_capture, batch_size=1, concurrency=_CAPTURE_CONCURRENCY, lease_seconds=600
+)
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m core.importers", description="Import bookmarks")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None, help="default: detected from the file")
+    parser.add_argument("--source", default=None, help="recorded as plugin_data.imported_from (e.g. pocket)")
+    parser.add_argument("--no-capture", action="store_true", help="import metadata only; don't queue captures")
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    run_migrations(conn)
+    loader = PluginLoader(conn, get_data_path())
+    loader.load_all()
+    started = time.perf_counter()
+    try:
+        with open(Path(args.file), "rb") as stream:
+            result = import_file(conn, stream, ContentRouter(loader), args.format, args.source, not args.no_capture)
+    except ImportFormatError as exc:
+        raise SystemExit(f"  error: {exc}")
+    finally:
+        conn.close()
+    print(
+        f"  {result['imported']} imported, {result['duplicates']} duplicates, {result['invalid']} invalid"
+        f" ({result['format']}, {time.perf_counter() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
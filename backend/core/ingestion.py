@@ -3,20 +3,27 @@ Core ingestion pipeline.
 
 Orchestrates the flow from a source URL/file through a content plugin
 to final artifact persistence: temp files → artifact directory → database.
+Artifact files are links into the content-addressed blob store (core/blobs.py).
 """
 import json
+import os
 import shutil
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
-from urllib.parse import urlparse
+from typing import Callable, Iterable, Optional
 
 from ulid import ULID
 
+from core.blobs import add_references, store_file
+from core.config import config_service
 from core.db import get_data_path
-from core.plugins.base import ArtifactData, IngestionError
+from core.fts import set_full_text
+from core.plugins.base import ArtifactData, ContentPlugin, IngestionError
 from core.plugins.loader import PluginLoader
 from core.plugins.router import ContentRouter
+from core.queue import enqueue
+from core.urls import normalise_url, source_domain
 
 # Maps ArtifactData.files role keys to (subdirectory, filename) within the artifact directory.
 # Empty string subdirectory means artifact root.
@@ -27,59 +34,120 @@ _ROLE_TO_PATH: dict[str, tuple[str, str]] = {
     "markdown":      ("processed", "markdown.md"),
     "screenshot":    ("",          "screenshot.jpg"),
     "thumbnail":     ("",          "thumbnail.jpg"),
+    "thumbnail_1x":  ("",          "thumbnail@1x.webp"),
+    "thumbnail_2x":  ("",          "thumbnail@2x.webp"),
     "pdf":           ("raw",       "original.pdf"),
+    "raw_json":      ("raw",       "original.json"),
+    "transcript":    ("processed", "transcript.json"),
 }
 
+# Progress stages reported through ingest_url's on_stage callback, in order.
+INGEST_STAGES: tuple[str, ...] = ("routing", "capturing", "storing", "indexing")
 
-def ingest_url(
-    url: str,
-    conn: sqlite3.Connection,
-    loader: PluginLoader,
-    router: ContentRouter,
-    user_id: str = "default",
-) -> dict:
-    """
-    Full ingest pipeline for a URL. Blocking.
+# What ingest_url does with a URL that is already archived, matched on the
+# normalised source or canonical URL (migration 0011):
+#   'existing' — return the existing artifact without capturing
+#   'skip'     — raise DuplicateArtifact
+#   'snapshot' — capture a new artifact alongside the existing one
+DUPLICATE_POLICIES: tuple[str, ...] = ("existing", "skip", "snapshot")
+_DUPLICATE_POLICY = os.getenv("INGEST_DUPLICATE_POLICY", "existing")
+if _DUPLICATE_POLICY not in DUPLICATE_POLICIES:
+    print(f"  warning: unknown INGEST_DUPLICATE_POLICY '{_DUPLICATE_POLICY}'; using 'existing'")
+    _DUPLICATE_POLICY = "existing"
 
-    Returns the persisted artifact record as a dict.
-    Raises IngestionError if the URL cannot be handled or the plugin fails.
+
+# Artifacts from one export file (ingest_many) per transaction
+_MANY_COMMIT_EVERY = int(os.getenv("INGEST_MANY_COMMIT_EVERY", "100"))
+
+
+def effective_duplicate_policy(policy: Optional[str] = None) -> str:
+    """policy if given, else the INGEST_DUPLICATE_POLICY default."""
+    return policy or _DUPLICATE_POLICY
+
+
+class DuplicateArtifact(IngestionError):
+    """Raised under the 'skip' duplicate policy when the URL is already archived."""
+
+    def __init__(self, url: str, artifact_id: str):
+        super().__init__(f"Already archived as {artifact_id}: {url}")
+        self.artifact_id = artifact_id
+
+
+def find_duplicates(conn: sqlite3.Connection, urls: Iterable[str]) -> dict[str, str]:
     """
-    plugin = router.route(url)
-    if plugin is None:
-        raise IngestionError(f"No content plugin found for: {url}")
+    Map each of urls that is already archived to its newest matching artifact id.
+    Matches on the normalised URL, so one query covers a whole bookmark file.
+    """
+    keys = {url: normalise_url(url) for url in urls}
+    wanted = list({key for key in keys.values() if key})
+    found: dict[str, str] = {}
+    for start in range(0, len(wanted), 500):
+        batch = wanted[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        # ULIDs sort by creation time, so the last row per URL is the newest artifact
+        for row in conn.execute(
+            f"SELECT url, artifact_id FROM artifact_url WHERE url IN ({placeholders}) ORDER BY artifact_id",
+            batch,
+        ):
+            found[row["url"]] = row["artifact_id"]
+    return {url: found[key] for url, key in keys.items() if key in found}
 
-    artifact_id = str(ULID())
-    data_path = get_data_path()
 
-    temp_dir = data_path / "system" / "temp" / "ingest"
-    temp_dir.mkdir(parents=True, exist_ok=True)
+def _existing_record(conn: sqlite3.Connection, artifact_id: str) -> dict:
+    row = conn.execute("SELECT * FROM artifact WHERE id = ?", (artifact_id,)).fetchone()
+    return {
+        "id": row["id"],
+        "plugin_type": row["plugin_type"],
+        "title": row["title"],
+        "excerpt": row["excerpt"],
+        "source_url": row["source_url"],
+        "source_domain": row["source_domain"],
+        "captured_at": row["captured_at"],
+        "content_path": row["content_path"],
+        "thumbnail_path": row["thumbnail_path"],
+        "plugin_data": json.loads(row["plugin_data"]) if row["plugin_data"] else {},
+        "plugin_version": row["plugin_version"],
+        "queue_tasks": [],
+        "duplicate": True,
+    }
 
-    # Build merged config: global user settings (base) + plugin-specific config (overrides)
-    user_row = conn.execute(
-        "SELECT settings FROM user WHERE id = ?", (user_id,)
-    ).fetchone()
-    global_settings: dict = json.loads(user_row["settings"]) if user_row and user_row["settings"] else {}
 
-    plugin_row = conn.execute(
-        "SELECT config FROM plugin_registry WHERE id = ?", (plugin.plugin_id,)
-    ).fetchone()
-    plugin_config: dict = json.loads(plugin_row["config"]) if plugin_row and plugin_row["config"] else {}
+def _duplicate_of(conn: sqlite3.Connection, url: str, policy: str) -> Optional[str]:
+    """The artifact url duplicates, or None if it should be captured under policy."""
+    if policy == "snapshot":
+        return None
+    return find_duplicates(conn, [url]).get(url)
 
-    # Flat merge: global settings first, then plugin-specific config on top.
-    # Plugin config wins on key conflicts — allows per-plugin overrides of globals.
-    config: dict = {**global_settings, **plugin_config}
 
-    # --- Call the plugin (blocking) ---
-    artifact_data: ArtifactData = plugin.ingest(url, artifact_id, temp_dir, config)
+def _return_existing(conn: sqlite3.Connection, url: str, artifact_id: str, policy: str) -> dict:
+    if policy == "skip":
+        raise DuplicateArtifact(url, artifact_id)
+    return _existing_record(conn, artifact_id)
+
+
+def plugin_config(conn: sqlite3.Connection, plugin_id: str, user_id: str = "default") -> dict:
+    """Config handed to a plugin: global user settings (base) + plugin-specific config (overrides)."""
+    return config_service.plugin_config(conn, plugin_id, user_id)
 
-    # --- Move temp files to final artifact directory ---
-    artifact_dir = data_path / "users" / user_id / "artifacts" / artifact_id
-    (artifact_dir / "raw").mkdir(parents=True, exist_ok=True)
-    (artifact_dir / "processed").mkdir(parents=True, exist_ok=True)
 
-    thumbnail_path: str | None = None
+def task_priority(plugin: ContentPlugin, task_type: str) -> int:
+    """Queue priority for a task_type plugin asks for: its stage's (core/plugin_tasks.py), else the default."""
+    stage = plugin.task_stages.get(task_type)
+    return stage.priority if stage else 5
 
-    for role, temp_path_str in artifact_data.files.items():
+
+def store_artifact_files(
+    artifact_dir: Path, files: dict[str, str]
+) -> tuple[list[tuple[str, str, int]], Optional[str]]:
+    """
+    Move plugin temp files (role → path) to their place in artifact_dir, through
+    the blob store. Returns ([(relative path, blob digest, size)], thumbnail path);
+    pass the first to blobs.add_references once the artifact row exists.
+    """
+    thumbnail_path: Optional[str] = None
+    stored_files: list[tuple[str, str, int]] = []
+
+    for role, temp_path_str in files.items():
         src = Path(temp_path_str)
         if not src.exists():
             continue
@@ -95,14 +163,58 @@ def ingest_url(
             # Unknown role — place in processed/ preserving source filename
             dest = artifact_dir / "processed" / src.name
 
-        shutil.move(str(src), str(dest))
+        # Identical content already in the blob store is linked, not written again
+        digest, size, _ = store_file(src, dest)
+        stored_files.append((dest.relative_to(artifact_dir).as_posix(), digest, size))
 
         if role == "thumbnail":
             thumbnail_path = str(dest)
+    return stored_files, thumbnail_path
+
+
+def _queue_followups(
+    conn: sqlite3.Connection,
+    plugin: ContentPlugin,
+    artifact_id: str,
+    thumbnail_path: Optional[str],
+    queue_tasks: list[str],
+) -> None:
+    """Queue post-ingest processing for a freshly captured artifact. Does not commit."""
+    # Passage chunking runs for every artifact; plugin stages at their own priority
+    enqueue(conn, artifact_id, "chunk", priority=3)
+    if thumbnail_path:
+        enqueue(conn, artifact_id, "thumbnail", priority=2)     # WebP derivatives, core/thumbnails.py
+    for task_type in queue_tasks:
+        enqueue(conn, artifact_id, task_type, priority=task_priority(plugin, task_type))
+
+
+def _artifact_dir(user_id: str, artifact_id: str) -> Path:
+    return get_data_path() / "users" / user_id / "artifacts" / artifact_id
+
+
+def _persist(
+    conn: sqlite3.Connection,
+    plugin: ContentPlugin,
+    artifact_id: str,
+    url: str,
+    artifact_data: ArtifactData,
+    user_id: str,
+    report: Callable[[str], None],
+) -> dict:
+    """
+    Store a captured artifact's files, row and text, and queue its follow-up
+    tasks. Returns the artifact record. Does not commit.
+    """
+    # --- Move temp files to final artifact directory ---
+    artifact_dir = _artifact_dir(user_id, artifact_id)
+    (artifact_dir / "raw").mkdir(parents=True, exist_ok=True)
+    (artifact_dir / "processed").mkdir(parents=True, exist_ok=True)
+
+    stored_files, thumbnail_path = store_artifact_files(artifact_dir, artifact_data.files)
 
     # --- Write artifact record to database ---
     now = datetime.now(timezone.utc).isoformat()
-    domain = urlparse(url).netloc.lower().removeprefix("www.")
+    domain = source_domain(url)
 
     conn.execute(
         """
@@ -128,28 +240,14 @@ def ingest_url(
         ),
     )
 
+    add_references(conn, artifact_id, stored_files)
+
     # --- Populate FTS index ---
-    fts_text = plugin.get_fts_text({"content_path": str(artifact_dir)})
-    conn.execute(
-        """
-        INSERT INTO artifact_fts(artifact_id, title, excerpt, summary, user_notes, tags, full_text)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (artifact_id, artifact_data.title, artifact_data.excerpt, None, None, None, fts_text),
-    )
+    # Triggers index the metadata columns; the extracted text is added here.
+    report("indexing")
+    set_full_text(conn, artifact_id, plugin.get_fts_text({"content_path": str(artifact_dir)}))
 
-    # --- Queue AI processing tasks ---
-    for task_type in artifact_data.queue_tasks:
-        task_id = str(ULID())
-        conn.execute(
-            """
-            INSERT INTO processing_queue (id, artifact_id, task_type, created_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (task_id, artifact_id, task_type, now),
-        )
-
-    conn.commit()
+    _queue_followups(conn, plugin, artifact_id, thumbnail_path, artifact_data.queue_tasks)
 
     return {
         "id": artifact_id,
@@ -164,4 +262,188 @@ def ingest_url(
         "plugin_data": artifact_data.plugin_data,
         "plugin_version": artifact_data.plugin_version,
         "queue_tasks": artifact_data.queue_tasks,
+        "duplicate": False,
     }
+
+
+def ingest_url(
+    url: str,
+    conn: sqlite3.Connection,
+    loader: PluginLoader,
+    router: ContentRouter,
+    user_id: str = "default",
+    on_stage: Optional[Callable[[str], None]] = None,
+    duplicate_policy: Optional[str] = None,
+) -> dict:
+    """
+    Full ingest pipeline for a URL. Blocking.
+
+    on_stage, if given, is called with each INGEST_STAGES name as it starts.
+    duplicate_policy overrides INGEST_DUPLICATE_POLICY for this call; an
+    already-archived URL is recognised before capture, and again after it if
+    the plugin reports a canonical URL that is.
+
+    Returns the persisted artifact record as a dict, with duplicate: true if
+    it is an existing artifact. Raises DuplicateArtifact under the 'skip'
+    policy, and IngestionError if the URL cannot be handled or the plugin fails.
+    """
+    report = on_stage or (lambda stage: None)
+    policy = effective_duplicate_policy(duplicate_policy)
+
+    report("routing")
+    if (duplicate_id := _duplicate_of(conn, url, policy)):
+        return _return_existing(conn, url, duplicate_id, policy)
+
+    plugin = router.route(url)
+    if plugin is None:
+        raise IngestionError(f"No content plugin found for: {url}")
+
+    artifact_id = str(ULID())
+    data_path = get_data_path()
+
+    temp_dir = data_path / "system" / "temp" / "ingest"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+
+    config = plugin_config(conn, plugin.plugin_id, user_id)
+
+    # --- Call the plugin (blocking) ---
+    report("capturing")
+    artifact_data: ArtifactData = plugin.ingest(url, artifact_id, temp_dir, config)
+
+    # A redirect may have landed on a page that is already archived
+    canonical_url = artifact_data.plugin_data.get("canonical_url")
+    if canonical_url and (duplicate_id := _duplicate_of(conn, canonical_url, policy)):
+        for temp_path in artifact_data.files.values():
+            Path(temp_path).unlink(missing_ok=True)
+        return _return_existing(conn, url, duplicate_id, policy)
+
+    report("storing")
+    artifact = _persist(conn, plugin, artifact_id, url, artifact_data, user_id, report)
+    conn.commit()
+    return artifact
+
+
+def capture_existing(
+    artifact_id: str,
+    conn: sqlite3.Connection,
+    router: ContentRouter,
+    user_id: str = "default",
+) -> None:
+    """
+    Capture the content of an artifact that was created without it (e.g. by
+    an import, core/importers.py): runs its source URL through the content
+    plugin and stores files, text and metadata as ingest_url would. Title and
+    excerpt already on the row are kept. Blocking. Commits.
+
+    Raises IngestionError if the URL cannot be handled or the plugin fails.
+    """
+    row = conn.execute("SELECT * FROM artifact WHERE id = ?", (artifact_id,)).fetchone()
+    if row is None or not row["source_url"]:
+        raise IngestionError(f"Artifact {artifact_id} has no source URL to capture")
+    url = row["source_url"]
+
+    plugin = router.route(url)
+    if plugin is None:
+        raise IngestionError(f"No content plugin found for: {url}")
+
+    data_path = get_data_path()
+    temp_dir = data_path / "system" / "temp" / "ingest"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    artifact_data: ArtifactData = plugin.ingest(url, artifact_id, temp_dir, plugin_config(conn, plugin.plugin_id, user_id))
+
+    artifact_dir = Path(row["content_path"])
+    (artifact_dir / "raw").mkdir(parents=True, exist_ok=True)
+    (artifact_dir / "processed").mkdir(parents=True, exist_ok=True)
+    stored_files, thumbnail_path = store_artifact_files(artifact_dir, artifact_data.files)
+
+    plugin_data = {**(json.loads(row["plugin_data"]) if row["plugin_data"] else {}), **artifact_data.plugin_data}
+    conn.execute(
+        """
+        UPDATE artifact SET
+            plugin_type = ?, title = ?, excerpt = ?, thumbnail_path = coalesce(?, thumbnail_path),
+            plugin_data = ?, plugin_version = ?, updated_at = ?
+        WHERE id = ?
+        """,
+        (
+            plugin.plugin_id,
+            row["title"] if row["title"] and row["title"] != url else artifact_data.title,
+            row["excerpt"] or artifact_data.excerpt,
+            thumbnail_path,
+            json.dumps(plugin_data),
+            artifact_data.plugin_version,
+            datetime.now(timezone.utc).isoformat(),
+            artifact_id,
+        ),
+    )
+    add_references(conn, artifact_id, stored_files)
+    set_full_text(conn, artifact_id, plugin.get_fts_text({"content_path": str(artifact_dir)}))
+    _queue_followups(conn, plugin, artifact_id, thumbnail_path, artifact_data.queue_tasks)
+    conn.commit()
+
+
+def ingest_many(
+    source: Path,
+    plugin: ContentPlugin,
+    conn: sqlite3.Connection,
+    user_id: str = "default",
+    duplicate_policy: Optional[str] = None,
+) -> dict:
+    """
+    Import a file that holds many artifacts (e.g. an AI-chat platform export)
+    through plugin.ingest_many. Blocking.
+
+    Each artifact is stored as the plugin yields it, and the transaction is
+    committed every INGEST_MANY_COMMIT_EVERY artifacts, so neither memory nor
+    the open transaction grows with the file. Artifacts whose source_url is
+    already archived (including earlier in the same file) are skipped unless
+    the duplicate policy is 'snapshot'.
+
+    Returns counts: imported, duplicates. Raises IngestionError if the plugin
+    doesn't import files or fails partway. When the plugin raises it between
+    artifacts, those stored before are kept; any other failure rolls back to
+    the last commit.
+    """
+    policy = effective_duplicate_policy(duplicate_policy)
+    temp_dir = get_data_path() / "system" / "temp" / "ingest"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    config = plugin_config(conn, plugin.plugin_id, user_id)
+
+    counts = {"imported": 0, "duplicates": 0}
+    # Directories of the artifacts since the last commit, removed if it's rolled back
+    uncommitted: list[Path] = []
+    artifacts = plugin.ingest_many(source, temp_dir, config)
+    try:
+        while True:
+            try:
+                artifact_data = next(artifacts, None)
+            except IngestionError as exc:
+                # Raised by the plugin between artifacts: everything stored so far is complete
+                conn.commit()
+                uncommitted.clear()
+                raise IngestionError(f"{exc} ({counts['imported']} imported before the error)") from exc
+            if artifact_data is None:
+                break
+            url = artifact_data.source_url
+            if not url or _duplicate_of(conn, url, policy):
+                for temp_path in artifact_data.files.values():
+                    Path(temp_path).unlink(missing_ok=True)
+                if not url:
+                    raise IngestionError(f"{plugin.plugin_id} produced an artifact without a source_url")
+                counts["duplicates"] += 1
+                continue
+            artifact_id = str(ULID())
+            uncommitted.append(_artifact_dir(user_id, artifact_id))
+            _persist(conn, plugin, artifact_id, url, artifact_data, user_id, lambda stage: None)
+            counts["imported"] += 1
+            if len(uncommitted) >= _MANY_COMMIT_EVERY:
+                conn.commit()
+                uncommitted.clear()
+    except BaseException:
+        # Anything else may have left an artifact half stored: back to the last commit.
+        # Their blob links are left to the blob store's orphan sweep
+        conn.rollback()
+        for artifact_dir in uncommitted:
+            shutil.rmtree(artifact_dir, ignore_errors=True)
+        raise
+    conn.commit()
+    return counts
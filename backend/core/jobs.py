@@ -0,0 +1,159 @@
+"""
+Background ingest jobs.
+
+A job wraps one ingest_url call. Submitting returns immediately with a job id;
+the capture runs on a bounded thread pool so long Playwright captures never
+hold FastAPI's request threadpool. Per-stage progress is kept in memory for
+polling (GET /api/ingest/jobs/{id}) or streaming (.../events).
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from ulid import ULID
+
+from core.db import get_connection
+from core.ingestion import INGEST_STAGES, ingest_url
+from core.plugins.base import IngestionError
+from core.plugins.loader import PluginLoader
+from core.plugins.router import ContentRouter
+
+
+class JobQueueFull(Exception):
+    """Raised when too many ingest jobs are already waiting for a worker."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class IngestJob:
+    id: str
+    url: str
+    user_id: str
+    created_at: str
+    duplicate_policy: Optional[str] = None
+    status: str = "queued"                   # 'queued', 'running', 'done', 'failed'
+    stage: Optional[str] = None              # current INGEST_STAGES entry while running
+    stages: list[dict] = field(default_factory=list)
+    artifact: Optional[dict] = None
+    error: Optional[str] = None
+    finished_at: Optional[str] = None
+    version: int = 0                         # bumped on every change; lets streams detect updates
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        # A failed job's last stage is the one it failed in, so it doesn't count as completed
+        completed = len(INGEST_STAGES) if self.status == "done" else max(len(self.stages) - 1, 0)
+        return {
+            "id": self.id,
+            "url": self.url,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": {"completed": completed, "total": len(INGEST_STAGES)},
+            "stages": list(self.stages),
+            "artifact": self.artifact,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestJobManager:
+    """
+    Runs ingest jobs on a fixed-size worker pool.
+
+    INGEST_WORKERS caps concurrent captures; INGEST_MAX_PENDING caps jobs
+    waiting for a worker (submit raises JobQueueFull beyond it). Finished jobs
+    are retained in memory, newest INGEST_JOB_RETENTION of them.
+    """
+
+    def __init__(self, loader: PluginLoader, router: ContentRouter):
+        self._loader = loader
+        self._router = router
+        self._max_pending = int(os.getenv("INGEST_MAX_PENDING", "100"))
+        self._retention = int(os.getenv("INGEST_JOB_RETENTION", "500"))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("INGEST_WORKERS", "2")),
+            thread_name_prefix="ingest",
+        )
+        self._jobs: OrderedDict[str, IngestJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, user_id: str = "default", duplicate_policy: Optional[str] = None) -> dict:
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status == "queued")
+            if pending >= self._max_pending:
+                raise JobQueueFull(f"{pending} ingest jobs already queued")
+            job = IngestJob(
+                id=str(ULID()), url=url, user_id=user_id, created_at=_now(), duplicate_policy=duplicate_policy
+            )
+            self._jobs[job.id] = job
+            self._prune()
+            snapshot = job.to_dict()
+
+        self._executor.submit(self._run, job)
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a snapshot of the job, or None if unknown or pruned."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def version(self, job_id: str) -> Optional[int]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.version if job else None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Internals ---
+
+    def _run(self, job: IngestJob) -> None:
+        self._update(job, status="running")
+        conn = get_connection()
+        try:
+            artifact = ingest_url(
+                job.url,
+                conn,
+                self._loader,
+                self._router,
+                user_id=job.user_id,
+                on_stage=lambda stage: self._enter_stage(job, stage),
+                duplicate_policy=job.duplicate_policy,
+            )
+            self._update(job, status="done", stage=None, artifact=artifact, finished_at=_now())
+        except IngestionError as exc:
+            self._update(job, status="failed", error=str(exc), finished_at=_now())
+        except Exception as exc:
+            self._update(job, status="failed", error=f"Unexpected error: {exc}", finished_at=_now())
+        finally:
+            conn.close()
+
+    def _enter_stage(self, job: IngestJob, stage: str) -> None:
+        with self._lock:
+            job.stage = stage
+            job.stages.append({"stage": stage, "started_at": _now()})
+            job.version += 1
+
+    def _update(self, job: IngestJob, **changes) -> None:
+        with self._lock:
+            for key, value in changes.items():
+                setattr(job, key, value)
+            job.version += 1
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond the retention limit. Caller holds the lock."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self._retention, 0)]:
+            del self._jobs[job_id]
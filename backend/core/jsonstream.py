@@ -0,0 +1,82 @@
+"""
+Incremental JSON decoding for large export files.
+
+iter_array yields the elements of a JSON array one at a time, so an export
+of any size is processed holding only the element being decoded and the
+read buffer. Used by bookmark imports (core/importers.py) and by content
+plugins that import platform exports through ContentPlugin.ingest_many.
+"""
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator
+
+READ_CHUNK = 64 * 1024
+
+# A decode error this close to the end of the buffer may just be a value cut
+# off mid-token ('tru', '\\u00'); one further back is a syntax error
+_TRUNCATION_SLACK = 16
+
+
+class JSONStreamError(ValueError):
+    """Raised when the stream isn't the JSON expected. Message is shown to the user."""
+
+
+def text_chunks(stream: BinaryIO, size: int = READ_CHUNK) -> Iterator[str]:
+    """UTF-8 text of a binary stream (a leading BOM dropped), size bytes at a time."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    while chunk := stream.read(size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def iter_array(chunks: Iterator[str]) -> Iterator[Any]:
+    """
+    Decode the elements of the first JSON array in chunks, one at a time.
+    Text before the '[' is skipped, so this also reads the array of a
+    wrapper object like {"items": [...]}; text after the ']' is ignored.
+    Raises JSONStreamError if there is no array, an element is malformed
+    (as soon as it is read, not at the end of the stream), or the stream
+    ends inside the array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while "[" not in buffer:
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise JSONStreamError("no JSON array found")
+        buffer += chunk
+    consumed = buffer.index("[") + 1        # characters of the stream before buffer
+    buffer = buffer[consumed:]
+
+    exhausted = False
+    while True:
+        stripped = buffer.lstrip(" \t\r\n,")
+        consumed += len(buffer) - len(stripped)
+        buffer = stripped
+        if buffer.startswith("]"):
+            return
+        # A value is only complete once something follows it (a number could continue)
+        try:
+            value, end = decoder.raw_decode(buffer)
+            complete = end < len(buffer) or exhausted
+        except json.JSONDecodeError as exc:
+            truncated = exc.msg.startswith("Unterminated string") or exc.pos >= len(buffer) - _TRUNCATION_SLACK
+            if not truncated:
+                raise JSONStreamError(f"{exc.msg} at character {consumed + exc.pos}") from exc
+            complete = False
+        if complete:
+            consumed += end
+            buffer = buffer[end:]
+            yield value
+            continue
+        if exhausted:
+            raise JSONStreamError("JSON ends inside an array element")
+        # Read until the buffer doubles, so a large element is re-scanned
+        # a logarithmic number of times rather than once per chunk
+        target = max(len(buffer) * 2, READ_CHUNK)
+        while len(buffer) < target:
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+                break
+            buffer += chunk
@@ -0,0 +1,12 @@
+-- Lease-based claiming for the processing queue worker.
+-- A worker claims tasks by setting status='running' with a lease; a running
+-- task whose lease has expired (worker died) becomes claimable again.
+
+ALTER TABLE processing_queue ADD COLUMN leased_by        TEXT;  -- worker id holding the lease
+ALTER TABLE processing_queue ADD COLUMN lease_expires_at TEXT;  -- ISO timestamp
+ALTER TABLE processing_queue ADD COLUMN run_after        TEXT;  -- retry backoff: not claimable before this
+
+DROP INDEX IF EXISTS idx_processing_queue_status;
+
+CREATE INDEX idx_processing_queue_claim
+    ON processing_queue(status, task_type, priority ASC, created_at ASC);
@@ -0,0 +1,16 @@
+-- Composite indexes for list_artifacts. Each covers one filter + sort
+-- combination and ends in id, so both the ORDER BY and a keyset cursor
+-- condition ((sort key, id) < (?, ?)) resolve as a single index range scan.
+-- They supersede the single-column captured_at / is_archived indexes.
+
+DROP INDEX IF EXISTS idx_artifact_captured_at;
+DROP INDEX IF EXISTS idx_artifact_is_archived;
+
+CREATE INDEX idx_artifact_archived_captured   ON artifact(is_archived, captured_at, id);
+CREATE INDEX idx_artifact_archived_title      ON artifact(is_archived, title, id);
+CREATE INDEX idx_artifact_archived_importance ON artifact(is_archived, importance, captured_at, id);
+CREATE INDEX idx_artifact_plugin_captured     ON artifact(is_archived, plugin_type, captured_at, id);
+CREATE INDEX idx_artifact_domain_captured     ON artifact(is_archived, source_domain, captured_at, id);
+
+-- Collection filter (EXISTS ... WHERE collection_id = ?) and collection listings
+CREATE INDEX idx_artifact_collection_collection_id ON artifact_collection(collection_id);
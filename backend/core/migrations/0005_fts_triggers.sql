@@ -0,0 +1,119 @@
+-- Trigger-maintained full-text index.
+--
+-- Triggers keep artifact_fts in sync with everything stored in the database:
+-- title, excerpt, summary, user_notes and the denormalised tag names. Each
+-- trigger writes only the columns that changed; full_text is never touched by
+-- them, so editing a title no longer drops the article body from search.
+-- full_text comes from the plugin's extracted text on disk and is written by
+-- core/fts.py at ingest.
+--
+-- artifact_fts_doc gives every artifact a stable integer docid, used as the
+-- FTS rowid (artifact's implicit rowid may change on VACUUM). text_indexed
+-- records whether full_text has been written for the current content.
+
+CREATE TABLE artifact_fts_doc (
+    docid        INTEGER PRIMARY KEY,
+    artifact_id  TEXT NOT NULL UNIQUE REFERENCES artifact(id) ON DELETE CASCADE,
+    text_indexed INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX idx_artifact_fts_doc_pending ON artifact_fts_doc(docid) WHERE text_indexed = 0;
+
+-- --- Rebuild the index keyed by docid, carrying over already-indexed full_text ---
+
+CREATE TEMP TABLE _old_fts_text AS
+    SELECT artifact_id, MAX(full_text) AS full_text
+    FROM artifact_fts
+    GROUP BY artifact_id;
+CREATE INDEX temp._old_fts_text_id ON _old_fts_text(artifact_id);
+
+INSERT INTO artifact_fts_doc (artifact_id, text_indexed)
+    SELECT a.id, o.full_text IS NOT NULL
+    FROM artifact a
+    LEFT JOIN _old_fts_text o ON o.artifact_id = a.id
+    ORDER BY a.id;
+
+DROP TABLE artifact_fts;
+
+CREATE VIRTUAL TABLE artifact_fts USING fts5(
+    artifact_id UNINDEXED,
+    title,
+    excerpt,
+    summary,
+    user_notes,
+    tags,
+    full_text
+);
+
+INSERT INTO artifact_fts (rowid, artifact_id, title, excerpt, summary, user_notes, tags, full_text)
+    SELECT d.docid, a.id, a.title, a.excerpt, a.summary, a.user_notes,
+           (SELECT group_concat(t.name, ' ')
+              FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+             WHERE at.artifact_id = a.id),
+           o.full_text
+    FROM artifact a
+    JOIN artifact_fts_doc d ON d.artifact_id = a.id
+    LEFT JOIN _old_fts_text o ON o.artifact_id = a.id;
+
+DROP TABLE _old_fts_text;
+
+-- --- Artifact rows ---
+
+CREATE TRIGGER artifact_fts_insert AFTER INSERT ON artifact
+BEGIN
+    INSERT INTO artifact_fts_doc (artifact_id) VALUES (NEW.id);
+    INSERT INTO artifact_fts (rowid, artifact_id, title, excerpt, summary, user_notes)
+    VALUES (
+        (SELECT docid FROM artifact_fts_doc WHERE artifact_id = NEW.id),
+        NEW.id, NEW.title, NEW.excerpt, NEW.summary, NEW.user_notes
+    );
+END;
+
+CREATE TRIGGER artifact_fts_update AFTER UPDATE OF title, excerpt, summary, user_notes ON artifact
+WHEN OLD.title      IS NOT NEW.title
+  OR OLD.excerpt    IS NOT NEW.excerpt
+  OR OLD.summary    IS NOT NEW.summary
+  OR OLD.user_notes IS NOT NEW.user_notes
+BEGIN
+    UPDATE artifact_fts
+    SET title = NEW.title, excerpt = NEW.excerpt, summary = NEW.summary, user_notes = NEW.user_notes
+    WHERE rowid = (SELECT docid FROM artifact_fts_doc WHERE artifact_id = NEW.id);
+END;
+
+CREATE TRIGGER artifact_fts_delete BEFORE DELETE ON artifact
+BEGIN
+    DELETE FROM artifact_fts
+    WHERE rowid = (SELECT docid FROM artifact_fts_doc WHERE artifact_id = OLD.id);
+END;
+
+-- --- Denormalised tag names ---
+
+CREATE TRIGGER artifact_tag_fts_insert AFTER INSERT ON artifact_tag
+BEGIN
+    UPDATE artifact_fts
+    SET tags = (SELECT group_concat(t.name, ' ')
+                  FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+                 WHERE at.artifact_id = NEW.artifact_id)
+    WHERE rowid = (SELECT docid FROM artifact_fts_doc WHERE artifact_id = NEW.artifact_id);
+END;
+
+CREATE TRIGGER artifact_tag_fts_delete AFTER DELETE ON artifact_tag
+BEGIN
+    UPDATE artifact_fts
+    SET tags = (SELECT group_concat(t.name, ' ')
+                  FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+                 WHERE at.artifact_id = OLD.artifact_id)
+    WHERE rowid = (SELECT docid FROM artifact_fts_doc WHERE artifact_id = OLD.artifact_id);
+END;
+
+CREATE TRIGGER tag_fts_rename AFTER UPDATE OF name ON tag
+WHEN OLD.name IS NOT NEW.name
+BEGIN
+    UPDATE artifact_fts
+    SET tags = (SELECT group_concat(t.name, ' ')
+                  FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+                 WHERE at.artifact_id = artifact_fts.artifact_id)
+    WHERE rowid IN (SELECT d.docid
+                      FROM artifact_tag at JOIN artifact_fts_doc d ON d.artifact_id = at.artifact_id
+                     WHERE at.tag_id = NEW.id);
+END;
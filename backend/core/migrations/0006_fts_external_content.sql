@@ -0,0 +1,131 @@
+-- External-content FTS: stop storing a second copy of every article.
+--
+-- artifact_fts becomes an FTS5 external-content table over the
+-- artifact_fts_source view. Metadata columns are read straight from artifact;
+-- the extracted text is kept once, zlib-compressed, in
+-- artifact_fts_doc.full_text_z, next to the denormalised tag names. The index
+-- itself only holds the inverted lists.
+--
+-- External-content tables don't track their content, so the triggers below
+-- remove a row's old tokens with the FTS5 'delete' command (passing the old
+-- values) before inserting the new ones. fts_deflate / fts_inflate are
+-- application-defined functions registered on every connection by core/db.py;
+-- writes to artifact, artifact_tag, tag and artifact_fts_doc need them.
+--
+-- (FTS5 contentless-delete tables would drop the text entirely, but need
+-- SQLite 3.43+ and rule out snippet(), which the search UI uses.)
+
+ALTER TABLE artifact_fts_doc ADD COLUMN tags TEXT;
+ALTER TABLE artifact_fts_doc ADD COLUMN full_text_z BLOB;
+
+UPDATE artifact_fts_doc SET
+    tags        = (SELECT f.tags FROM artifact_fts f WHERE f.rowid = artifact_fts_doc.docid),
+    full_text_z = fts_deflate((SELECT f.full_text FROM artifact_fts f WHERE f.rowid = artifact_fts_doc.docid));
+
+DROP TRIGGER artifact_fts_insert;
+DROP TRIGGER artifact_fts_update;
+DROP TRIGGER artifact_fts_delete;
+DROP TRIGGER artifact_tag_fts_insert;
+DROP TRIGGER artifact_tag_fts_delete;
+DROP TRIGGER tag_fts_rename;
+
+DROP TABLE artifact_fts;
+
+CREATE VIEW artifact_fts_source AS
+    SELECT d.docid, a.id AS artifact_id, a.title, a.excerpt, a.summary, a.user_notes,
+           d.tags, fts_inflate(d.full_text_z) AS full_text
+    FROM artifact_fts_doc d
+    JOIN artifact a ON a.id = d.artifact_id;
+
+CREATE VIRTUAL TABLE artifact_fts USING fts5(
+    artifact_id UNINDEXED,
+    title,
+    excerpt,
+    summary,
+    user_notes,
+    tags,
+    full_text,
+    content = 'artifact_fts_source',
+    content_rowid = 'docid'
+);
+
+INSERT INTO artifact_fts (artifact_fts) VALUES ('rebuild');
+
+-- --- Artifact rows ---
+
+CREATE TRIGGER artifact_fts_insert AFTER INSERT ON artifact
+BEGIN
+    INSERT INTO artifact_fts_doc (artifact_id) VALUES (NEW.id);
+    INSERT INTO artifact_fts (rowid, artifact_id, title, excerpt, summary, user_notes)
+        SELECT docid, NEW.id, NEW.title, NEW.excerpt, NEW.summary, NEW.user_notes
+        FROM artifact_fts_doc WHERE artifact_id = NEW.id;
+END;
+
+CREATE TRIGGER artifact_fts_update AFTER UPDATE OF title, excerpt, summary, user_notes ON artifact
+WHEN OLD.title      IS NOT NEW.title
+  OR OLD.excerpt    IS NOT NEW.excerpt
+  OR OLD.summary    IS NOT NEW.summary
+  OR OLD.user_notes IS NOT NEW.user_notes
+BEGIN
+    INSERT INTO artifact_fts (artifact_fts, rowid, artifact_id, title, excerpt, summary, user_notes, tags, full_text)
+        SELECT 'delete', docid, OLD.id, OLD.title, OLD.excerpt, OLD.summary, OLD.user_notes,
+               tags, fts_inflate(full_text_z)
+        FROM artifact_fts_doc WHERE artifact_id = OLD.id;
+    INSERT INTO artifact_fts (rowid, artifact_id, title, excerpt, summary, user_notes, tags, full_text)
+        SELECT docid, NEW.id, NEW.title, NEW.excerpt, NEW.summary, NEW.user_notes,
+               tags, fts_inflate(full_text_z)
+        FROM artifact_fts_doc WHERE artifact_id = NEW.id;
+END;
+
+CREATE TRIGGER artifact_fts_delete BEFORE DELETE ON artifact
+BEGIN
+    INSERT INTO artifact_fts (artifact_fts, rowid, artifact_id, title, excerpt, summary, user_notes, tags, full_text)
+        SELECT 'delete', docid, OLD.id, OLD.title, OLD.excerpt, OLD.summary, OLD.user_notes,
+               tags, fts_inflate(full_text_z)
+        FROM artifact_fts_doc WHERE artifact_id = OLD.id;
+END;
+
+-- --- Tag names and extracted text (stored on artifact_fts_doc) ---
+
+-- Selecting through artifact makes this a no-op while the artifact itself is
+-- being deleted (its tokens are already gone) and artifact_tag rows cascade.
+CREATE TRIGGER artifact_fts_doc_update AFTER UPDATE OF tags, full_text_z ON artifact_fts_doc
+WHEN OLD.tags IS NOT NEW.tags OR OLD.full_text_z IS NOT NEW.full_text_z
+BEGIN
+    INSERT INTO artifact_fts (artifact_fts, rowid, artifact_id, title, excerpt, summary, user_notes, tags, full_text)
+        SELECT 'delete', OLD.docid, a.id, a.title, a.excerpt, a.summary, a.user_notes,
+               OLD.tags, fts_inflate(OLD.full_text_z)
+        FROM artifact a WHERE a.id = OLD.artifact_id;
+    INSERT INTO artifact_fts (rowid, artifact_id, title, excerpt, summary, user_notes, tags, full_text)
+        SELECT NEW.docid, a.id, a.title, a.excerpt, a.summary, a.user_notes,
+               NEW.tags, fts_inflate(NEW.full_text_z)
+        FROM artifact a WHERE a.id = NEW.artifact_id;
+END;
+
+CREATE TRIGGER artifact_tag_fts_insert AFTER INSERT ON artifact_tag
+BEGIN
+    UPDATE artifact_fts_doc
+    SET tags = (SELECT group_concat(t.name, ' ')
+                  FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+                 WHERE at.artifact_id = NEW.artifact_id)
+    WHERE artifact_id = NEW.artifact_id;
+END;
+
+CREATE TRIGGER artifact_tag_fts_delete AFTER DELETE ON artifact_tag
+BEGIN
+    UPDATE artifact_fts_doc
+    SET tags = (SELECT group_concat(t.name, ' ')
+                  FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+                 WHERE at.artifact_id = OLD.artifact_id)
+    WHERE artifact_id = OLD.artifact_id;
+END;
+
+CREATE TRIGGER tag_fts_rename AFTER UPDATE OF name ON tag
+WHEN OLD.name IS NOT NEW.name
+BEGIN
+    UPDATE artifact_fts_doc
+    SET tags = (SELECT group_concat(t.name, ' ')
+                  FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+                 WHERE at.artifact_id = artifact_fts_doc.artifact_id)
+    WHERE artifact_id IN (SELECT artifact_id FROM artifact_tag WHERE tag_id = NEW.id);
+END;
@@ -0,0 +1,29 @@
+-- Search-as-you-type support for artifact_fts.
+--
+-- prefix='2 3 4' adds prefix indexes so "ab"*, "abc"* and "abcd"* queries read
+-- one index entry instead of scanning every term with that prefix. The
+-- persistent 'rank' setting weights bm25 per column so ORDER BY rank prefers
+-- title and tag matches over matches deep in the article body:
+--     artifact_id, title, excerpt, summary, user_notes, tags, full_text
+--
+-- Only the index is rebuilt; content stays in artifact / artifact_fts_doc and
+-- the triggers from 0006 keep working against the recreated table.
+
+DROP TABLE artifact_fts;
+
+CREATE VIRTUAL TABLE artifact_fts USING fts5(
+    artifact_id UNINDEXED,
+    title,
+    excerpt,
+    summary,
+    user_notes,
+    tags,
+    full_text,
+    content = 'artifact_fts_source',
+    content_rowid = 'docid',
+    prefix = '2 3 4'
+);
+
+INSERT INTO artifact_fts (artifact_fts, rank) VALUES ('rank', 'bm25(0.0, 10.0, 4.0, 3.0, 3.0, 5.0, 1.0)');
+
+INSERT INTO artifact_fts (artifact_fts) VALUES ('rebuild');
@@ -0,0 +1,39 @@
+-- In-process vector index (core/vectors.py).
+--
+-- Vectors live in one float32 file per namespace under data/system/vectors/,
+-- one fixed-size row per slot. These tables map slots to keys and artifacts.
+-- Deleting an artifact cascades to its entries; the trigger returns their
+-- slots to the free list for reuse and bumps the namespace generation so
+-- processes holding an in-memory copy of the mapping reload it. Namespace rows
+-- are never deleted, so generations only ever increase.
+
+CREATE TABLE vector_namespace (
+    name       TEXT PRIMARY KEY,
+    dim        INTEGER,                         -- NULL until the first vector (or after a reset)
+    model      TEXT,
+    generation INTEGER NOT NULL DEFAULT 0       -- bumped on every add / delete
+);
+
+CREATE TABLE vector_entry (
+    namespace   TEXT NOT NULL REFERENCES vector_namespace(name) ON DELETE CASCADE,
+    key         TEXT NOT NULL,                  -- artifact id, or e.g. a chunk id
+    artifact_id TEXT NOT NULL REFERENCES artifact(id) ON DELETE CASCADE,
+    slot        INTEGER NOT NULL,               -- row in the namespace's vector file
+    generation  INTEGER NOT NULL,               -- namespace generation when written
+    PRIMARY KEY (namespace, key),
+    UNIQUE (namespace, slot)
+);
+
+CREATE INDEX idx_vector_entry_artifact ON vector_entry(artifact_id);
+
+CREATE TABLE vector_free_slot (
+    namespace TEXT NOT NULL,
+    slot      INTEGER NOT NULL,
+    PRIMARY KEY (namespace, slot)
+);
+
+CREATE TRIGGER vector_entry_delete AFTER DELETE ON vector_entry
+BEGIN
+    INSERT OR IGNORE INTO vector_free_slot (namespace, slot) VALUES (OLD.namespace, OLD.slot);
+    UPDATE vector_namespace SET generation = generation + 1 WHERE name = OLD.namespace;
+END;
@@ -0,0 +1,13 @@
+-- Passage embeddings cached by content hash and model (core/embeddings.py).
+--
+-- Keyed on the text itself rather than the artifact, so re-captures of the
+-- same page, duplicate passages across artifacts and re-runs after a plugin
+-- version bump never call the provider again.
+
+CREATE TABLE embedding_cache (
+    content_hash TEXT NOT NULL,        -- sha256 of the passage text
+    model        TEXT NOT NULL,        -- provider model id
+    vector       BLOB NOT NULL,        -- float32 array
+    created_at   TEXT NOT NULL,
+    PRIMARY KEY (content_hash, model)
+) WITHOUT ROWID;
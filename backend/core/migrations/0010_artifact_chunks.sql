@@ -0,0 +1,45 @@
+-- Passage-level chunk index (core/chunks.py).
+--
+-- Each artifact's extracted text is split into overlapping passages by the
+-- 'chunk' queue task. start_offset / end_offset are character offsets into
+-- that text (processed/readable.txt for webpages), so a passage can be traced
+-- back to, or expanded within, its source. Passage text is stored compressed,
+-- like artifact_fts_doc.full_text_z, and chunk_fts is an external-content
+-- index over it: BM25 then scores a few hundred words at a time instead of a
+-- whole article. Chunks are replaced wholesale when an artifact is re-chunked
+-- and removed with their artifact by cascade; the triggers keep chunk_fts in
+-- step with both.
+
+CREATE TABLE artifact_chunk (
+    id           INTEGER PRIMARY KEY,
+    artifact_id  TEXT NOT NULL REFERENCES artifact(id) ON DELETE CASCADE,
+    seq          INTEGER NOT NULL,          -- 0-based position within the artifact
+    start_offset INTEGER NOT NULL,
+    end_offset   INTEGER NOT NULL,
+    text_z       BLOB NOT NULL,             -- fts_deflate(passage text)
+    UNIQUE (artifact_id, seq)
+);
+
+CREATE VIEW artifact_chunk_source AS
+    SELECT id, fts_inflate(text_z) AS text FROM artifact_chunk;
+
+CREATE VIRTUAL TABLE chunk_fts USING fts5(
+    text,
+    content = 'artifact_chunk_source',
+    content_rowid = 'id'
+);
+
+CREATE TRIGGER artifact_chunk_fts_insert AFTER INSERT ON artifact_chunk
+BEGIN
+    INSERT INTO chunk_fts (rowid, text) VALUES (NEW.id, fts_inflate(NEW.text_z));
+END;
+
+CREATE TRIGGER artifact_chunk_fts_delete AFTER DELETE ON artifact_chunk
+BEGIN
+    INSERT INTO chunk_fts (chunk_fts, rowid, text) VALUES ('delete', OLD.id, fts_inflate(OLD.text_z));
+END;
+
+-- Chunk every existing artifact. Task ids are normally ULIDs; any unique text works.
+INSERT INTO processing_queue (id, artifact_id, task_type, priority, created_at)
+    SELECT lower(hex(randomblob(16))), id, 'chunk', 7, strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+    FROM artifact;
@@ -0,0 +1,51 @@
+-- Normalised URL index for duplicate detection (core/ingestion.py).
+--
+-- Every artifact is findable under normalise_url() of its source_url and of
+-- the canonical URL its plugin recorded after redirects
+-- (plugin_data.canonical_url). normalise_url is an application-defined
+-- function registered on every connection by core/db.py, so the triggers
+-- cover every path that writes artifact rows. Several artifacts may share a
+-- URL when the duplicate policy is 'snapshot'.
+
+CREATE TABLE artifact_url (
+    url         TEXT NOT NULL,                  -- normalise_url(...)
+    artifact_id TEXT NOT NULL REFERENCES artifact(id) ON DELETE CASCADE,
+    kind        TEXT NOT NULL,                  -- 'source' or 'canonical'
+    PRIMARY KEY (url, artifact_id)
+) WITHOUT ROWID;
+
+CREATE INDEX idx_artifact_url_artifact ON artifact_url(artifact_id);
+
+CREATE TRIGGER artifact_url_insert AFTER INSERT ON artifact
+BEGIN
+    INSERT OR IGNORE INTO artifact_url (url, artifact_id, kind)
+        SELECT url, NEW.id, kind FROM (
+            SELECT normalise_url(NEW.source_url) AS url, 'source' AS kind
+            UNION ALL
+            SELECT normalise_url(NEW.plugin_data ->> '$.canonical_url'), 'canonical'
+            WHERE json_valid(NEW.plugin_data)
+        )
+        WHERE url IS NOT NULL;
+END;
+
+CREATE TRIGGER artifact_url_update AFTER UPDATE OF source_url, plugin_data ON artifact
+BEGIN
+    DELETE FROM artifact_url WHERE artifact_id = OLD.id;
+    INSERT OR IGNORE INTO artifact_url (url, artifact_id, kind)
+        SELECT url, NEW.id, kind FROM (
+            SELECT normalise_url(NEW.source_url) AS url, 'source' AS kind
+            UNION ALL
+            SELECT normalise_url(NEW.plugin_data ->> '$.canonical_url'), 'canonical'
+            WHERE json_valid(NEW.plugin_data)
+        )
+        WHERE url IS NOT NULL;
+END;
+
+INSERT OR IGNORE INTO artifact_url (url, artifact_id, kind)
+    SELECT url, id, kind FROM (
+        SELECT normalise_url(source_url) AS url, id, 'source' AS kind FROM artifact
+        UNION ALL
+        SELECT normalise_url(plugin_data ->> '$.canonical_url'), id, 'canonical' FROM artifact
+        WHERE json_valid(plugin_data)
+    )
+    WHERE url IS NOT NULL;
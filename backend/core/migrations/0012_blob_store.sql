@@ -0,0 +1,43 @@
+-- Content-addressed blob store (core/blobs.py).
+--
+-- blob has one row per distinct file content under data/system/blobs/.
+-- artifact_blob maps each artifact file path (relative to the artifact
+-- directory) to the blob it links to. The triggers keep blob.refcount equal
+-- to the number of artifact_blob rows pointing at it. Deleting an artifact
+-- cascades to its artifact_blob rows, which fires the triggers too. Blobs
+-- that reach zero are removed by core.blobs.collect_garbage().
+
+CREATE TABLE blob (
+    hash       TEXT PRIMARY KEY,                -- sha256 hex of the content
+    size       INTEGER NOT NULL,
+    refcount   INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX idx_blob_unreferenced ON blob(refcount) WHERE refcount <= 0;
+
+CREATE TABLE artifact_blob (
+    artifact_id TEXT NOT NULL REFERENCES artifact(id) ON DELETE CASCADE,
+    path        TEXT NOT NULL,                  -- e.g. 'raw/original.html'
+    hash        TEXT NOT NULL REFERENCES blob(hash),
+    PRIMARY KEY (artifact_id, path)
+) WITHOUT ROWID;
+
+CREATE INDEX idx_artifact_blob_hash ON artifact_blob(hash);
+
+CREATE TRIGGER artifact_blob_ref AFTER INSERT ON artifact_blob
+BEGIN
+    UPDATE blob SET refcount = refcount + 1 WHERE hash = NEW.hash;
+END;
+
+CREATE TRIGGER artifact_blob_unref AFTER DELETE ON artifact_blob
+BEGIN
+    UPDATE blob SET refcount = refcount - 1 WHERE hash = OLD.hash;
+END;
+
+CREATE TRIGGER artifact_blob_rehash AFTER UPDATE OF hash ON artifact_blob
+WHEN OLD.hash IS NOT NEW.hash
+BEGIN
+    UPDATE blob SET refcount = refcount - 1 WHERE hash = OLD.hash;
+    UPDATE blob SET refcount = refcount + 1 WHERE hash = NEW.hash;
+END;
@@ -0,0 +1,52 @@
+-- Incremental exports (core/export.py).
+--
+-- An export since a watermark ships the artifacts whose updated_at is newer,
+-- so changes to an artifact's tags and collections (including renames) bump
+-- updated_at here too. Deleted artifacts leave a tombstone, so a delta
+-- export can tell a restore to remove them.
+
+CREATE TABLE artifact_tombstone (
+    artifact_id TEXT PRIMARY KEY,
+    deleted_at  TEXT NOT NULL
+);
+
+CREATE INDEX idx_artifact_tombstone_deleted ON artifact_tombstone(deleted_at);
+CREATE INDEX idx_artifact_updated ON artifact(updated_at, id);
+
+CREATE TRIGGER artifact_tombstone_insert AFTER DELETE ON artifact
+BEGIN
+    INSERT OR REPLACE INTO artifact_tombstone (artifact_id, deleted_at)
+    VALUES (OLD.id, strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'));
+END;
+
+CREATE TRIGGER artifact_tag_touch_insert AFTER INSERT ON artifact_tag
+BEGIN
+    UPDATE artifact SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.artifact_id;
+END;
+
+CREATE TRIGGER artifact_tag_touch_delete AFTER DELETE ON artifact_tag
+BEGIN
+    UPDATE artifact SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = OLD.artifact_id;
+END;
+
+CREATE TRIGGER tag_touch_update AFTER UPDATE OF name, color ON tag
+BEGIN
+    UPDATE artifact SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+    WHERE id IN (SELECT artifact_id FROM artifact_tag WHERE tag_id = NEW.id);
+END;
+
+CREATE TRIGGER artifact_collection_touch_insert AFTER INSERT ON artifact_collection
+BEGIN
+    UPDATE artifact SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = NEW.artifact_id;
+END;
+
+CREATE TRIGGER artifact_collection_touch_delete AFTER DELETE ON artifact_collection
+BEGIN
+    UPDATE artifact SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now') WHERE id = OLD.artifact_id;
+END;
+
+CREATE TRIGGER collection_touch_update AFTER UPDATE OF name, description ON collection
+BEGIN
+    UPDATE artifact SET updated_at = strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+    WHERE id IN (SELECT artifact_id FROM artifact_collection WHERE collection_id = NEW.id);
+END;
@@ -0,0 +1,21 @@
+-- Index tags already linked when an artifact row is inserted.
+--
+-- Bulk imports (core/importers.py) insert artifact_tag rows ahead of their
+-- artifacts, with foreign key checks deferred to commit. The per-tag
+-- triggers then find no artifact_fts_doc row and do nothing, and the
+-- artifact is indexed once with all its tags instead of re-indexed per tag.
+-- Other paths insert the artifact first, so the lookup finds no tags and the
+-- result is the same as before.
+
+DROP TRIGGER artifact_fts_insert;
+
+CREATE TRIGGER artifact_fts_insert AFTER INSERT ON artifact
+BEGIN
+    INSERT INTO artifact_fts_doc (artifact_id, tags)
+        SELECT NEW.id, group_concat(t.name, ' ')
+        FROM artifact_tag at JOIN tag t ON t.id = at.tag_id
+        WHERE at.artifact_id = NEW.id;
+    INSERT INTO artifact_fts (rowid, artifact_id, title, excerpt, summary, user_notes, tags)
+        SELECT docid, NEW.id, NEW.title, NEW.excerpt, NEW.summary, NEW.user_notes, tags
+        FROM artifact_fts_doc WHERE artifact_id = NEW.id;
+END;
@@ -0,0 +1,46 @@
+-- Write generation of user settings and plugin config.
+--
+-- core/config.py caches each merged (user, plugin) config in process and
+-- reads this one row on every lookup; the cache is dropped when it changes.
+-- The triggers bump it on any write to user.settings or
+-- plugin_registry.config, from any process or connection. The plugin
+-- loader's startup upsert touches neither column, so it doesn't invalidate.
+
+CREATE TABLE config_generation (
+    id         INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL
+);
+
+INSERT INTO config_generation (id, generation) VALUES (1, 0);
+
+CREATE TRIGGER user_settings_insert AFTER INSERT ON user
+BEGIN
+    UPDATE config_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER user_settings_update AFTER UPDATE OF settings ON user
+WHEN OLD.settings IS NOT NEW.settings
+BEGIN
+    UPDATE config_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER user_settings_delete AFTER DELETE ON user
+BEGIN
+    UPDATE config_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER plugin_config_insert AFTER INSERT ON plugin_registry
+BEGIN
+    UPDATE config_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER plugin_config_update AFTER UPDATE OF config ON plugin_registry
+WHEN OLD.config IS NOT NEW.config
+BEGIN
+    UPDATE config_generation SET generation = generation + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER plugin_config_delete AFTER DELETE ON plugin_registry
+BEGIN
+    UPDATE config_generation SET generation = generation + 1 WHERE id = 1;
+END;
@@ -0,0 +1,22 @@
+-- Vector slots are only ever written fresh (core/vectors.py).
+--
+-- A replaced key now moves to a new slot instead of being overwritten in
+-- place, so a rolled-back write never touches a vector a committed row
+-- points to. Freed slots record the namespace generation they were freed
+-- at: add() skips slots freed by itself, and readers apply just the
+-- entries and freed slots newer than their in-memory snapshot instead of
+-- reloading the whole mapping.
+
+ALTER TABLE vector_free_slot ADD COLUMN freed_generation INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX idx_vector_entry_generation ON vector_entry(namespace, generation);
+CREATE INDEX idx_vector_free_slot_generation ON vector_free_slot(namespace, freed_generation);
+
+DROP TRIGGER vector_entry_delete;
+
+CREATE TRIGGER vector_entry_delete AFTER DELETE ON vector_entry
+BEGIN
+    UPDATE vector_namespace SET generation = generation + 1 WHERE name = OLD.namespace;
+    INSERT OR REPLACE INTO vector_free_slot (namespace, slot, freed_generation)
+        SELECT OLD.namespace, OLD.slot, generation FROM vector_namespace WHERE name = OLD.namespace;
+END;
@@ -0,0 +1,59 @@
+-- Trigger timestamps in the app's format.
+--
+-- The 0013 triggers wrote strftime('%Y-%m-%dT%H:%M:%f+00:00') — milliseconds —
+-- while the app and the export watermark use Python's isoformat()
+-- (microseconds), and export deltas compare the two as strings. The
+-- triggers now call now_iso(), registered on every connection by
+-- core/db.py, and existing millisecond values are padded to microseconds.
+
+DROP TRIGGER artifact_tombstone_insert;
+DROP TRIGGER artifact_tag_touch_insert;
+DROP TRIGGER artifact_tag_touch_delete;
+DROP TRIGGER tag_touch_update;
+DROP TRIGGER artifact_collection_touch_insert;
+DROP TRIGGER artifact_collection_touch_delete;
+DROP TRIGGER collection_touch_update;
+
+UPDATE artifact SET updated_at = substr(updated_at, 1, 23) || '000' || substr(updated_at, 24)
+WHERE updated_at GLOB '????-??-??T??:??:??.???+00:00';
+
+UPDATE artifact_tombstone SET deleted_at = substr(deleted_at, 1, 23) || '000' || substr(deleted_at, 24)
+WHERE deleted_at GLOB '????-??-??T??:??:??.???+00:00';
+
+CREATE TRIGGER artifact_tombstone_insert AFTER DELETE ON artifact
+BEGIN
+    INSERT OR REPLACE INTO artifact_tombstone (artifact_id, deleted_at)
+    VALUES (OLD.id, now_iso());
+END;
+
+CREATE TRIGGER artifact_tag_touch_insert AFTER INSERT ON artifact_tag
+BEGIN
+    UPDATE artifact SET updated_at = now_iso() WHERE id = NEW.artifact_id;
+END;
+
+CREATE TRIGGER artifact_tag_touch_delete AFTER DELETE ON artifact_tag
+BEGIN
+    UPDATE artifact SET updated_at = now_iso() WHERE id = OLD.artifact_id;
+END;
+
+CREATE TRIGGER tag_touch_update AFTER UPDATE OF name, color ON tag
+BEGIN
+    UPDATE artifact SET updated_at = now_iso()
+    WHERE id IN (SELECT artifact_id FROM artifact_tag WHERE tag_id = NEW.id);
+END;
+
+CREATE TRIGGER artifact_collection_touch_insert AFTER INSERT ON artifact_collection
+BEGIN
+    UPDATE artifact SET updated_at = now_iso() WHERE id = NEW.artifact_id;
+END;
+
+CREATE TRIGGER artifact_collection_touch_delete AFTER DELETE ON artifact_collection
+BEGIN
+    UPDATE artifact SET updated_at = now_iso() WHERE id = OLD.artifact_id;
+END;
+
+CREATE TRIGGER collection_touch_update AFTER UPDATE OF name, description ON collection
+BEGIN
+    UPDATE artifact SET updated_at = now_iso()
+    WHERE id IN (SELECT artifact_id FROM artifact_collection WHERE collection_id = NEW.id);
+END;
@@ -0,0 +1,55 @@
+"""
+Opaque keyset (cursor) pagination.
+
+A cursor encodes the sort key values of the last row on a page plus the sort
+it belongs to. The next page starts strictly after that row:
+
+    WHERE (sort columns..., id) < (cursor values...)   -- descending sorts
+    WHERE (sort columns..., id) > (cursor values...)   -- ascending sorts
+
+Every ordering ends with the ULID id, so rows never tie and pages never skip
+or repeat rows, and the query runs as an index range scan instead of
+counting past OFFSET rows.
+"""
+import base64
+import json
+from typing import Any, Optional
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor is malformed or belongs to a different sort."""
+
+
+def encode_cursor(sort: str, values: list[Any]) -> str:
+    raw = json.dumps([sort, *values], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, key_count: int) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(decoded, list) or len(decoded) != key_count + 1 or decoded[0] != sort:
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return decoded[1:]
+
+
+def keyset_clause(columns: tuple[str, ...], direction: str) -> str:
+    """Row-value comparison selecting rows after the cursor for the given direction."""
+    op = "<" if direction == "DESC" else ">"
+    placeholders = ", ".join("?" * len(columns))
+    return f"({', '.join(columns)}) {op} ({placeholders})"
+
+
+def order_clause(columns: tuple[str, ...], direction: str) -> str:
+    return ", ".join(f"{column} {direction}" for column in columns)
+
+
+def next_cursor(sort: str, rows: list, keys: tuple[str, ...], limit: int) -> Optional[str]:
+    """Cursor for the page after rows, or None when this page was the last."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(sort, [last[key] for key in keys])
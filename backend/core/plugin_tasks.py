@@ -0,0 +1,80 @@
+"""
+Processing queue tasks run by content plugins: deferred pipeline stages.
+
+Ingest is kept to the critical path — capture, readable text, the artifact
+row and its FTS entry — so the card appears as soon as that is stored.
+Derivatives that take longer (screenshots, markdown) are stages: a content
+plugin declares them in ContentPlugin.task_stages and queues them from ingest
+(ArtifactData.queue_tasks). Each stage has its own priority and concurrency
+(TaskStage). register_plugin_tasks() registers one handler per stage; the
+handler calls the owning plugin's run_task() and moves the files it returns
+into the artifact directory through the blob store, like ingest_url does,
+bumping updated_at so clients polling the artifact pick the derivative up.
+"""
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from core.blobs import add_references
+from core.ingestion import plugin_config, store_artifact_files
+from core.plugins.base import IngestionError
+from core.plugins.loader import PluginLoader
+from core.queue import Task, TaskContext, enqueue, register_handler
+
+
+def _artifact_dict(row: sqlite3.Row) -> dict:
+    artifact = dict(row)
+    artifact["plugin_data"] = json.loads(row["plugin_data"]) if row["plugin_data"] else {}
+    return artifact
+
+
+def handle_plugin_task(ctx: TaskContext, tasks: list[Task]) -> Optional[dict[str, str]]:
+    failures: dict[str, str] = {}
+    temp_dir = ctx.data_path / "system" / "temp" / "tasks"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+
+    for task in tasks:
+        row = ctx.conn.execute("SELECT * FROM artifact WHERE id = ?", (task.artifact_id,)).fetchone()
+        if row is None:
+            continue        # deleted since it was queued
+        plugin = ctx.loader.get_content_plugin(row["plugin_type"])
+        if plugin is None or task.task_type not in plugin.task_stages:
+            failures[task.id] = f"Plugin '{row['plugin_type']}' does not run '{task.task_type}' tasks"
+            continue
+
+        try:
+            files = plugin.run_task(
+                task.task_type, _artifact_dict(row), temp_dir, plugin_config(ctx.conn, plugin.plugin_id)
+            )
+        except IngestionError as exc:
+            failures[task.id] = str(exc)
+            continue
+
+        if not files:
+            continue
+        stored_files, thumbnail_path = store_artifact_files(Path(row["content_path"]), files)
+        add_references(ctx.conn, row["id"], stored_files)
+        ctx.conn.execute(
+            "UPDATE artifact SET thumbnail_path = coalesce(?, thumbnail_path), updated_at = ? WHERE id = ?",
+            (thumbnail_path, datetime.now(timezone.utc).isoformat(), row["id"]),
+        )
+        if thumbnail_path:
+            enqueue(ctx.conn, row["id"], "thumbnail", priority=2)     # WebP derivatives, core/thumbnails.py
+        ctx.conn.commit()
+
+    return failures or None
+
+
+def register_plugin_tasks(loader: PluginLoader) -> None:
+    """Register the queue handler for every stage a loaded content plugin declares."""
+    for plugin in loader.all_content_plugins().values():
+        for task_type, stage in plugin.task_stages.items():
+            register_handler(
+                task_type,
+                handle_plugin_task,
+                batch_size=1,
+                concurrency=stage.concurrency,
+                lease_seconds=stage.lease_seconds,
+            )
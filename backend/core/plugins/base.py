@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterator, Optional
 
 
 class IngestionError(Exception):
@@ -31,13 +32,35 @@ class ArtifactData:
 
     suggested_tags: list[str] = field(default_factory=list)
     queue_tasks: list[str] = field(default_factory=list)
-    # task_type values to queue after core persistence: 'summarize', 'embed'
+    # task_type values to queue after core persistence: 'summarize', 'embed',
+    # or one of the plugin's own task_stages (e.g. a deferred 'screenshot')
+
+    # URL this artifact is recorded under. Required from ingest_many, where one
+    # source (an export file) produces many artifacts; ingest() uses its source URL
+    source_url: Optional[str] = None
+
+
+@dataclass
+class TaskStage:
+    """
+    Scheduling for one of a plugin's deferred processing stages.
+
+    priority — processing_queue priority it is queued at (lower runs first)
+    concurrency — max tasks of this stage running at once per worker process
+    lease_seconds — how long one task may run before another worker reclaims it
+    """
+    priority: int = 5
+    concurrency: int = 1
+    lease_seconds: int = 600
 
 
 class ContentPlugin(ABC):
     plugin_id: str
     plugin_version: str
     url_patterns: list[str]
+    # processing_queue task types this plugin runs via run_task(), e.g. derivatives
+    # deferred from ingest so the artifact appears as soon as its text is stored
+    task_stages: dict[str, TaskStage] = {}
 
     @abstractmethod
     def ingest(self, source: str, artifact_id: str, temp_dir: Path, config: dict) -> ArtifactData:
@@ -52,6 +75,22 @@ class ContentPlugin(ABC):
         Raise IngestionError(message) on failure.
         """
 
+    def ingest_many(self, source: Path, temp_dir: Path, config: dict) -> Iterator[ArtifactData]:
+        """
+        Optional: import a file that holds many artifacts (e.g. a platform's
+        export). A generator — parse source incrementally and yield each
+        artifact as soon as it is complete, so memory doesn't grow with the
+        file. Core persists each one as it arrives, committing in batches.
+
+        Each ArtifactData sets source_url, which duplicates are matched on.
+        Write working files to temp_dir under names unique to the artifact
+        (e.g. '{uuid}_{role}.ext'); core moves them like ingest()'s.
+
+        Raise IngestionError(message) if source can't be read; artifacts
+        already yielded are kept.
+        """
+        raise IngestionError(f"{self.plugin_id} does not import export files")
+
     def can_handle(self, url: str) -> bool:
         """
         Optional runtime routing override for edge cases not covered by
@@ -60,6 +99,31 @@ class ContentPlugin(ABC):
         """
         return False
 
+    def startup(self) -> None:
+        """
+        Optional hook called once when the application starts. Plugins that
+        keep long-lived resources (browser pools, model handles) warm them here.
+        """
+
+    def shutdown(self) -> None:
+        """Optional hook called once on application shutdown. Release resources here."""
+
+    def run_task(self, task_type: str, artifact: dict, temp_dir: Path, config: dict) -> dict[str, str]:
+        """
+        Optional: run a queued task of one of this plugin's task_stages for one
+        of its artifacts — work deferred from ingest, such as screenshots.
+        Blocking; runs on a queue worker thread.
+
+        artifact has the artifact row's columns, with plugin_data decoded.
+        Return new or replaced files as role → temp path, like
+        ArtifactData.files; core moves them into the artifact directory.
+        Return {} if there is nothing to store (e.g. an optional dependency
+        is missing).
+
+        Raise IngestionError(message) on failure; the task is retried.
+        """
+        raise IngestionError(f"{self.plugin_id} does not run '{task_type}' tasks")
+
     @abstractmethod
     def get_fts_text(self, artifact: dict) -> str:
         """Return the text to index for full-text search."""
@@ -66,6 +66,22 @@ class PluginLoader:
                 self._content_plugins[plugin_id] = instance
                 print(f"  loaded content plugin: {plugin_id} v{manifest['version']}")
 
+    # --- Lifecycle ---
+
+    def startup_all(self) -> None:
+        for plugin_id, plugin in self._content_plugins.items():
+            try:
+                plugin.startup()
+            except Exception as exc:
+                print(f"  warning: startup failed for plugin {plugin_id}: {exc}")
+
+    def shutdown_all(self) -> None:
+        for plugin_id, plugin in self._content_plugins.items():
+            try:
+                plugin.shutdown()
+            except Exception as exc:
+                print(f"  warning: shutdown failed for plugin {plugin_id}: {exc}")
+
     # --- Accessors ---
 
     def get_content_plugin(self, plugin_id: str) -> Optional[ContentPlugin]:
@@ -1,10 +1,38 @@
+"""
+URL → content plugin routing.
+
+Patterns from each plugin's manifest (url_patterns) are fnmatch globs over
+the URL with scheme and leading www. stripped: 'reddit.com/r/*',
+'*.youtube.com/watch*', '*'. The most specific pattern that matches wins;
+plugins' can_handle() is the fallback when none does.
+
+Patterns are compiled once, when the router is built. One whose host part
+(before the first '/') is literal can only match URLs with exactly that
+host, so it goes in a bucket keyed by host with its path glob compiled to a
+regex. The others, with a wildcard host, are checked for every URL — first
+for their longest literal run ('.pdf' in '*.pdf'), a substring test that
+rules most of them out before their regex runs. Routing
+a URL therefore tries its host's bucket and the wildcard patterns, not every
+pattern of every plugin, in the same specificity order as a linear scan.
+Recent decisions, can_handle() fallbacks included, are kept per URL in an
+LRU (ROUTER_CACHE_SIZE).
+"""
 import fnmatch
-from typing import Optional
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
 from urllib.parse import urlparse
 
 from .base import ContentPlugin
 from .loader import PluginLoader
 
+_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "4096"))
+
+_GLOB_CHARS = frozenset("*?[")
+
 
 def _pattern_specificity(pattern: str) -> int:
     """
@@ -15,27 +43,91 @@ def _pattern_specificity(pattern: str) -> int:
     return len(pattern) - pattern.count("*")
 
 
+@dataclass(frozen=True)
+class _Route:
+    rank: int                               # position in specificity order
+    plugin_id: str
+    match: Callable[[str], Optional[re.Match]]
+    literal: str = ""                       # text any match must contain; checked before the regex
+
+
+def _required_literal(pattern: str) -> str:
+    """Longest run of literal characters in pattern ('' if it has a [...] set, to keep this simple)."""
+    if "[" in pattern:
+        return ""
+    return max(re.split(r"[*?]", pattern), key=len)
+
+
 class ContentRouter:
-    def __init__(self, loader: PluginLoader):
+    def __init__(self, loader: PluginLoader, cache_size: int = _CACHE_SIZE):
         self._loader = loader
-        # Build sorted route list: most specific patterns checked first
+        # Sorted route list: most specific patterns first (stable, so ties keep load order)
         routes: list[tuple[str, str]] = []
         for plugin_id, _ in loader.all_content_plugins().items():
             manifest = loader.manifest(plugin_id) or {}
             for pattern in manifest.get("url_patterns", []):
                 routes.append((pattern, plugin_id))
-        self._routes = sorted(routes, key=lambda r: _pattern_specificity(r[0]), reverse=True)
+        routes.sort(key=lambda r: _pattern_specificity(r[0]), reverse=True)
+        self._route_count = len(routes)
+
+        # Literal host → its routes, matched against the rest of the URL; both lists in rank order
+        self._by_host: dict[str, list[_Route]] = {}
+        self._wildcard_host: list[_Route] = []
+        for rank, (pattern, plugin_id) in enumerate(routes):
+            host, slash, path = pattern.partition("/")
+            if _GLOB_CHARS.isdisjoint(host):
+                regex = re.compile(fnmatch.translate(slash + path))
+                self._by_host.setdefault(host, []).append(_Route(rank, plugin_id, regex.match))
+            else:
+                regex = re.compile(fnmatch.translate(pattern))
+                self._wildcard_host.append(_Route(rank, plugin_id, regex.match, _required_literal(pattern)))
+
+        self._cache_size = max(0, cache_size)
+        self._cache: OrderedDict[str, Optional[str]] = OrderedDict()
+        self._lock = threading.Lock()
 
     def route(self, url: str) -> Optional[ContentPlugin]:
         """Return the content plugin that should handle this URL, or None."""
+        with self._lock:
+            if url in self._cache:
+                self._cache.move_to_end(url)
+                plugin_id = self._cache[url]
+                return self._loader.get_content_plugin(plugin_id) if plugin_id else None
+
+        plugin = self._route(url)
+        if self._cache_size:
+            with self._lock:
+                self._cache[url] = plugin.plugin_id if plugin else None
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return plugin
+
+    def _route(self, url: str) -> Optional[ContentPlugin]:
         normalized = self._normalize(url)
+        # A literal host pattern matches only where the URL's text before the first '/' equals it
+        host, slash, path = normalized.partition("/")
+        path = slash + path
 
-        # 1. Static pattern matching (most specific first)
-        for pattern, plugin_id in self._routes:
-            if fnmatch.fnmatch(normalized, pattern):
-                plugin = self._loader.get_content_plugin(plugin_id)
-                if plugin:
-                    return plugin
+        # 1. Static pattern matching (most specific first): the first match in
+        #    the host's bucket, unless a higher-ranked wildcard-host route matches
+        best: Optional[ContentPlugin] = None
+        best_rank = self._route_count
+        for route in self._by_host.get(host, ()):
+            if route.match(path) and (plugin := self._loader.get_content_plugin(route.plugin_id)):
+                best, best_rank = plugin, route.rank
+                break
+        for route in self._wildcard_host:
+            if route.rank > best_rank:
+                break
+            if (
+                route.literal in normalized
+                and route.match(normalized)
+                and (plugin := self._loader.get_content_plugin(route.plugin_id))
+            ):
+                best = plugin
+                break
+        if best is not None:
+            return best
 
         # 2. Fallback: ask each plugin's optional can_handle()
         for plugin in self._loader.all_content_plugins().values():
@@ -0,0 +1,422 @@
+"""
+Processing queue worker engine.
+
+Consumes processing_queue rows queued after ingestion (summarize, embed, ...).
+Tasks are claimed atomically with a lease: a claimed task is 'running' until
+its lease expires, after which another worker may reclaim it. Claims honour
+priority (lower number first, then oldest) and hand each handler a batch of
+tasks of the same task_type. Failures are retried with exponential backoff
+until QUEUE_MAX_ATTEMPTS is reached, then marked 'failed'.
+
+Handlers register per task_type with register_handler(). Task types without
+a registered handler are left pending. The worker runs inside the API process
+(QUEUE_WORKER_IN_PROCESS) or standalone via `python -m core.worker`.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from ulid import ULID
+
+from core.db import get_connection, get_data_path
+from core.plugins.loader import PluginLoader
+
+_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+_RETRY_BACKOFF = float(os.getenv("QUEUE_RETRY_BACKOFF", "30"))
+
+
+@dataclass
+class Task:
+    id: str
+    artifact_id: str
+    task_type: str
+    priority: int
+    attempts: int           # including the current attempt
+
+
+@dataclass
+class TaskContext:
+    conn: sqlite3.Connection
+    loader: PluginLoader
+    data_path: Path
+
+
+# Returns None if every task succeeded, or {task_id: error} for the ones that failed.
+# Raising fails the whole batch with the exception message.
+TaskHandler = Callable[[TaskContext, list[Task]], Optional[dict[str, str]]]
+
+
+@dataclass
+class _Registration:
+    handler: TaskHandler
+    batch_size: int
+    concurrency: int
+    lease_seconds: int
+
+
+_HANDLERS: dict[str, _Registration] = {}
+
+
+def register_handler(
+    task_type: str,
+    handler: TaskHandler,
+    batch_size: int = 1,
+    concurrency: int = 1,
+    lease_seconds: int = 300,
+) -> None:
+    """
+    Register the handler for a task_type.
+
+    batch_size — max tasks handed to one handler call
+    concurrency — max handler calls for this type running at once per worker process
+    lease_seconds — how long a claim is held before another worker may reclaim it
+    """
+    _HANDLERS[task_type] = _Registration(handler, max(1, batch_size), max(1, concurrency), lease_seconds)
+
+
+def registered_task_types() -> list[str]:
+    return list(_HANDLERS)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# Queue operations
+# ---------------------------------------------------------------------------
+
+def enqueue(
+    conn: sqlite3.Connection,
+    artifact_id: str,
+    task_type: str,
+    priority: int = 5,
+) -> str:
+    """Queue a task. Does not commit — callers batch this with their own writes."""
+    task_id = str(ULID())
+    conn.execute(
+        """
+        INSERT INTO processing_queue (id, artifact_id, task_type, priority, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (task_id, artifact_id, task_type, priority, _iso(_now())),
+    )
+    return task_id
+
+
+def enqueue_many(
+    conn: sqlite3.Connection,
+    artifact_ids: list[str],
+    task_type: str,
+    priority: int = 5,
+) -> None:
+    """Queue one task_type task per artifact in a single statement. Does not commit."""
+    now = _iso(_now())
+    conn.executemany(
+        """
+        INSERT INTO processing_queue (id, artifact_id, task_type, priority, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(str(ULID()), artifact_id, task_type, priority, now) for artifact_id in artifact_ids],
+    )
+
+
+_CLAIMABLE = """
+    (
+        (status = 'pending' AND (run_after IS NULL OR run_after <= :now))
+        OR (status = 'running' AND lease_expires_at < :now AND attempts < :max_attempts)
+    )
+"""
+
+
+def claim_tasks(
+    conn: sqlite3.Connection,
+    worker_id: str,
+    task_types: list[str],
+    batch_sizes: dict[str, int],
+    lease_seconds: dict[str, int],
+) -> list[Task]:
+    """
+    Atomically claim the highest-priority batch among task_types.
+
+    The first claimable task (by priority, then age) decides the task_type;
+    up to batch_sizes[task_type] tasks of that type are leased together.
+    """
+    if not task_types:
+        return []
+
+    now = _now()
+    params = {"now": _iso(now), "max_attempts": _MAX_ATTEMPTS}
+    type_params = {f"t{i}": t for i, t in enumerate(task_types)}
+    type_sql = ", ".join(f":{name}" for name in type_params)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Running tasks whose lease expired on their final attempt are dead — fail them
+        conn.execute(
+            """
+            UPDATE processing_queue
+            SET status = 'failed', error = COALESCE(error, 'Lease expired'),
+                leased_by = NULL, lease_expires_at = NULL
+            WHERE status = 'running' AND lease_expires_at < :now AND attempts >= :max_attempts
+            """,
+            params,
+        )
+
+        head = conn.execute(
+            f"""
+            SELECT task_type FROM processing_queue
+            WHERE task_type IN ({type_sql}) AND {_CLAIMABLE}
+            ORDER BY priority ASC, created_at ASC
+            LIMIT 1
+            """,
+            {**params, **type_params},
+        ).fetchone()
+        if head is None:
+            conn.commit()
+            return []
+
+        task_type = head["task_type"]
+        rows = conn.execute(
+            f"""
+            UPDATE processing_queue
+            SET status = 'running', leased_by = :worker, lease_expires_at = :expires,
+                attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM processing_queue
+                WHERE task_type = :task_type AND {_CLAIMABLE}
+                ORDER BY priority ASC, created_at ASC
+                LIMIT :limit
+            )
+            RETURNING id, artifact_id, task_type, priority, attempts
+            """,
+            {
+                **params,
+                "worker": worker_id,
+                "expires": _iso(now + timedelta(seconds=lease_seconds[task_type])),
+                "task_type": task_type,
+                "limit": batch_sizes[task_type],
+            },
+        ).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    tasks = [Task(r["id"], r["artifact_id"], r["task_type"], r["priority"], r["attempts"]) for r in rows]
+    tasks.sort(key=lambda t: (t.priority, t.id))
+    return tasks
+
+
+def complete_task(conn: sqlite3.Connection, task: Task, worker_id: str) -> None:
+    conn.execute(
+        """
+        UPDATE processing_queue
+        SET status = 'done', completed_at = ?, error = NULL,
+            leased_by = NULL, lease_expires_at = NULL
+        WHERE id = ? AND leased_by = ?
+        """,
+        (_iso(_now()), task.id, worker_id),
+    )
+
+
+def fail_task(conn: sqlite3.Connection, task: Task, worker_id: str, error: str) -> None:
+    """Schedule a retry with exponential backoff, or mark failed after the last attempt."""
+    if task.attempts >= _MAX_ATTEMPTS:
+        conn.execute(
+            """
+            UPDATE processing_queue
+            SET status = 'failed', error = ?, completed_at = ?,
+                leased_by = NULL, lease_expires_at = NULL
+            WHERE id = ? AND leased_by = ?
+            """,
+            (error, _iso(_now()), task.id, worker_id),
+        )
+    else:
+        retry_at = _now() + timedelta(seconds=_RETRY_BACKOFF * 2 ** (task.attempts - 1))
+        conn.execute(
+            """
+            UPDATE processing_queue
+            SET status = 'pending', error = ?, run_after = ?,
+                leased_by = NULL, lease_expires_at = NULL
+            WHERE id = ? AND leased_by = ?
+            """,
+            (error, _iso(retry_at), task.id, worker_id),
+        )
+
+
+def renew_leases(conn: sqlite3.Connection, task_ids: list[str], worker_id: str, lease_seconds: int) -> None:
+    """Extend the lease on tasks worker_id still holds. Does not commit."""
+    placeholders = ",".join("?" * len(task_ids))
+    conn.execute(
+        f"""
+        UPDATE processing_queue SET lease_expires_at = ?
+        WHERE id IN ({placeholders}) AND leased_by = ? AND status = 'running'
+        """,
+        (_iso(_now() + timedelta(seconds=lease_seconds)), *task_ids, worker_id),
+    )
+
+
+def queue_stats(conn: sqlite3.Connection) -> list[dict]:
+    rows = conn.execute(
+        """
+        SELECT task_type, status, COUNT(*) AS count
+        FROM processing_queue
+        GROUP BY task_type, status
+        ORDER BY task_type, status
+        """
+    ).fetchall()
+    return [{"task_type": r["task_type"], "status": r["status"], "count": r["count"]} for r in rows]
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+class QueueWorker:
+    """
+    Thread pool that claims and runs queued tasks until stopped.
+
+    Each thread owns its own SQLite connection and worker id. Claims are
+    serialised within the process so per-type concurrency limits hold; across
+    processes the lease is what prevents double-processing. A renewer thread
+    extends the leases of running batches every third of their lease, so a
+    long handler keeps its tasks.
+    """
+
+    def __init__(self, loader: PluginLoader, threads: Optional[int] = None, poll_interval: Optional[float] = None):
+        self._loader = loader
+        self._threads_count = threads or int(os.getenv("QUEUE_WORKER_THREADS", "2"))
+        self._poll_interval = poll_interval or float(os.getenv("QUEUE_POLL_INTERVAL", "1"))
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._running: dict[str, int] = {}
+        # worker id → (task ids, lease seconds, next renewal on time.monotonic()) of its running batch
+        self._leases: dict[str, tuple[list[str], int, float]] = {}
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self._threads_count):
+            thread = threading.Thread(
+                target=self._loop, args=(f"{self._worker_id}:{i}",), name=f"queue-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        renewer = threading.Thread(target=self._renew_loop, name="queue-lease-renewer", daemon=True)
+        renewer.start()
+        self._threads.append(renewer)
+        print(f"  queue worker started: {self._threads_count} threads, handlers: {registered_task_types()}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=30)
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wake idle threads early, e.g. right after new tasks were queued."""
+        self._wake.set()
+
+    def _loop(self, worker_id: str) -> None:
+        conn = get_connection()
+        ctx = TaskContext(conn=conn, loader=self._loader, data_path=get_data_path())
+        try:
+            while not self._stop.is_set():
+                try:
+                    tasks = self._claim(conn, worker_id)
+                except sqlite3.OperationalError as exc:
+                    # Typically 'database is locked' under heavy write load — back off and retry
+                    print(f"  warning: queue claim failed: {exc}")
+                    tasks = []
+                if not tasks:
+                    self._wake.wait(self._poll_interval)
+                    self._wake.clear()
+                    continue
+                try:
+                    self._run(ctx, tasks, worker_id)
+                except Exception as exc:
+                    # Recording the outcome failed; the tasks are reclaimed once their lease expires
+                    if conn.in_transaction:
+                        conn.rollback()
+                    print(f"  warning: queue could not record {len(tasks)} {tasks[0].task_type} tasks: {exc}")
+                    self._stop.wait(self._poll_interval)
+                finally:
+                    with self._lock:
+                        self._running[tasks[0].task_type] -= 1
+                        self._leases.pop(worker_id, None)
+        finally:
+            conn.close()
+
+    def _renew_loop(self) -> None:
+        conn = get_connection()
+        try:
+            while not self._stop.wait(1):
+                now = time.monotonic()
+                with self._lock:
+                    due = [(worker_id, lease) for worker_id, lease in self._leases.items() if lease[2] <= now]
+                for worker_id, (task_ids, lease_seconds, _) in due:
+                    try:
+                        renew_leases(conn, task_ids, worker_id, lease_seconds)
+                        conn.commit()
+                    except sqlite3.OperationalError as exc:
+                        conn.rollback()
+                        print(f"  warning: queue lease renewal failed: {exc}")
+                        continue
+                    with self._lock:
+                        # Unless the batch finished meanwhile (and maybe another was claimed)
+                        if worker_id in self._leases and self._leases[worker_id][0] is task_ids:
+                            self._leases[worker_id] = (task_ids, lease_seconds, now + lease_seconds / 3)
+        finally:
+            conn.close()
+
+    def _claim(self, conn: sqlite3.Connection, worker_id: str) -> list[Task]:
+        with self._lock:
+            available = [
+                task_type for task_type, reg in _HANDLERS.items()
+                if self._running.get(task_type, 0) < reg.concurrency
+            ]
+            tasks = claim_tasks(
+                conn,
+                worker_id,
+                available,
+                batch_sizes={t: _HANDLERS[t].batch_size for t in available},
+                lease_seconds={t: _HANDLERS[t].lease_seconds for t in available},
+            )
+            if tasks:
+                self._running[tasks[0].task_type] = self._running.get(tasks[0].task_type, 0) + 1
+                lease_seconds = _HANDLERS[tasks[0].task_type].lease_seconds
+                self._leases[worker_id] = (
+                    [task.id for task in tasks], lease_seconds, time.monotonic() + lease_seconds / 3
+                )
+            return tasks
+
+    def _run(self, ctx: TaskContext, tasks: list[Task], worker_id: str) -> None:
+        handler = _HANDLERS[tasks[0].task_type].handler
+        try:
+            failures = handler(ctx, tasks) or {}
+        except Exception as exc:
+            ctx.conn.rollback()
+            failures = {task.id: f"{type(exc).__name__}: {exc}" for task in tasks}
+
+        for task in tasks:
+            if task.id in failures:
+                fail_task(ctx.conn, task, worker_id, failures[task.id])
+            else:
+                complete_task(ctx.conn, task, worker_id)
+        ctx.conn.commit()
@@ -0,0 +1,212 @@
+"""
+Artifact file serving: path resolution cache, HTTP validators and
+precompressed text.
+
+An artifact's content_path never changes, so artifact_id → directory is kept
+in an in-memory LRU (ARTIFACT_PATH_CACHE_SIZE) and file requests normally
+don't touch the database. Deleting an artifact evicts it.
+
+Artifact files are hard links into the blob store and are replaced, never
+modified (core/blobs.py), so a file's inode, size and mtime identify its
+content: that is the strong ETag. Files under raw/ are never replaced once
+captured and are cached as immutable; the rest (thumbnails, derivatives
+that a later stage may regenerate) for ARTIFACT_FILE_MAX_AGE seconds, then
+revalidated with If-None-Match. Range requests are handled by FileResponse.
+
+Text files are served gzip- or brotli-encoded when the client accepts it.
+The encoded copy is made on first request and kept under
+data/system/cache/encoded/, keyed by the source file's ETag, so a replaced
+file never serves a stale encoding. The directory can be deleted at any time;
+`python -m core.blobs gc` removes the copies no current file needs.
+"""
+import gzip
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from core.db import get_data_path
+
+_PATH_CACHE_SIZE = int(os.getenv("ARTIFACT_PATH_CACHE_SIZE", "4096"))
+_MAX_AGE = int(os.getenv("ARTIFACT_FILE_MAX_AGE", "300"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Files worth compressing, by name, with their content type
+_COMPRESSIBLE: dict[str, str] = {
+    "readable.html": "text/html; charset=utf-8",
+    "readable.txt":  "text/plain; charset=utf-8",
+}
+
+try:
+    import brotli
+except ImportError:         # optional; gzip is always available
+    brotli = None
+
+
+class PathCache:
+    """Thread-safe LRU of artifact_id → content directory."""
+
+    def __init__(self, size: int):
+        self._size = max(1, size)
+        self._entries: OrderedDict[str, Path] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, artifact_id: str, load: Callable[[str], Optional[str]]) -> Optional[Path]:
+        """Cached directory, or load(artifact_id)'s content_path (None: no such artifact, not cached)."""
+        with self._lock:
+            path = self._entries.get(artifact_id)
+            if path is not None:
+                self._entries.move_to_end(artifact_id)
+                return path
+        content_path = load(artifact_id)
+        if content_path is None:
+            return None
+        path = Path(content_path)
+        with self._lock:
+            self._entries[artifact_id] = path
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        return path
+
+    def resolve_many(
+        self, artifact_ids: list[str], load: Callable[[list[str]], dict[str, str]]
+    ) -> dict[str, Path]:
+        """Like resolve for several ids, loading all the misses with one load(ids) call."""
+        found: dict[str, Path] = {}
+        with self._lock:
+            for artifact_id in artifact_ids:
+                path = self._entries.get(artifact_id)
+                if path is not None:
+                    self._entries.move_to_end(artifact_id)
+                    found[artifact_id] = path
+        misses = [artifact_id for artifact_id in artifact_ids if artifact_id not in found]
+        if misses:
+            loaded = {artifact_id: Path(content_path) for artifact_id, content_path in load(misses).items()}
+            found.update(loaded)
+            with self._lock:
+                self._entries.update(loaded)
+                while len(self._entries) > self._size:
+                    self._entries.popitem(last=False)
+        return found
+
+    def evict(self, artifact_id: str) -> None:
+        with self._lock:
+            self._entries.pop(artifact_id, None)
+
+
+artifact_paths = PathCache(_PATH_CACHE_SIZE)
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _accepted_encoding(accept_encoding: str) -> Optional[str]:
+    offered: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _encoded_root() -> Path:
+    return get_data_path() / "system" / "cache" / "encoded"
+
+
+def _encoded_copy(path: Path, etag: str, encoding: str) -> Path:
+    """Path of path's content encoded with encoding, writing it if it isn't cached yet."""
+    suffix = "br" if encoding == "br" else "gz"
+    target = _encoded_root() / f"{etag.strip(chr(34))}.{suffix}"
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        data = path.read_bytes()
+        encoded = brotli.compress(data, quality=9) if encoding == "br" else gzip.compress(data, 9, mtime=0)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(encoded)
+        os.replace(tmp, target)
+    return target
+
+
+def file_response(request: Request, path: Path, cache_control: Optional[str] = None, media_type: Optional[str] = None) -> Response:
+    """
+    Serve path with a strong ETag and Cache-Control (cache_control, else
+    ARTIFACT_FILE_MAX_AGE), answering 304 to a matching If-None-Match.
+    Compressible text is served encoded when the client accepts it.
+    """
+    stat = path.stat()
+    etag = file_etag(stat)
+    headers = {"Cache-Control": cache_control or f"public, max-age={_MAX_AGE}"}
+
+    serve, encoding = path, None
+    if path.name in _COMPRESSIBLE:
+        media_type = _COMPRESSIBLE[path.name]
+        headers["Vary"] = "Accept-Encoding"
+        encoding = _accepted_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            serve = _encoded_copy(path, etag, encoding)
+            # Each representation needs its own strong validator
+            etag = f'{etag[:-1]}-{encoding}"'
+            headers["Content-Encoding"] = encoding
+    headers["ETag"] = etag
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(serve), media_type=media_type, headers=headers, stat_result=serve.stat())
+
+
+def sweep_encoded(conn: sqlite3.Connection) -> tuple[int, int]:
+    """
+    Remove encoded copies whose source file was replaced or deleted: those
+    not keyed by the ETag of a compressible file of some artifact.
+    Returns (files, bytes) freed.
+    """
+    root = _encoded_root()
+    if not root.is_dir():
+        return 0, 0
+    live: set[str] = set()
+    for row in conn.execute("SELECT content_path FROM artifact WHERE content_path IS NOT NULL"):
+        artifact_dir = Path(row["content_path"])
+        for name in _COMPRESSIBLE:
+            for path in artifact_dir.rglob(name):
+                try:
+                    live.add(file_etag(path.stat()).strip('"'))
+                except FileNotFoundError:
+                    continue
+
+    removed = freed = 0
+    for path in root.iterdir():
+        if path.name.endswith(".tmp") or path.name.rsplit(".", 1)[0] not in live:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            freed += size
+            removed += 1
+    return removed, freed
@@ -0,0 +1,230 @@
+"""
+Card thumbnail derivatives: the 'thumbnail' processing task.
+
+A plugin's thumbnail (thumbnail.jpg — for webpages a full 1280×800 viewport
+capture) is only the source. Whenever one is stored, a 'thumbnail' task
+encodes WebP derivatives sized to the user's storage.thumbnail_width ×
+thumbnail_height setting: thumbnail@1x.webp fits that box, thumbnail@2x.webp
+twice it for high-density screens. Aspect ratio is kept and images are
+never upscaled. Encoding runs in a process pool (THUMBNAIL_WORKERS) so it
+neither holds the GIL against request handling nor blocks other queue work.
+
+get_artifact_file serves the variant matching the requested width, and the
+original until the derivatives exist. Existing artifacts, or all of them
+after the thumbnail size setting changes, are queued with:
+
+    python -m core.thumbnails backfill [--limit N] [--all]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from core.blobs import add_references
+from core.config import config_service
+from core.db import DEFAULT_USER_SETTINGS, get_connection, run_migrations
+from core.ingestion import store_artifact_files
+from core.queue import Task, TaskContext, enqueue, register_handler
+
+_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+_WEBP_QUALITY = int(os.getenv("THUMBNAIL_WEBP_QUALITY", "80"))
+
+# Pixel densities a derivative is made for; role thumbnail_{d}x → thumbnail@{d}x.webp
+DENSITIES: tuple[int, ...] = (1, 2)
+
+# New captures queue 'thumbnail' at priority 2 (core/ingestion.py, core/plugin_tasks.py);
+# backfilled artifacts go behind everything else
+_BACKFILL_PRIORITY = 8
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def variant_name(density: int) -> str:
+    return f"thumbnail@{density}x.webp"
+
+
+def thumbnail_box(conn: sqlite3.Connection, user_id: str = "default") -> tuple[int, int]:
+    """(width, height) of the 1x thumbnail, from the user's storage settings."""
+    settings = config_service.user_settings(conn, user_id)
+    storage = {**DEFAULT_USER_SETTINGS["storage"], **settings.get("storage", {})}
+    return int(storage["thumbnail_width"]), int(storage["thumbnail_height"])
+
+
+def variant_for_width(artifact_dir: Path, width: Optional[int]) -> Optional[Path]:
+    """
+    The smallest derivative at least width pixels wide (1x without width, the
+    largest if none is wide enough), or None if none has been made yet.
+    Widths come from the image headers, so no settings lookup is needed.
+    """
+    existing = [artifact_dir / variant_name(d) for d in DENSITIES if (artifact_dir / variant_name(d)).exists()]
+    if not existing:
+        return None
+    if width:
+        from PIL import Image
+
+        for path in existing[:-1]:
+            with Image.open(path) as image:
+                if image.width >= width:
+                    return path
+        return existing[-1]
+    return existing[0]
+
+
+def _encode(src: str, dest: str, width: int, height: int, quality: int) -> None:
+    """Runs in a pool process."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.thumbnail((width, height), Image.Resampling.LANCZOS)
+        image.save(dest, "WEBP", quality=quality, method=4)
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent runs threads (queue workers, the API)
+            _pool = ProcessPoolExecutor(max_workers=_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died (OOM kill, crash in Pillow) so the next _executor() builds a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool() -> None:
+    """Stop the encoding processes, if any were started. Called on app and worker shutdown."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def handle_thumbnail(ctx: TaskContext, tasks: list[Task]) -> Optional[dict[str, str]]:
+    ids = list(dict.fromkeys(task.artifact_id for task in tasks))
+    placeholders = ",".join("?" * len(ids))
+    rows = ctx.conn.execute(
+        f"SELECT id, content_path, thumbnail_path FROM artifact WHERE id IN ({placeholders})", ids
+    ).fetchall()
+    width, height = thumbnail_box(ctx.conn)
+    temp_dir = ctx.data_path / "system" / "temp" / "thumbnails"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+
+    errors: dict[str, str] = {}
+
+    def fail(artifact_id: str, variants: dict[str, tuple[str, object]], exc: Exception) -> None:
+        errors[artifact_id] = f"Thumbnail encoding failed: {exc}"
+        for dest, _ in variants.values():
+            Path(dest).unlink(missing_ok=True)
+        if isinstance(exc, BrokenProcessPool):
+            _discard_pool(pool)
+
+    # Submit every encode in the batch before waiting on any of them
+    pool = _executor()
+    pending: dict[str, dict[str, tuple[str, object]]] = {}
+    for row in rows:
+        if not row["thumbnail_path"] or not Path(row["thumbnail_path"]).exists():
+            continue        # the thumbnail stage hasn't produced a source yet
+        variants: dict[str, tuple[str, object]] = {}
+        try:
+            for density in DENSITIES:
+                dest = temp_dir / f"{row['id']}_thumbnail_{density}x.webp"
+                future = pool.submit(
+                    _encode, row["thumbnail_path"], str(dest), width * density, height * density, _WEBP_QUALITY
+                )
+                variants[f"thumbnail_{density}x"] = (str(dest), future)
+        except Exception as exc:
+            fail(row["id"], variants, exc)
+            continue
+        pending[row["id"]] = variants
+
+    content_paths = {row["id"]: row["content_path"] for row in rows}
+    now = datetime.now(timezone.utc).isoformat()
+    for artifact_id, variants in pending.items():
+        files: dict[str, str] = {}
+        try:
+            for role, (dest, future) in variants.items():
+                future.result()
+                files[role] = dest
+        except Exception as exc:
+            fail(artifact_id, variants, exc)
+            continue
+        stored_files, _ = store_artifact_files(Path(content_paths[artifact_id]), files)
+        add_references(ctx.conn, artifact_id, stored_files)
+        ctx.conn.execute("UPDATE artifact SET updated_at = ? WHERE id = ?", (now, artifact_id))
+    ctx.conn.commit()
+
+    failures = {task.id: errors[task.artifact_id] for task in tasks if task.artifact_id in errors}
+    return failures or None
+
+
+register_handler("thumbnail", handle_thumbnail, batch_size=8, concurrency=1)
+
+
+# ---------------------------------------------------------------------------
+# Backfill
+# ---------------------------------------------------------------------------
+
+def backfill(conn: sqlite3.Connection, limit: Optional[int] = None, regenerate: bool = False) -> int:
+    """
+    Queue 'thumbnail' tasks for artifacts that have a thumbnail but no
+    derivatives (or every one, if regenerate), oldest first, skipping those
+    already queued. Commits. Returns the number queued.
+    """
+    missing = "" if regenerate else f"""
+        AND NOT EXISTS (
+            SELECT 1 FROM artifact_blob ab WHERE ab.artifact_id = a.id AND ab.path = '{variant_name(DENSITIES[0])}'
+        )"""
+    rows = conn.execute(
+        f"""
+        SELECT a.id FROM artifact a
+        WHERE a.thumbnail_path IS NOT NULL{missing}
+          AND NOT EXISTS (
+              SELECT 1 FROM processing_queue q
+              WHERE q.artifact_id = a.id AND q.task_type = 'thumbnail' AND q.status IN ('pending', 'running')
+          )
+        ORDER BY a.id
+        LIMIT ?
+        """,
+        (limit if limit is not None else -1,),
+    ).fetchall()
+    for row in rows:
+        enqueue(conn, row["id"], "thumbnail", priority=_BACKFILL_PRIORITY)
+    conn.commit()
+    return len(rows)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m core.thumbnails", description="Thumbnail derivatives")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--limit", type=int, default=None, help="queue at most this many artifacts")
+    parser.add_argument("--all", action="store_true", help="regenerate existing derivatives too (after a size change)")
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    run_migrations(conn)
+    try:
+        queued = backfill(conn, args.limit, regenerate=args.all)
+        print(f"  {queued} artifacts queued for thumbnails; the queue worker encodes them")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
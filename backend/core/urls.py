@@ -0,0 +1,49 @@
+"""
+URL helpers shared by ingestion and scheduling.
+"""
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlsplit, urlunsplit
+
+# Query parameters that identify a click or campaign rather than the content
+_TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid",
+    "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "ref_src", "ref_url", "si", "spm",
+})
+_TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+
+
+def source_domain(url: str) -> str:
+    """
+    Domain recorded in artifact.source_domain: lowercased host without a leading www.
+    'https://www.Example.com/a' → 'example.com'
+    """
+    return urlparse(url).netloc.lower().removeprefix("www.")
+
+
+def normalise_url(url: str) -> Optional[str]:
+    """
+    Key under which different spellings of the same page's URL match, or None
+    if url isn't an http(s) URL.
+
+    Scheme and a leading www. are ignored, as are default ports, the fragment,
+    a trailing slash, tracking parameters and query parameter order.
+    'http://www.Example.com:80/a/?utm_source=x&b=2&a=1#top' → 'https://example.com/a?a=1&b=2'
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+
+    host = parts.hostname.removeprefix("www.")
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in _TRACKING_PARAMS and not key.lower().startswith(_TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
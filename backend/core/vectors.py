@@ -0,0 +1,499 @@
+"""
+In-process vector index.
+
+Embeddings are stored L2-normalised as float32 rows in one memory-mapped file
+per namespace (data/system/vectors/{namespace}.f32); vector_entry maps each
+row (slot) to a key and its artifact. Search is brute-force cosine top-k with
+NumPy. Past VECTOR_ANN_THRESHOLD vectors an inverted-file (IVF) index narrows
+the candidates first: vectors are bucketed by nearest k-means centroid and
+only the VECTOR_ANN_NPROBE closest buckets are scored.
+
+Writers (the queue worker) and readers (the API) may be separate processes.
+Vectors are written to the file before the rows that reference them commit,
+always into slots no committed row references: a replaced key moves to a
+new slot and its old one is freed, so a rolled-back write leaves nothing
+but unreferenced slots behind. Every search checks the namespace generation
+and applies just the entries and freed slots changed since its snapshot
+(migration 0016). The file is never truncated, since readers may have it
+mapped.
+"""
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from core.db import get_data_path
+
+_ANN_THRESHOLD = int(os.getenv("VECTOR_ANN_THRESHOLD", "50000"))
+_ANN_NPROBE = int(os.getenv("VECTOR_ANN_NPROBE", "8"))
+
+# Rebuild the IVF index once this fraction of vectors was written after it was built
+_ANN_STALE_FRACTION = 0.1
+
+# Whole-artifact embeddings; also recorded in artifact.embedding_id
+ARTIFACT_NAMESPACE = "artifact"
+
+
+class VectorDimensionMismatch(ValueError):
+    """Raised when a vector's dimension differs from the rest of its namespace."""
+
+
+@dataclass
+class VectorMatch:
+    key: str
+    artifact_id: str
+    score: float                # cosine similarity, -1..1
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    if k < len(scores):
+        idx = np.argpartition(-scores, k)[:k]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+@dataclass
+class _Snapshot:
+    """One process's view of a namespace at a given generation."""
+    generation: int
+    matrix: np.ndarray                  # (rows, dim) memmap over the vector file
+    keys: np.ndarray                    # slot → key (None for free slots)
+    artifact_ids: np.ndarray            # slot → artifact id
+    written: np.ndarray                 # slot → generation the vector was written at, -1 if free
+    by_key: dict[str, int] = field(default_factory=dict)
+    by_artifact: dict[str, list[int]] = field(default_factory=dict)
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.written >= 0
+
+
+class _IVF:
+    """Inverted-file index: slots bucketed by their nearest spherical k-means centroid."""
+
+    def __init__(self, snapshot: _Snapshot):
+        matrix = snapshot.matrix
+        slots = np.flatnonzero(snapshot.valid)
+        rng = np.random.default_rng(0)
+        n_lists = max(1, int(np.sqrt(len(slots))))
+
+        # Train on a sample; ~40 points per centroid is plenty for coarse buckets
+        sample = np.sort(rng.choice(slots, size=min(len(slots), n_lists * 40), replace=False))
+        vectors = np.asarray(matrix[sample])
+        centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+        for _ in range(10):
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalise(sums)
+
+        # Assign every vector in blocks to bound the temporary score matrix
+        assign = np.empty(len(slots), dtype=np.int32)
+        for start in range(0, len(slots), 16384):
+            block = slots[start:start + 16384]
+            assign[start:start + len(block)] = np.argmax(np.asarray(matrix[block]) @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(n_lists + 1))
+
+        self.centroids = centroids
+        self.lists = [slots[order[bounds[c]:bounds[c + 1]]] for c in range(n_lists)]
+        self.generation = snapshot.generation
+        self.size = len(slots)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nearest = _top_k(self.centroids @ query, nprobe)
+        return np.concatenate([self.lists[c] for c in nearest])
+
+
+class VectorIndex:
+    """
+    A namespace of fixed-dimension vectors keyed by string (artifact id, chunk id, ...).
+
+    Use get_index() rather than constructing directly, so the in-memory mapping
+    and IVF index are shared by every request in the process.
+    """
+
+    def __init__(self, namespace: str, path: Optional[Path] = None):
+        self.namespace = namespace
+        self._path = path or get_data_path() / "system" / "vectors" / f"{namespace}.f32"
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._ivf: Optional[_IVF] = None
+        self._ivf_building = False
+
+    # --- Writes ---
+
+    def add(
+        self,
+        conn: sqlite3.Connection,
+        items: Sequence[tuple[str, str, Sequence[float]]],
+        model: Optional[str] = None,
+    ) -> None:
+        """
+        Add or replace vectors, given as (key, artifact_id, vector). Does not commit.
+
+        Every vector goes to a fresh slot — one freed by an earlier add or
+        delete, else past the end of the file — and a replaced key's old slot
+        is freed. Commit deletes before adding to the same namespace: a slot
+        freed earlier in the same transaction may be reused.
+        """
+        if not items:
+            return
+        vectors = _normalise(np.asarray([vector for _, _, vector in items], dtype=np.float32))
+        dim = vectors.shape[1]
+
+        # Writing first takes SQLite's write lock, so slot allocation can't race another writer
+        conn.execute(
+            """
+            INSERT INTO vector_namespace (name, dim, model, generation) VALUES (?, ?, ?, 1)
+            ON CONFLICT (name) DO UPDATE SET
+                dim = COALESCE(dim, excluded.dim),
+                model = COALESCE(excluded.model, model),
+                generation = generation + 1
+            """,
+            (self.namespace, dim, model),
+        )
+        ns = conn.execute(
+            "SELECT dim, generation FROM vector_namespace WHERE name = ?", (self.namespace,)
+        ).fetchone()
+        if ns["dim"] != dim:
+            raise VectorDimensionMismatch(
+                f"Vector index '{self.namespace}' holds {ns['dim']}-d vectors, got {dim}-d"
+            )
+
+        generation = ns["generation"]
+        writes: list[tuple[int, np.ndarray]] = []
+        for (key, artifact_id, _), vector in zip(items, vectors):
+            replaced = conn.execute(
+                "SELECT slot FROM vector_entry WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            slot = self._allocate(conn, generation)
+            conn.execute(
+                """
+                INSERT INTO vector_entry (namespace, key, artifact_id, slot, generation)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (namespace, key) DO UPDATE SET
+                    artifact_id = excluded.artifact_id, slot = excluded.slot, generation = excluded.generation
+                """,
+                (self.namespace, key, artifact_id, slot, generation),
+            )
+            if replaced:
+                conn.execute(
+                    "INSERT OR REPLACE INTO vector_free_slot (namespace, slot, freed_generation) VALUES (?, ?, ?)",
+                    (self.namespace, replaced["slot"], generation),
+                )
+            if self.namespace == ARTIFACT_NAMESPACE:
+                conn.execute("UPDATE artifact SET embedding_id = ? WHERE id = ?", (key, artifact_id))
+            writes.append((slot, vector))
+
+        self._write(writes, dim)
+
+    def delete(self, conn: sqlite3.Connection, keys: Iterable[str]) -> None:
+        """Remove vectors by key; their slots are freed by trigger. Does not commit."""
+        for key in keys:
+            conn.execute(
+                "DELETE FROM vector_entry WHERE namespace = ? AND key = ?", (self.namespace, key)
+            )
+            if self.namespace == ARTIFACT_NAMESPACE:
+                conn.execute(
+                    "UPDATE artifact SET embedding_id = NULL WHERE id = ? AND embedding_id = ?", (key, key)
+                )
+
+    def reset(self, conn: sqlite3.Connection) -> None:
+        """Drop every vector, e.g. before re-embedding with a different model. Does not commit."""
+        # The trigger frees every slot, which is how snapshots elsewhere learn of the reset
+        conn.execute("DELETE FROM vector_entry WHERE namespace = ?", (self.namespace,))
+        conn.execute(
+            "UPDATE vector_namespace SET dim = NULL, model = NULL, generation = generation + 1 WHERE name = ?",
+            (self.namespace,),
+        )
+        if self.namespace == ARTIFACT_NAMESPACE:
+            conn.execute("UPDATE artifact SET embedding_id = NULL WHERE embedding_id IS NOT NULL")
+
+    def _allocate(self, conn: sqlite3.Connection, generation: int) -> int:
+        """A slot no committed row references: one freed before this add, else past every slot in use or free."""
+        freed = conn.execute(
+            """
+            DELETE FROM vector_free_slot
+            WHERE namespace = ? AND slot = (
+                SELECT MIN(slot) FROM vector_free_slot WHERE namespace = ? AND freed_generation < ?
+            )
+            RETURNING slot
+            """,
+            (self.namespace, self.namespace, generation),
+        ).fetchone()
+        if freed:
+            return freed["slot"]
+        return conn.execute(
+            """
+            SELECT COALESCE(MAX(slot) + 1, 0) FROM (
+                SELECT MAX(slot) AS slot FROM vector_entry WHERE namespace = ?
+                UNION ALL
+                SELECT MAX(slot) FROM vector_free_slot WHERE namespace = ?
+            )
+            """,
+            (self.namespace, self.namespace),
+        ).fetchone()[0]
+
+    def _write(self, writes: list[tuple[int, np.ndarray]], dim: int) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        row_bytes = dim * 4
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+b") as f:
+            for slot, vector in writes:
+                f.seek(slot * row_bytes)
+                f.write(vector.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- Reads ---
+
+    def get(self, conn: sqlite3.Connection, key: str) -> Optional[np.ndarray]:
+        snapshot = self._current(conn)
+        if snapshot is None or key not in snapshot.by_key:
+            return None
+        return np.array(snapshot.matrix[snapshot.by_key[key]])
+
+    def count(self, conn: sqlite3.Connection) -> int:
+        snapshot = self._current(conn)
+        return len(snapshot.by_key) if snapshot else 0
+
+    def search(
+        self,
+        conn: sqlite3.Connection,
+        query: Sequence[float],
+        k: int = 20,
+        artifact_ids: Optional[Iterable[str]] = None,
+        exclude_artifact_ids: Optional[Iterable[str]] = None,
+    ) -> list[VectorMatch]:
+        """
+        Top-k vectors by cosine similarity to `query`.
+
+        artifact_ids restricts the search to those artifacts' vectors (exact,
+        no IVF); exclude_artifact_ids drops a usually small set (e.g. archived
+        artifacts). Both push structured filters down before scoring, so
+        callers never have to over-fetch and filter afterwards.
+        """
+        snapshot = self._current(conn)
+        if snapshot is None or not snapshot.by_key or k <= 0:
+            return []
+        q = _normalise(np.asarray(query, dtype=np.float32))
+        if q.shape[0] != snapshot.matrix.shape[1]:
+            raise VectorDimensionMismatch(
+                f"Vector index '{self.namespace}' holds {snapshot.matrix.shape[1]}-d vectors, got {q.shape[0]}-d"
+            )
+
+        if artifact_ids is not None:
+            slots = np.array(
+                [slot for aid in artifact_ids for slot in snapshot.by_artifact.get(aid, ())], dtype=np.int64
+            )
+        else:
+            slots = self._ann_candidates(snapshot, q)
+
+        excluded = np.array(
+            [slot for aid in (exclude_artifact_ids or ()) for slot in snapshot.by_artifact.get(aid, ())],
+            dtype=np.int64,
+        )
+        if slots is None:
+            scores = np.asarray(snapshot.matrix) @ q
+            scores[~snapshot.valid] = -np.inf
+            scores[excluded] = -np.inf
+            best = _top_k(scores, k)
+            best = best[np.isfinite(scores[best])]
+            picked, picked_scores = best, scores[best]
+        else:
+            if len(excluded):
+                slots = slots[~np.isin(slots, excluded)]
+            if len(slots) == 0:
+                return []
+            scores = np.asarray(snapshot.matrix[slots]) @ q
+            best = _top_k(scores, k)
+            picked, picked_scores = slots[best], scores[best]
+
+        return [
+            VectorMatch(key=snapshot.keys[slot], artifact_id=snapshot.artifact_ids[slot], score=float(score))
+            for slot, score in zip(picked, picked_scores)
+        ]
+
+    # --- Internals ---
+
+    def _current(self, conn: sqlite3.Connection) -> Optional[_Snapshot]:
+        ns = conn.execute(
+            "SELECT dim, generation FROM vector_namespace WHERE name = ?", (self.namespace,)
+        ).fetchone()
+        if ns is None or ns["dim"] is None:
+            return None
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.matrix.shape[1] != ns["dim"]:
+                self._snapshot = self._load(conn, ns["dim"], ns["generation"])
+            elif snapshot.generation != ns["generation"]:
+                self._snapshot = self._update(conn, snapshot, ns["generation"])
+            return self._snapshot
+
+    def _load(self, conn: sqlite3.Connection, dim: int, generation: int) -> _Snapshot:
+        # generation was read before the entries, so a concurrent write at worst
+        # causes one extra reload on the next search — never a stale snapshot
+        rows = conn.execute(
+            "SELECT key, artifact_id, slot, generation FROM vector_entry WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchall()
+        size = self._path.stat().st_size if self._path.exists() else 0
+        n_rows = size // (dim * 4)
+        if n_rows:
+            matrix = np.memmap(self._path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+        else:
+            matrix = np.zeros((0, dim), dtype=np.float32)
+
+        snapshot = _Snapshot(
+            generation=generation,
+            matrix=matrix,
+            keys=np.full(n_rows, None, dtype=object),
+            artifact_ids=np.full(n_rows, None, dtype=object),
+            written=np.full(n_rows, -1, dtype=np.int64),
+        )
+        for row in rows:
+            slot = row["slot"]
+            if slot >= n_rows:
+                continue        # written by a transaction newer than our view of the file
+            snapshot.keys[slot] = row["key"]
+            snapshot.artifact_ids[slot] = row["artifact_id"]
+            snapshot.written[slot] = row["generation"]
+            snapshot.by_key[row["key"]] = slot
+            snapshot.by_artifact.setdefault(row["artifact_id"], []).append(slot)
+        return snapshot
+
+    def _update(self, conn: sqlite3.Connection, snapshot: _Snapshot, generation: int) -> _Snapshot:
+        """
+        A copy of snapshot with the entries written and slots freed since its
+        generation applied. Searches may still hold the old one, so it is
+        left untouched: arrays are copied, lists replaced rather than edited.
+        """
+        # One statement, so entries and free slots come from the same database snapshot:
+        # a slot is then in exactly one of the two
+        rows = conn.execute(
+            """
+            SELECT slot, key, artifact_id, generation FROM vector_entry
+            WHERE namespace = ? AND generation > ?
+            UNION ALL
+            SELECT slot, NULL, NULL, freed_generation FROM vector_free_slot
+            WHERE namespace = ? AND freed_generation > ?
+            """,
+            (self.namespace, snapshot.generation, self.namespace, snapshot.generation),
+        ).fetchall()
+        dim = snapshot.matrix.shape[1]
+        size = self._path.stat().st_size if self._path.exists() else 0
+        n_rows = max(size // (dim * 4), len(snapshot.written))
+        grow = n_rows - len(snapshot.written)
+        if grow:
+            matrix = np.memmap(self._path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+        else:
+            matrix = snapshot.matrix
+
+        keys = np.concatenate([snapshot.keys, np.full(grow, None, dtype=object)])
+        artifact_ids = np.concatenate([snapshot.artifact_ids, np.full(grow, None, dtype=object)])
+        written = np.concatenate([snapshot.written, np.full(grow, -1, dtype=np.int64)])
+        by_key = dict(snapshot.by_key)
+        by_artifact = dict(snapshot.by_artifact)
+
+        def clear(slot: int) -> None:
+            key, artifact_id = keys[slot], artifact_ids[slot]
+            if key is None:
+                return
+            if by_key.get(key) == slot:
+                del by_key[key]
+            remaining = [s for s in by_artifact.get(artifact_id, ()) if s != slot]
+            if remaining:
+                by_artifact[artifact_id] = remaining
+            else:
+                by_artifact.pop(artifact_id, None)
+            keys[slot] = artifact_ids[slot] = None
+            written[slot] = -1
+
+        complete = True
+        for row in rows:
+            slot, key = row["slot"], row["key"]
+            if slot >= n_rows:
+                complete = False
+                continue        # written by a transaction newer than our view of the file
+            clear(slot)
+            if key is None:
+                continue        # freed
+            moved_from = by_key.get(key)
+            if moved_from is not None and moved_from != slot and keys[moved_from] == key:
+                clear(moved_from)
+            keys[slot], artifact_ids[slot], written[slot] = key, row["artifact_id"], row["generation"]
+            by_key[key] = slot
+            by_artifact[row["artifact_id"]] = by_artifact.get(row["artifact_id"], []) + [slot]
+
+        return _Snapshot(
+            # Re-read from the same point next time if an entry couldn't be placed yet
+            generation=generation if complete else snapshot.generation,
+            matrix=matrix,
+            keys=keys,
+            artifact_ids=artifact_ids,
+            written=written,
+            by_key=by_key,
+            by_artifact=by_artifact,
+        )
+
+    def _ann_candidates(self, snapshot: _Snapshot, query: np.ndarray) -> Optional[np.ndarray]:
+        """Candidate slots from the IVF index, or None to score everything."""
+        if len(snapshot.by_key) < _ANN_THRESHOLD:
+            return None
+
+        ivf = self._ivf
+        # Vectors written since the build may sit in the wrong bucket (or none): score them all
+        fresh = snapshot.written > (ivf.generation if ivf else -1)
+        if ivf is None or fresh.sum() > ivf.size * _ANN_STALE_FRACTION:
+            self._build_ivf(snapshot)
+        if ivf is None:
+            return None
+
+        candidates = ivf.candidates(query, _ANN_NPROBE)
+        candidates = candidates[candidates < len(snapshot.written)]
+        candidates = candidates[snapshot.valid[candidates] & ~fresh[candidates]]
+        return np.concatenate([candidates, np.flatnonzero(fresh)])
+
+    def _build_ivf(self, snapshot: _Snapshot) -> None:
+        """Build the IVF index in the background; searches stay exact until it is ready."""
+        with self._lock:
+            if self._ivf_building:
+                return
+            self._ivf_building = True
+
+        def build() -> None:
+            try:
+                self._ivf = _IVF(snapshot)
+            except Exception as exc:
+                print(f"  warning: vector index '{self.namespace}': IVF build failed: {exc}")
+            finally:
+                self._ivf_building = False
+
+        threading.Thread(target=build, name=f"ivf-{self.namespace}", daemon=True).start()
+
+
+_INDEXES: dict[str, VectorIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_index(namespace: str = ARTIFACT_NAMESPACE) -> VectorIndex:
+    """The process-wide VectorIndex for a namespace."""
+    with _INDEXES_LOCK:
+        if namespace not in _INDEXES:
+            _INDEXES[namespace] = VectorIndex(namespace)
+        return _INDEXES[namespace]
@@ -0,0 +1,60 @@
+"""
+Standalone processing queue worker.
+
+Run from the backend directory:
+
+    python -m core.worker
+
+Set QUEUE_WORKER_IN_PROCESS=false for the API process when running workers
+separately, so enrichment never competes with request handling.
+"""
+import importlib
+import signal
+import threading
+
+from core.db import get_connection, get_data_path, run_migrations
+from core.plugin_tasks import register_plugin_tasks
+from core.plugins.loader import PluginLoader
+from core.queue import QueueWorker
+from core.thumbnails import shutdown_pool as shutdown_thumbnail_pool
+
+# Modules that register processing_queue task handlers on import.
+HANDLER_MODULES: tuple[str, ...] = (
+    "core.chunks",
+    "core.embeddings",
+    "core.importers",
+    "core.thumbnails",
+)
+
+
+def load_handlers(loader: PluginLoader) -> None:
+    """Register core task handlers, and those of the loaded content plugins."""
+    for module_name in HANDLER_MODULES:
+        importlib.import_module(module_name)
+    register_plugin_tasks(loader)
+
+
+def main() -> None:
+    conn = get_connection()
+    run_migrations(conn)
+    loader = PluginLoader(conn, get_data_path())
+    loader.load_all()
+    conn.close()
+
+    load_handlers(loader)
+    worker = QueueWorker(loader)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    worker.start()
+    stop.wait()
+    print("  stopping queue worker...")
+    worker.stop()
+    loader.shutdown_all()
+    shutdown_thumbnail_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,33 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator, Optional
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from core.api.artifacts import router as artifacts_router
 from core.api.collections import router as collections_router
+from core.api.export import router as export_router
 from core.api.search import router as search_router
 from core.api.tags import router as tags_router
-from core.db import get_connection, get_data_path, run_migrations
-from core.ingestion import ingest_url
+from core.batch import BatchIngestManager
+from core.db import close_pools, get_connection, get_data_path, get_read_db, run_migrations
+from core.fts import reindex_pending
+from core.importers import IMPORT_FORMATS, ImportFormatError, import_file
+from core.ingestion import DUPLICATE_POLICIES, DuplicateArtifact, ingest_many, ingest_url
+from core.jobs import IngestJobManager, JobQueueFull
 from core.plugins.base import IngestionError
 from core.plugins.loader import PluginLoader
 from core.plugins.router import ContentRouter
+from core.queue import QueueWorker, queue_stats
+from core.thumbnails import shutdown_pool as shutdown_thumbnail_pool
+from core.worker import load_handlers
 
 
 @asynccontextmanager
@@ -22,13 +37,39 @@ async def lifespan(app: FastAPI):
 
     loader = PluginLoader(conn, get_data_path())
     loader.load_all()
+
+    # Index extracted text for artifacts that don't have it yet (e.g. after migration 0005)
+    reindexed = reindex_pending(conn, loader)
+    if reindexed:
+        print(f"  indexed full text for {reindexed} artifacts")
     conn.close()
 
     app.state.plugins = loader
     app.state.router = ContentRouter(loader)
 
+    # Warm long-lived plugin resources (e.g. the webpage browser pool)
+    loader.startup_all()
+
+    app.state.jobs = IngestJobManager(loader, app.state.router)
+    app.state.batches = BatchIngestManager(loader, app.state.router)
+
+    # Processing queue: run workers in-process unless a separate `python -m core.worker` handles it
+    load_handlers(loader)
+    app.state.queue_worker = None
+    if os.getenv("QUEUE_WORKER_IN_PROCESS", "true").lower() != "false":
+        app.state.queue_worker = QueueWorker(loader)
+        app.state.queue_worker.start()
+
     yield
 
+    if app.state.queue_worker:
+        app.state.queue_worker.stop()
+    app.state.batches.shutdown()
+    app.state.jobs.shutdown()
+    loader.shutdown_all()
+    shutdown_thumbnail_pool()
+    close_pools()
+
 
 app = FastAPI(title="Pindrop", lifespan=lifespan)
 
@@ -37,12 +78,14 @@ app.add_middleware(
     allow_origins=["http://localhost:5173"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Export-Watermark"],
 )
 
 app.include_router(artifacts_router, prefix="/api")
 app.include_router(tags_router, prefix="/api")
 app.include_router(collections_router, prefix="/api")
 app.include_router(search_router, prefix="/api")
+app.include_router(export_router, prefix="/api")
 
 
 @app.get("/health")
@@ -79,13 +122,34 @@ def route_url(url: str, request: Request):
     return {"url": url, "plugin": plugin.plugin_id}
 
 
+# --- Processing queue ---
+
+@app.get("/api/queue")
+def get_queue_stats(conn: sqlite3.Connection = Depends(get_read_db)):
+    """Task counts by task_type and status."""
+    return queue_stats(conn)
+
+
 # --- Ingest endpoint ---
 
+def _check_duplicate_policy(on_duplicate: Optional[str]) -> None:
+    if on_duplicate is not None and on_duplicate not in DUPLICATE_POLICIES:
+        raise HTTPException(
+            status_code=400, detail=f"on_duplicate must be one of: {', '.join(DUPLICATE_POLICIES)}"
+        )
+
+
 @app.post("/api/ingest")
-def ingest(url: str, request: Request):
+def ingest(url: str, request: Request, on_duplicate: Optional[str] = None):
     """
     Ingest a URL. Blocking — returns the full artifact record when complete.
+
+    on_duplicate ('existing', 'skip' or 'snapshot') overrides
+    INGEST_DUPLICATE_POLICY. An already-archived URL returns the existing
+    artifact (duplicate: true) without capturing, or 409 under 'skip'.
     """
+    _check_duplicate_policy(on_duplicate)
+    # Dedicated connection: a capture takes seconds, too long to hold a pooled one
     conn = get_connection()
     try:
         artifact = ingest_url(
@@ -93,14 +157,227 @@ def ingest(url: str, request: Request):
             conn,
             request.app.state.plugins,
             request.app.state.router,
+            duplicate_policy=on_duplicate,
         )
         return artifact
+    except DuplicateArtifact as exc:
+        raise HTTPException(status_code=409, detail={"message": str(exc), "artifact_id": exc.artifact_id})
     except IngestionError as exc:
         raise HTTPException(status_code=422, detail=str(exc))
     finally:
         conn.close()
 
 
+@app.post("/api/ingest/jobs", status_code=202)
+def create_ingest_job(url: str, request: Request, on_duplicate: Optional[str] = None):
+    """
+    Ingest a URL in the background. Returns the job immediately; poll
+    /api/ingest/jobs/{job_id} or stream its /events for progress.
+    """
+    _check_duplicate_policy(on_duplicate)
+    jobs: IngestJobManager = request.app.state.jobs
+    try:
+        return jobs.submit(url, duplicate_policy=on_duplicate)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=429, detail=f"Ingest queue is full: {exc}")
+
+
+@app.get("/api/ingest/jobs/{job_id}")
+def get_ingest_job(job_id: str, request: Request):
+    jobs: IngestJobManager = request.app.state.jobs
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/ingest/jobs/{job_id}/events")
+async def stream_ingest_job(job_id: str, request: Request):
+    """Server-sent events: one 'job' event per change, ending when the job finishes."""
+    jobs: IngestJobManager = request.app.state.jobs
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        seen = -1
+        while not await request.is_disconnected():
+            version = jobs.version(job_id)
+            if version is None:
+                return
+            if version != seen:
+                seen = version
+                job = jobs.get(job_id)
+                yield f"event: job\ndata: {json.dumps(job)}\n\n"
+                if job["status"] in ("done", "failed"):
+                    return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+async def _batch_url_chunks(request: Request) -> AsyncIterator[list[str]]:
+    """
+    URLs from a batch request body, in chunks. Either JSON — a list of URLs or
+    {"urls": [...]}, yielded once whole — or NDJSON (one URL string or
+    {"url": ...} object per line), yielded line by line as the body streams in.
+    """
+    def parse_line(line: bytes) -> str | None:
+        line = line.strip()
+        if not line:
+            return None
+        value = json.loads(line)
+        return value.get("url") if isinstance(value, dict) else value
+
+    def checked(urls: list) -> list[str]:
+        if not all(isinstance(u, str) for u in urls):
+            raise HTTPException(status_code=400, detail="Invalid batch body: URLs must be strings")
+        return urls
+
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            buffer = b""
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                if (urls := [u for u in map(parse_line, lines) if u]):
+                    yield checked(urls)
+            if (url := parse_line(buffer)):
+                yield checked([url])
+        else:
+            body = json.loads(await request.body() or b"null")
+            if isinstance(body, dict):
+                body = body.get("urls")
+            if not isinstance(body, list):
+                raise ValueError('expected a list of URLs or {"urls": [...]}')
+            if (urls := [u for u in body if u]):
+                yield checked(urls)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {exc}")
+
+
+@app.post("/api/ingest/batch", status_code=202)
+async def create_ingest_batch(request: Request, wait: bool = False, on_duplicate: Optional[str] = None):
+    """
+    Bulk ingest with per-host politeness. URLs are scheduled as the body is
+    parsed; the batch summary is returned (202) once it has all been read, or
+    — with ?wait=true — once every URL has finished: 200, or 207 when some
+    URLs failed and others did not. Already-archived URLs are skipped unless
+    on_duplicate is 'snapshot'.
+    """
+    _check_duplicate_policy(on_duplicate)
+    batches: BatchIngestManager = request.app.state.batches
+    batch_id: Optional[str] = None
+    try:
+        async for urls in _batch_url_chunks(request):
+            if batch_id is None:
+                batch_id = batches.open(duplicate_policy=on_duplicate)
+            await asyncio.to_thread(batches.add, batch_id, urls)
+    except HTTPException as exc:
+        if batch_id is not None:
+            exc.detail += f" (batch {batch_id} continues with the URLs before it)"
+        raise
+    finally:
+        if batch_id is not None:
+            summary = batches.close(batch_id)
+    if batch_id is None:
+        raise HTTPException(status_code=400, detail="Batch contains no URLs")
+
+    if not wait:
+        return summary
+    while not batches.is_finished(batch_id):
+        await asyncio.sleep(0.5)
+    summary = batches.get(batch_id) or summary
+    mixed = 0 < summary["counts"]["failed"] < summary["total"]
+    return JSONResponse(summary, status_code=207 if mixed else 200)
+
+
+@app.get("/api/ingest/batch/{batch_id}")
+def get_ingest_batch(batch_id: str, request: Request):
+    batches: BatchIngestManager = request.app.state.batches
+    summary = batches.get(batch_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return summary
+
+
+# --- Imports ---
+
+async def _spool_body(request: Request):
+    """
+    The request body in a named temporary file, rewound. Written as it
+    arrives, so parsers can stream large uploads and memory stays flat.
+    """
+    temp_dir = get_data_path() / "system" / "temp" / "imports"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    spool = tempfile.NamedTemporaryFile(dir=temp_dir)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.flush()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+@app.post("/api/ingest/export")
+async def ingest_export(plugin: str, request: Request, on_duplicate: Optional[str] = None):
+    """
+    Import a platform export sent as the request body (e.g. a ChatGPT or
+    Claude conversations.json or export .zip, plugin=ai-chat) as one artifact
+    per item. Returns counts of imported and duplicate artifacts once the
+    whole file is stored.
+    """
+    _check_duplicate_policy(on_duplicate)
+    content_plugin = request.app.state.plugins.get_content_plugin(plugin)
+    if content_plugin is None:
+        raise HTTPException(status_code=404, detail=f"Unknown content plugin: {plugin}")
+
+    with await _spool_body(request) as spool:
+        def run() -> dict:
+            conn = get_connection()
+            try:
+                return ingest_many(Path(spool.name), content_plugin, conn, duplicate_policy=on_duplicate)
+            finally:
+                conn.close()
+
+        try:
+            return await asyncio.to_thread(run)
+        except IngestionError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+
+@app.post("/api/import")
+async def import_bookmarks(
+    request: Request, format: Optional[str] = None, source: Optional[str] = None, capture: bool = True
+):
+    """
+    Import a bookmarks export sent as the request body: browser/Pocket/Raindrop
+    bookmarks.html, or a Pocket/Raindrop CSV or JSON export (format is
+    detected if not given). Artifacts are created with their metadata before
+    this returns; content captures are queued ('capture' tasks) unless
+    capture=false. Returns counts of imported, duplicate and invalid entries.
+    """
+    if format is not None and format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+
+    with await _spool_body(request) as spool:
+        def run() -> dict:
+            # Dedicated connection: a large import holds the write lock for a while
+            conn = get_connection()
+            try:
+                return import_file(conn, spool, request.app.state.router, format, source, capture)
+            finally:
+                conn.close()
+
+        try:
+            return await asyncio.to_thread(run)
+        except ImportFormatError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid import file: {exc}")
+
+
 # --- Production static file serving ---
 # Only activates when frontend/dist/ exists (i.e. after `npm run build`).
 # In dev, Vite's proxy handles /api routing on port 5173.
@@ -0,0 +1,238 @@
+"""
+AI chat content plugin.
+
+Conversations are imported from platform data exports through ingest_many,
+one artifact per conversation:
+
+  chatgpt — conversations.json from a ChatGPT data export (or the export's
+            .zip). Each conversation is a tree of message nodes; the branch
+            ending at current_node is the one shown in the ChatGPT UI.
+  claude  — conversations.json from a Claude data export (or its .zip), with
+            a flat chat_messages list per conversation.
+
+Exports run to hundreds of MB, so the file is decoded one conversation at a
+time (core/jsonstream.py) and each is yielded as soon as it is parsed.
+
+Per conversation the plugin stores the exported object as raw/original.json,
+the normalised turns as processed/transcript.json, and a plain-text
+transcript as processed/readable.txt, which is what search indexes.
+"""
+import json
+import uuid
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from core.jsonstream import JSONStreamError, iter_array, text_chunks
+from core.plugins.base import ArtifactData, ContentPlugin, IngestionError
+
+_ROLE_LABELS = {"user": "User", "assistant": "Assistant", "tool": "Tool"}
+
+_EXCERPT_CHARS = 300
+_TITLE_CHARS = 80
+
+
+def _iso(value) -> Optional[str]:
+    """ChatGPT epoch seconds or a Claude ISO string, as an ISO timestamp."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).isoformat()
+    return str(value)
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text[:limit].rsplit(" ", 1)[0] + "…" if len(text) > limit else text
+
+
+# ---------------------------------------------------------------------------
+# Platform formats → (conversation id, title, turns, model)
+# ---------------------------------------------------------------------------
+
+def _chatgpt_text(content: dict) -> str:
+    content_type = content.get("content_type")
+    if content_type in ("text", "multimodal_text"):
+        # Non-string parts are attachments (image pointers etc.)
+        return "\n".join(part for part in content.get("parts") or [] if isinstance(part, str))
+    if content_type in ("code", "execution_output", "tether_quote"):
+        return content.get("text") or ""
+    return ""
+
+
+def _chatgpt_turns(conversation: dict, include_tools: bool) -> tuple[list[dict], Optional[str]]:
+    mapping: dict = conversation.get("mapping") or {}
+    # Walk up from the visible leaf; older exports without current_node use insertion order
+    node_id = conversation.get("current_node")
+    if node_id in mapping:
+        branch = []
+        while node_id in mapping:
+            branch.append(mapping[node_id])
+            node_id = mapping[node_id].get("parent")
+        branch.reverse()
+    else:
+        branch = list(mapping.values())
+
+    turns: list[dict] = []
+    model = conversation.get("default_model_slug")
+    for node in branch:
+        message = node.get("message") or {}
+        role = (message.get("author") or {}).get("role")
+        metadata = message.get("metadata") or {}
+        if role not in ("user", "assistant", "tool") or metadata.get("is_visually_hidden_from_conversation"):
+            continue
+        if role == "tool" and not include_tools:
+            continue
+        text = _chatgpt_text(message.get("content") or {}).strip()
+        if not text:
+            continue
+        if role == "assistant" and metadata.get("model_slug"):
+            model = metadata["model_slug"]
+        turns.append({"role": role, "content": text, "timestamp": _iso(message.get("create_time"))})
+    return turns, model
+
+
+def _claude_turns(conversation: dict, include_tools: bool) -> tuple[list[dict], Optional[str]]:
+    turns: list[dict] = []
+    for message in conversation.get("chat_messages") or []:
+        role = {"human": "user", "assistant": "assistant"}.get(message.get("sender"))
+        if role is None:
+            continue
+        parts = []
+        for block in message.get("content") or []:
+            if block.get("type") == "text" and block.get("text"):
+                parts.append(block["text"])
+            elif include_tools and block.get("type") == "tool_result":
+                parts += [c.get("text", "") for c in block.get("content") or [] if isinstance(c, dict)]
+        text = ("\n".join(parts) or message.get("text") or "").strip()
+        if text:
+            turns.append({"role": role, "content": text, "timestamp": _iso(message.get("created_at"))})
+    return turns, conversation.get("model")
+
+
+def _parse_conversation(conversation: dict, include_tools: bool) -> Optional[dict]:
+    """Platform-neutral form of one exported conversation, or None if it isn't one or is empty."""
+    if "mapping" in conversation:
+        platform = "chatgpt"
+        conversation_id = conversation.get("conversation_id") or conversation.get("id")
+        url = f"https://chatgpt.com/c/{conversation_id}"
+        title = conversation.get("title")
+        turns, model = _chatgpt_turns(conversation, include_tools)
+        created, updated = conversation.get("create_time"), conversation.get("update_time")
+    elif "chat_messages" in conversation:
+        platform = "claude"
+        conversation_id = conversation.get("uuid")
+        url = f"https://claude.ai/chat/{conversation_id}"
+        title = conversation.get("name")
+        turns, model = _claude_turns(conversation, include_tools)
+        created, updated = conversation.get("created_at"), conversation.get("updated_at")
+    else:
+        return None
+    if not conversation_id or not turns:
+        return None
+    return {
+        "platform": platform,
+        "id": conversation_id,
+        "url": url,
+        "title": (title or "").strip(),
+        "turns": turns,
+        "model": model,
+        "created_at": _iso(created),
+        "updated_at": _iso(updated),
+    }
+
+
+def _transcript_text(title: str, turns: list[dict]) -> str:
+    blocks = [title] if title else []
+    blocks += [f"{_ROLE_LABELS[turn['role']]}:\n{turn['content']}" for turn in turns]
+    return "\n\n".join(blocks) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Plugin
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def _open_export(source: Path) -> Iterator[BinaryIO]:
+    """conversations.json, directly or from inside an export .zip (read without extracting)."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [name for name in archive.namelist() if name.rsplit("/", 1)[-1] == "conversations.json"]
+            if not names:
+                raise IngestionError("Export archive has no conversations.json")
+            with archive.open(min(names, key=len)) as stream:
+                yield stream
+    else:
+        with open(source, "rb") as stream:
+            yield stream
+
+
+class Plugin(ContentPlugin):
+    plugin_id = "ai-chat"
+    plugin_version = "1.0.0"
+    url_patterns: list[str] = []
+
+    def ingest(self, source: str, artifact_id: str, temp_dir: Path, config: dict) -> ArtifactData:
+        raise IngestionError(
+            "AI chats are imported from a ChatGPT or Claude data export: POST /api/ingest/export?plugin=ai-chat"
+        )
+
+    def ingest_many(self, source: Path, temp_dir: Path, config: dict) -> Iterator[ArtifactData]:
+        include_tools = bool(config.get("include_tool_turns", False))
+        temp_dir = Path(temp_dir)
+        with _open_export(Path(source)) as stream:
+            try:
+                for conversation in iter_array(text_chunks(stream)):
+                    if not isinstance(conversation, dict):
+                        continue
+                    parsed = _parse_conversation(conversation, include_tools)
+                    if parsed is not None:
+                        yield self._artifact(conversation, parsed, temp_dir)
+            except JSONStreamError as exc:
+                raise IngestionError(f"Not a ChatGPT or Claude conversations export: {exc}")
+
+    def _artifact(self, conversation: dict, parsed: dict, temp_dir: Path) -> ArtifactData:
+        turns = parsed["turns"]
+        first_user = next((turn["content"] for turn in turns if turn["role"] == "user"), turns[0]["content"])
+        title = parsed["title"] or _shorten(first_user, _TITLE_CHARS) or "Untitled conversation"
+
+        key = uuid.uuid4().hex
+        files = {
+            "raw_json":     temp_dir / f"{key}_raw.json",
+            "transcript":   temp_dir / f"{key}_transcript.json",
+            "readable_txt": temp_dir / f"{key}_readable.txt",
+        }
+        files["raw_json"].write_text(json.dumps(conversation, ensure_ascii=False), encoding="utf-8")
+        files["transcript"].write_text(json.dumps({"turns": turns}, ensure_ascii=False), encoding="utf-8")
+        files["readable_txt"].write_text(_transcript_text(title, turns), encoding="utf-8")
+
+        plugin_data = {
+            "platform": parsed["platform"],
+            "conversation_id": parsed["id"],
+            "message_count": len(turns),
+            "participants": sorted({turn["role"] for turn in turns}),
+        }
+        for key_name in ("model", "created_at", "updated_at"):
+            if parsed[key_name]:
+                plugin_data[key_name] = parsed[key_name]
+
+        return ArtifactData(
+            title=title,
+            excerpt=_shorten(first_user, _EXCERPT_CHARS),
+            plugin_data=plugin_data,
+            plugin_version=self.plugin_version,
+            files={role: str(path) for role, path in files.items()},
+            queue_tasks=["summarize", "embed"],
+            source_url=parsed["url"],
+        )
+
+    def get_fts_text(self, artifact: dict) -> str:
+        content_path = artifact.get("content_path")
+        if not content_path:
+            return ""
+        txt_file = Path(content_path) / "processed" / "readable.txt"
+        if txt_file.exists():
+            return txt_file.read_text(encoding="utf-8")
+        return ""
@@ -1,109 +1,500 @@
 """
 Webpage content plugin.
 
-Fetches and archives web pages using Playwright (single browser session).
-Mozilla readability.js extracts clean article content and metadata.
-Takes a full-page screenshot and a viewport screenshot for the card thumbnail.
+Two capture paths, chosen by the capture_mode config setting:
+
+  browser — Playwright. Browsers are long-lived and pooled; each capture runs
+            in a fresh browser context. Mozilla readability.js extracts clean
+            article content and metadata, and the viewport is captured for the
+            card thumbnail while the page is open.
+  http    — a plain HTTP fetch, with article text extracted in-process by a
+            lightweight block-level extractor.
+  auto    — (default) http, escalating to browser when the fetched page looks
+            like it needs JavaScript: little or no text, an SPA shell, a
+            noscript warning, or a response that isn't HTML.
+
+Ingest stops once the text is captured. Derivatives are deferred stages
+(task_stages), run by the processing queue after the card is visible:
+
+  viewport   — card thumbnail for HTTP captures (browser pool)
+  markdown   — markdown conversion of readable.html, if save_markdown is set
+  screenshot — full-page screenshot, if save_screenshot is set (browser pool)
 """
+import html
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from functools import lru_cache
+from html.parser import HTMLParser
 from pathlib import Path
+from typing import Callable, Optional
 
-from core.plugins.base import ArtifactData, ContentPlugin, IngestionError
+from core.plugins.base import ArtifactData, ContentPlugin, IngestionError, TaskStage
 
 _PLUGIN_DIR = Path(__file__).parent
 _READABILITY_JS = _PLUGIN_DIR / "readability.js"
 
+_VIEWPORT = {"width": 1280, "height": 800}
 
-class Plugin(ContentPlugin):
-    plugin_id = "webpage"
-    plugin_version = "1.0.0"
-    url_patterns = ["*"]
+# Upper bound on a pooled browser capture, queueing included; also the page's
+# default timeout for what is left of it. Navigation is capped at 2 × 30s inside.
+_CAPTURE_TIMEOUT = 180
 
-    def ingest(self, source: str, artifact_id: str, temp_dir: Path, config: dict) -> ArtifactData:
-        from playwright.sync_api import Error as PlaywrightError
-        from playwright.sync_api import TimeoutError as PlaywrightTimeout
-        from playwright.sync_api import sync_playwright
+CAPTURE_MODES = ("auto", "http", "browser")
 
-        temp_dir = Path(temp_dir)
-        temp_dir.mkdir(parents=True, exist_ok=True)
+_HTTP_TIMEOUT = float(os.getenv("WEBPAGE_HTTP_TIMEOUT", "15"))
+_HTTP_MAX_BYTES = int(os.getenv("WEBPAGE_HTTP_MAX_BYTES", str(10 * 1024 * 1024)))
+# Less extracted text than this means the page is probably rendered by JavaScript
+_HTTP_MIN_TEXT_CHARS = int(os.getenv("WEBPAGE_HTTP_MIN_TEXT_CHARS", "400"))
+_USER_AGENT = "Mozilla/5.0 (compatible; Pindrop/1.0)"
 
-        readability_src = _READABILITY_JS.read_text(encoding="utf-8")
 
-        raw_html = ""
-        article = None
-        final_url = source
-        files: dict[str, str] = {}
+@lru_cache(maxsize=1)
+def _readability_source() -> str:
+    return _READABILITY_JS.read_text(encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# HTTP capture
+# ---------------------------------------------------------------------------
+
+_SKIP_TAGS = frozenset({
+    "script", "style", "noscript", "template", "svg", "canvas", "nav", "header",
+    "footer", "aside", "form", "button", "select", "iframe", "object",
+})
+_BLOCK_TAGS = frozenset({
+    "p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "pre", "blockquote",
+    "figcaption", "dt", "dd", "td", "th",
+})
+# Tags whose start or end ends the current run of text
+_BREAK_TAGS = _BLOCK_TAGS | frozenset({
+    "div", "section", "article", "main", "ul", "ol", "dl", "table", "tr", "figure", "br", "hr",
+})
+_VOID_TAGS = frozenset({"br", "hr", "img", "input", "meta", "link", "source", "wbr", "area", "col", "embed"})
+
+# Mount points and attributes client-rendered frameworks leave in server HTML
+_SPA_IDS = frozenset({"root", "app", "__next", "__nuxt", "___gatsby", "svelte"})
+_SPA_ATTRS = frozenset({"ng-version", "data-reactroot", "data-server-rendered", "ng-app"})
+
+_PUBLISHED_META = (
+    "article:published_time", "og:article:published_time", "date", "dc.date",
+)
+_WS_RE = re.compile(r"\s+")
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+class _PageParser(HTMLParser):
+    """
+    Collects text blocks (paragraphs, headings, list items, ...) and page
+    metadata in one pass. Text inside navigation, headers, footers, forms and
+    scripts is dropped; blocks inside <article> / <main> are marked so the
+    extractor can prefer them.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lang = ""
+        self.title = ""
+        self.meta: dict[str, str] = {}
+        self.spa_markers: set[str] = set()
+        self.noscript_text: list[str] = []
+        self.blocks: list[tuple[str, str, bool]] = []    # (tag, text, inside article/main)
+        self._skip: list[str] = []
+        self._main_depth = 0
+        self._in_title = False
+        self._block_tag = "p"
+        self._buf: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attr = {k: (v or "") for k, v in attrs}
+        if tag == "html":
+            self.lang = attr.get("lang", "")
+        elif tag == "meta":
+            key = (attr.get("property") or attr.get("name") or "").lower()
+            if key and "content" in attr:
+                self.meta.setdefault(key, attr["content"])
+            return
+        elif tag == "title":
+            self._in_title = True
+        if attr.get("id") in _SPA_IDS:
+            self.spa_markers.add(f"#{attr['id']}")
+        self.spa_markers.update(_SPA_ATTRS.intersection(attr))
+        if tag in _VOID_TAGS:
+            if tag in _BREAK_TAGS and not self._skip:
+                self._flush()
+            return
+
+        if self._skip or tag in _SKIP_TAGS:
+            self._skip.append(tag)
+            return
+        if tag in ("article", "main") or attr.get("role") == "main":
+            self._flush()
+            self._main_depth += 1
+        if tag in _BREAK_TAGS:
+            self._flush()
+            if tag in _BLOCK_TAGS:
+                self._block_tag = tag
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if self._skip:
+            # Close back to the matching tag; tolerates unclosed children
+            if tag in self._skip:
+                while self._skip and self._skip.pop() != tag:
+                    pass
+            return
+        if tag in _BREAK_TAGS:
+            self._flush()
+        if tag in ("article", "main") and self._main_depth:
+            self._flush()
+            self._main_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._skip:
+            if self._skip[0] == "noscript":
+                self.noscript_text.append(data)
+        else:
+            self._buf.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        raw = "".join(self._buf)
+        self._buf = []
+        text = raw.strip("\n") if self._block_tag == "pre" else _WS_RE.sub(" ", raw).strip()
+        if text:
+            self.blocks.append((self._block_tag, text, self._main_depth > 0))
+        self._block_tag = "p"
+
+
+def _render_blocks(blocks: list[tuple[str, str]]) -> str:
+    parts = ["<article>"]
+    in_list = False
+    for tag, text in blocks:
+        if tag == "li" and not in_list:
+            parts.append("<ul>")
+            in_list = True
+        elif tag != "li" and in_list:
+            parts.append("</ul>")
+            in_list = False
+        if tag in ("td", "th", "dt", "dd", "figcaption"):
+            tag = "p"
+        parts.append(f"<{tag}>{html.escape(text)}</{tag}>")
+    if in_list:
+        parts.append("</ul>")
+    parts.append("</article>")
+    return "\n".join(parts)
+
+
+def extract_article(raw_html: str) -> tuple[Optional[dict], _PageParser]:
+    """
+    Readability-shaped article ({title, excerpt, content, textContent, byline,
+    siteName, lang}) from server HTML, or None if it has no text; plus the
+    parser, for the escalation heuristics.
+    """
+    parser = _PageParser()
+    parser.feed(raw_html)
+    parser.close()
+
+    blocks = [(tag, text) for tag, text, in_main in parser.blocks if in_main]
+    if sum(len(text) for _, text in blocks) < _HTTP_MIN_TEXT_CHARS:
+        blocks = [(tag, text) for tag, text, _ in parser.blocks]
+    if not blocks:
+        return None, parser
+
+    meta = parser.meta
+    title = (
+        meta.get("og:title")
+        or _WS_RE.sub(" ", parser.title).strip()
+        or next((text for tag, text in blocks if tag == "h1"), "")
+    )
+    excerpt = meta.get("description") or meta.get("og:description") or ""
+    if not excerpt:
+        first = next((text for tag, text in blocks if tag == "p" and len(text) >= 80), "")
+        excerpt = first[:300].rsplit(" ", 1)[0] + "…" if len(first) > 300 else first
+    return {
+        "title": title,
+        "excerpt": excerpt,
+        "content": _render_blocks(blocks),
+        "textContent": "\n\n".join(text for _, text in blocks),
+        "byline": meta.get("author", ""),
+        "siteName": meta.get("og:site_name", ""),
+        "lang": parser.lang,
+    }, parser
 
+
+def _published(parser: _PageParser) -> Optional[str]:
+    return next((parser.meta[key] for key in _PUBLISHED_META if parser.meta.get(key)), None)
+
+
+@dataclass
+class _HttpPage:
+    final_url: str
+    status: int
+    content_type: str
+    raw_html: str
+
+
+def _decode(body: bytes, header_charset: Optional[str]) -> str:
+    charset = header_charset
+    if not charset:
+        match = _CHARSET_RE.search(body[:4096])
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def needs_browser(page: _HttpPage, article: Optional[dict], parser: Optional[_PageParser]) -> Optional[str]:
+    """Why an HTTP-fetched page should be re-captured in the browser, or None if it's fine as is."""
+    if page.status >= 400:
+        return f"HTTP {page.status}"
+    if "html" not in page.content_type:
+        return f"not HTML ({page.content_type or 'no content type'})"
+    text_chars = len(article["textContent"]) if article else 0
+    if text_chars == 0:
+        return "empty body"
+    if parser is not None and text_chars < 2 * _HTTP_MIN_TEXT_CHARS:
+        # Thin pages with framework mount points or a noscript warning are app shells
+        if parser.spa_markers:
+            return f"SPA shell ({', '.join(sorted(parser.spa_markers))})"
+        if "javascript" in " ".join(parser.noscript_text).lower():
+            return "noscript asks for JavaScript"
+    if text_chars < _HTTP_MIN_TEXT_CHARS:
+        return f"too little text ({text_chars} chars)"
+    return None
+
+
+@dataclass
+class _Job:
+    fn: Callable
+    deadline: float                                 # time.monotonic()
+    files: Optional[dict[str, str]] = None          # temp files fn writes, removed if the caller gives up
+    future: Future = field(default_factory=Future)
+    abandoned: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def check(self) -> None:
+        """Called by fn between steps: stop early once the caller has timed out."""
+        if self.abandoned:
+            raise IngestionError("Capture abandoned after timing out")
+
+
+class _BrowserPool:
+    """
+    Bounded pool of long-lived Chromium browsers.
+
+    Playwright's sync API is bound to the thread that started it, so each
+    browser lives on its own worker thread. Callers submit a capture function,
+    which runs against a page in a fresh browser context, and block until it
+    returns. A browser is relaunched after max_pages captures or if it crashes.
+
+    A capture gets until its deadline: the page's default timeout is the time
+    left, and fn(page, check) calls check() between steps. A job its caller
+    gave up on is dropped if still queued, or stopped at the next check and
+    its temp files removed, so it frees its browser for the jobs behind it.
+    """
+
+    def __init__(self, size: int, max_pages: int):
+        self._size = max(1, size)
+        self._max_pages = max(1, max_pages)
+        self._jobs: queue.Queue = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start worker threads; each launches its browser immediately (warm-up)."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self._size):
+                thread = threading.Thread(
+                    target=self._worker, name=f"webpage-browser-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join(timeout=10)
+
+    def run(self, fn: Callable, timeout: float = _CAPTURE_TIMEOUT, files: Optional[dict[str, str]] = None):
+        """
+        Run fn(page, check) on a pooled browser. Blocking. Re-raises fn's
+        exceptions. files is the dict fn records its temp files in.
+        """
+        self.start()
+        job = _Job(fn, deadline=time.monotonic() + timeout, files=files)
+        self._jobs.put(job)
+        try:
+            return job.future.result(timeout=timeout)
+        except FutureTimeout as exc:
+            with job.lock:
+                # The worker may have finished in the meantime; then use its result
+                if not job.future.done():
+                    job.abandoned = True
+                    job.future.cancel()
+            if job.abandoned:
+                raise IngestionError(f"Capture timed out after {timeout}s") from exc
+            return job.future.result()
+
+    def _worker(self) -> None:
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch()
-                page = browser.new_page(viewport={"width": 1280, "height": 800})
+            from playwright.sync_api import sync_playwright
+            playwright = sync_playwright().start()
+        except Exception as exc:
+            print(f"  warning: webpage plugin could not start Playwright: {exc}")
+            self._fail_jobs(IngestionError(f"Playwright unavailable: {exc}"))
+            return
+
+        browser = self._launch(playwright)
+        pages = 0
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue
 
+            result, error = None, None
+            try:
+                if browser is None or not browser.is_connected():
+                    browser = self._launch(playwright, raise_errors=True)
+                    pages = 0
+                context = browser.new_context(viewport=_VIEWPORT)
                 try:
-                    page.goto(source, wait_until="networkidle", timeout=30_000)
-                except PlaywrightTimeout:
-                    # Heavy or slow pages — fall back to DOMContentLoaded
+                    page = context.new_page()
+                    page.set_default_timeout(max(job.deadline - time.monotonic(), 0.001) * 1000)
+                    job.check()
+                    result = job.fn(page, job.check)
+                finally:
                     try:
-                        page.goto(source, wait_until="domcontentloaded", timeout=30_000)
-                    except (PlaywrightTimeout, PlaywrightError) as exc:
-                        raise IngestionError(f"Page failed to load: {exc}") from exc
-
-                final_url = page.url
-                raw_html = page.content()
-
-                # Inject readability.js as a script tag, then extract article
-                page.add_script_tag(content=readability_src)
-                article = page.evaluate("""
-                    () => {
-                        try {
-                            const reader = new Readability(document.cloneNode(true));
-                            return reader.parse();
-                        } catch (e) {
-                            return null;
-                        }
-                    }
-                """)
-
-                # Published date from common meta tags
-                published = page.evaluate("""
-                    () => {
-                        const sel = [
-                            'meta[property="article:published_time"]',
-                            'meta[property="og:article:published_time"]',
-                            'meta[name="date"]',
-                            'meta[name="DC.date"]',
-                        ].join(', ');
-                        const el = document.querySelector(sel);
-                        return el ? el.getAttribute('content') : null;
-                    }
-                """)
-
-                # Viewport screenshot — always taken, required for the card thumbnail
-                thumbnail_path = temp_dir / f"{artifact_id}_thumbnail.jpg"
-                page.screenshot(
-                    path=str(thumbnail_path),
-                    full_page=False,
-                    type="jpeg",
-                    quality=85,
-                )
-                files["thumbnail"] = str(thumbnail_path)
+                        context.close()
+                    except Exception:
+                        pass
+            except BaseException as exc:
+                error = exc
+            finally:
+                pages += 1
+            with job.lock:
+                if job.abandoned:
+                    for path in (job.files or {}).values():
+                        Path(path).unlink(missing_ok=True)
+                elif error is not None:
+                    job.future.set_exception(error)
+                else:
+                    job.future.set_result(result)
 
-                # Full-page screenshot — optional, controlled by save_screenshot setting
-                if config.get("save_screenshot", True):
-                    screenshot_path = temp_dir / f"{artifact_id}_screenshot.jpg"
-                    page.screenshot(
-                        path=str(screenshot_path),
-                        full_page=True,
-                        type="jpeg",
-                        quality=85,
-                    )
-                    files["screenshot"] = str(screenshot_path)
+            # Recycle after max_pages, or drop a crashed browser so the next job relaunches
+            if browser is not None and (pages >= self._max_pages or not browser.is_connected()):
+                self._close(browser)
+                browser = None
 
-                browser.close()
+        if browser is not None:
+            self._close(browser)
+        try:
+            playwright.stop()
+        except Exception:
+            pass
 
-        except IngestionError:
-            raise
+    def _fail_jobs(self, exc: Exception) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(exc)
+
+    @staticmethod
+    def _launch(playwright, raise_errors: bool = False):
+        try:
+            return playwright.chromium.launch()
         except Exception as exc:
-            raise IngestionError(f"Unexpected error loading page: {exc}") from exc
+            if raise_errors:
+                raise IngestionError(f"Could not launch browser: {exc}") from exc
+            print(f"  warning: webpage plugin could not launch browser: {exc}")
+            return None
+
+    @staticmethod
+    def _close(browser) -> None:
+        try:
+            browser.close()
+        except Exception:
+            pass
+
+
+class Plugin(ContentPlugin):
+    plugin_id = "webpage"
+    plugin_version = "1.2.0"
+    url_patterns = ["*"]
+    # The browser stages run one at a time per worker so interactive captures keep the pool
+    task_stages = {
+        "viewport":   TaskStage(priority=2, concurrency=1, lease_seconds=300),
+        "markdown":   TaskStage(priority=4, concurrency=2, lease_seconds=120),
+        "screenshot": TaskStage(priority=6, concurrency=1, lease_seconds=600),
+    }
+
+    def __init__(self):
+        self._pool = _BrowserPool(
+            size=int(os.getenv("WEBPAGE_BROWSER_POOL_SIZE", "2")),
+            max_pages=int(os.getenv("WEBPAGE_BROWSER_MAX_PAGES", "50")),
+        )
+        self._http = None
+        self._http_lock = threading.Lock()
+
+    def startup(self) -> None:
+        self._pool.start()
+
+    def shutdown(self) -> None:
+        self._pool.stop()
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    def ingest(self, source: str, artifact_id: str, temp_dir: Path, config: dict) -> ArtifactData:
+        temp_dir = Path(temp_dir)
+        temp_dir.mkdir(parents=True, exist_ok=True)
+
+        files: dict[str, str] = {}
+        mode = config.get("capture_mode", "auto")
+        if mode not in CAPTURE_MODES:
+            raise IngestionError(f"Unknown capture_mode '{mode}' (expected one of: {', '.join(CAPTURE_MODES)})")
+
+        captured = None
+        escalated: Optional[str] = None
+        if mode != "browser":
+            captured, escalated = self._capture_http(source, mode)
+
+        if captured is not None:
+            raw_html, article, published, final_url = captured
+            queue_tasks = ["viewport"]
+        else:
+            try:
+                raw_html, article, published, final_url = self._pool.run(
+                    lambda page, check: self._capture(page, check, source, artifact_id, temp_dir, files),
+                    files=files,
+                )
+            except IngestionError:
+                raise
+            except Exception as exc:
+                raise IngestionError(f"Unexpected error loading page: {exc}") from exc
+            queue_tasks = []
 
         # --- Write archived files ---
 
@@ -140,15 +531,13 @@ class Plugin(ContentPlugin):
             readable_txt_path.write_text(readable_txt, encoding="utf-8")
             files["readable_txt"] = str(readable_txt_path)
 
+        # --- Deferred stages ---
+
         if config.get("save_markdown") and readable_html:
-            try:
-                from markdownify import markdownify
-                markdown = markdownify(readable_html, heading_style="ATX")
-                markdown_path = temp_dir / f"{artifact_id}_markdown.md"
-                markdown_path.write_text(markdown, encoding="utf-8")
-                files["markdown"] = str(markdown_path)
-            except ImportError:
-                pass
+            queue_tasks.append("markdown")
+        if config.get("save_screenshot", True):
+            queue_tasks.append("screenshot")
+        queue_tasks += ["summarize", "embed"]
 
         # --- Build plugin_data ---
 
@@ -158,7 +547,10 @@ class Plugin(ContentPlugin):
             "site_name": site_name,
             "lang": lang,
             "word_count": word_count,
+            "capture_mode": "http" if captured is not None else "browser",
         }
+        if escalated:
+            plugin_data["escalated"] = escalated
         if published:
             plugin_data["published"] = published
         if final_url != source:
@@ -170,8 +562,190 @@ class Plugin(ContentPlugin):
             plugin_data=plugin_data,
             plugin_version=self.plugin_version,
             files=files,
-            queue_tasks=["summarize", "embed"],
+            queue_tasks=queue_tasks,
+        )
+
+    def run_task(self, task_type: str, artifact: dict, temp_dir: Path, config: dict) -> dict[str, str]:
+        """Deferred stages: 'viewport', 'markdown', 'screenshot'."""
+        temp_dir = Path(temp_dir)
+        if task_type == "markdown":
+            return self._markdown(artifact, temp_dir)
+        if task_type == "viewport":
+            shot = self._viewport_screenshot
+        elif task_type == "screenshot":
+            shot = self._full_screenshot
+        else:
+            return super().run_task(task_type, artifact, temp_dir, config)
+
+        url = artifact["plugin_data"].get("canonical_url") or artifact["source_url"]
+        files: dict[str, str] = {}
+
+        def shoot(page, check: Callable[[], None]) -> None:
+            self._goto(page, url)
+            check()
+            shot(page, artifact["id"], temp_dir, files)
+
+        try:
+            self._pool.run(shoot, files=files)
+        except IngestionError:
+            raise
+        except Exception as exc:
+            raise IngestionError(f"Unexpected error loading page: {exc}") from exc
+        return files
+
+    @staticmethod
+    def _markdown(artifact: dict, temp_dir: Path) -> dict[str, str]:
+        readable_html_path = Path(artifact["content_path"]) / "processed" / "readable.html"
+        if not readable_html_path.exists():
+            return {}
+        try:
+            from markdownify import markdownify
+        except ImportError:
+            return {}
+        markdown = markdownify(readable_html_path.read_text(encoding="utf-8"), heading_style="ATX")
+        markdown_path = temp_dir / f"{artifact['id']}_markdown.md"
+        markdown_path.write_text(markdown, encoding="utf-8")
+        return {"markdown": str(markdown_path)}
+
+    # --- HTTP path ---
+
+    def _client(self):
+        with self._http_lock:
+            if self._http is None:
+                import httpx
+                self._http = httpx.Client(
+                    follow_redirects=True,
+                    timeout=_HTTP_TIMEOUT,
+                    headers={"User-Agent": _USER_AGENT, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5"},
+                )
+            return self._http
+
+    def _fetch(self, source: str) -> _HttpPage:
+        import httpx
+
+        try:
+            with self._client().stream("GET", source) as response:
+                body = bytearray()
+                for chunk in response.iter_bytes():
+                    body += chunk
+                    if len(body) > _HTTP_MAX_BYTES:
+                        raise IngestionError(f"Page is larger than {_HTTP_MAX_BYTES} bytes")
+                content_type = response.headers.get("content-type", "").lower()
+                return _HttpPage(
+                    final_url=str(response.url),
+                    status=response.status_code,
+                    content_type=content_type,
+                    raw_html=_decode(bytes(body), response.charset_encoding) if "html" in content_type else "",
+                )
+        except httpx.HTTPError as exc:
+            raise IngestionError(f"Page failed to load: {exc}") from exc
+
+    def _capture_http(self, source: str, mode: str) -> tuple[Optional[tuple], Optional[str]]:
+        """
+        ((raw_html, article, published, final_url), None) if the HTTP fetch is
+        good enough, else (None, reason) to fall back to the browser. In 'http'
+        mode there is no fallback: pages that need it fail or are kept as fetched.
+        """
+        try:
+            page = self._fetch(source)
+        except IngestionError as exc:
+            if mode == "http":
+                raise
+            return None, str(exc)
+
+        article, parser = extract_article(page.raw_html) if page.raw_html else (None, None)
+        reason = needs_browser(page, article, parser)
+        if reason is not None and (mode == "auto" or page.status >= 400 or not page.raw_html):
+            if mode == "http":
+                raise IngestionError(f"Page can't be captured without a browser: {reason}")
+            return None, reason
+        return (page.raw_html, article, _published(parser), page.final_url), None
+
+    # --- Browser path ---
+
+    @staticmethod
+    def _goto(page, url: str) -> None:
+        from playwright.sync_api import Error as PlaywrightError
+        from playwright.sync_api import TimeoutError as PlaywrightTimeout
+
+        try:
+            page.goto(url, wait_until="networkidle", timeout=30_000)
+        except PlaywrightTimeout:
+            # Heavy or slow pages — fall back to DOMContentLoaded
+            try:
+                page.goto(url, wait_until="domcontentloaded", timeout=30_000)
+            except (PlaywrightTimeout, PlaywrightError) as exc:
+                raise IngestionError(f"Page failed to load: {exc}") from exc
+
+    def _capture(
+        self,
+        page,
+        check: Callable[[], None],
+        source: str,
+        artifact_id: str,
+        temp_dir: Path,
+        files: dict[str, str],
+    ) -> tuple[str, Optional[dict], Optional[str], str]:
+        """Runs on a pool worker thread. Returns (raw_html, article, published, final_url)."""
+        self._goto(page, source)
+        check()
+
+        final_url = page.url
+        raw_html = page.content()
+
+        # Inject readability.js as a script tag, then extract article
+        page.add_script_tag(content=_readability_source())
+        article = page.evaluate("""
+            () => {
+                try {
+                    const reader = new Readability(document.cloneNode(true));
+                    return reader.parse();
+                } catch (e) {
+                    return null;
+                }
+            }
+        """)
+
+        # Published date from common meta tags
+        published = page.evaluate("""
+            () => {
+                const sel = [
+                    'meta[property="article:published_time"]',
+                    'meta[property="og:article:published_time"]',
+                    'meta[name="date"]',
+                    'meta[name="DC.date"]',
+                ].join(', ');
+                const el = document.querySelector(sel);
+                return el ? el.getAttribute('content') : null;
+            }
+        """)
+
+        # The page is already rendered, so the card thumbnail costs one viewport capture
+        check()
+        self._viewport_screenshot(page, artifact_id, temp_dir, files)
+        return raw_html, article, published, final_url
+
+    @staticmethod
+    def _viewport_screenshot(page, artifact_id: str, temp_dir: Path, files: dict[str, str]) -> None:
+        thumbnail_path = temp_dir / f"{artifact_id}_thumbnail.jpg"
+        page.screenshot(
+            path=str(thumbnail_path),
+            full_page=False,
+            type="jpeg",
+            quality=85,
+        )
+        files["thumbnail"] = str(thumbnail_path)
+
+    @staticmethod
+    def _full_screenshot(page, artifact_id: str, temp_dir: Path, files: dict[str, str]) -> None:
+        screenshot_path = temp_dir / f"{artifact_id}_screenshot.jpg"
+        page.screenshot(
+            path=str(screenshot_path),
+            full_page=True,
+            type="jpeg",
+            quality=85,
         )
+        files["screenshot"] = str(screenshot_path)
 
     def get_fts_text(self, artifact: dict) -> str:
         content_path = artifact.get("content_path")
@@ -6,13 +6,17 @@ import type { Artifact } from '@/types/artifact'
 
 interface ArtifactCardProps {
   artifact: Artifact
+  // From the grid's batch request: null while it is in flight, undefined to use the file URL
+  thumbnailSrc?: string | null
 }
 
-export default function ArtifactCard({ artifact }: ArtifactCardProps) {
+export default function ArtifactCard({ artifact, thumbnailSrc }: ArtifactCardProps) {
   const [, setSearchParams] = useSearchParams()
   const plugin = getPluginMeta(artifact.plugin_type)
   const Icon = plugin.Icon
   const hasThumbnail = artifact.thumbnail_path !== null
+  // Serves the 1x WebP derivative; ?w= picks a wider one for high-density screens
+  const thumbnailUrl = `/api/artifacts/${artifact.id}/files/thumbnail`
 
   const handleClick = () => {
     // Prep for Step 8 detail overlay — sets /?artifact=id
@@ -25,10 +29,13 @@ export default function ArtifactCard({ artifact }: ArtifactCardProps) {
       className="mb-4 rounded-lg border border-border bg-card text-card-foreground overflow-hidden cursor-pointer hover:border-primary/40 hover:shadow-md transition-all duration-200"
     >
       {/* Hero: thumbnail or plugin icon */}
-      {hasThumbnail ? (
+      {hasThumbnail && thumbnailSrc === null ? (
+        <div className="aspect-[8/5] bg-muted" />
+      ) : hasThumbnail ? (
         <div className="overflow-hidden bg-muted">
           <img
-            src={`/api/artifacts/${artifact.id}/files/thumbnail`}
+            src={thumbnailSrc ?? thumbnailUrl}
+            srcSet={thumbnailSrc ? undefined : `${thumbnailUrl} 1x, ${thumbnailUrl}?w=800 2x`}
             alt={artifact.title}
             className="w-full object-cover"
             loading="lazy"
@@ -1,5 +1,6 @@
 import Masonry from 'react-masonry-css'
 import { useArtifacts } from '@/hooks/useArtifacts'
+import { useThumbnails } from '@/hooks/useThumbnails'
 import ArtifactCard from './ArtifactCard'
 import LoadingCard from './LoadingCard'
 import type { GridItem } from '@/types/artifact'
@@ -17,6 +18,7 @@ interface ArtifactGridProps {
 
 export default function ArtifactGrid({ pendingItems }: ArtifactGridProps) {
   const { data: artifacts = [], isLoading, isError } = useArtifacts()
+  const { data: thumbnails, isPending: thumbnailsPending } = useThumbnails(artifacts)
 
   if (isError) {
     return (
@@ -59,7 +61,11 @@ export default function ArtifactGrid({ pendingItems }: ArtifactGridProps) {
           item.type === 'loading' ? (
             <LoadingCard key={item.id} />
           ) : (
-            <ArtifactCard key={item.data.id} artifact={item.data} />
+            <ArtifactCard
+              key={item.data.id}
+              artifact={item.data}
+              thumbnailSrc={thumbnailsPending ? null : thumbnails?.[item.data.id]}
+            />
           ),
         )}
       </Masonry>
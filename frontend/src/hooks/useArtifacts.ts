@@ -1,6 +1,14 @@
 import { useQuery } from '@tanstack/react-query'
 import { fetchArtifacts, searchArtifacts } from '@/lib/api'
 import { useFilterStore } from '@/store/filterStore'
+import type { Artifact } from '@/types/artifact'
+
+// Poll while a card's deferred stages (thumbnail, screenshot, ...) are still queued
+const PENDING_POLL_MS = 3_000
+
+function pollWhilePending(artifacts: Artifact[] | undefined): number | false {
+  return artifacts?.some((a) => a.pending_tasks?.length) ? PENDING_POLL_MS : false
+}
 
 export function useArtifacts() {
   const { searchQuery, selectedTagId, selectedCollectionId, sort } = useFilterStore()
@@ -16,6 +24,7 @@ export function useArtifacts() {
       }),
     enabled: !isSearchMode,
     staleTime: 30_000,
+    refetchInterval: (query) => pollWhilePending(query.state.data),
   })
 
   const searchResult = useQuery({
@@ -0,0 +1,51 @@
+import { keepPreviousData, useQuery } from '@tanstack/react-query'
+import { fetchThumbnails } from '@/lib/api'
+import type { Artifact } from '@/types/artifact'
+
+// Most recently used image sources, by artifact id. Their ETags go back with each
+// batch request so the server only sends thumbnails that changed. Inline data
+// URIs run to ~87 KiB each, so only the last few pages' worth are kept.
+const MAX_RECEIVED = 300
+const received = new Map<string, { etag: string; src: string }>()
+
+function remember(id: string, entry: { etag: string; src: string }) {
+  // Map iteration follows insertion order: re-inserting moves id to the newest end
+  received.delete(id)
+  received.set(id, entry)
+  while (received.size > MAX_RECEIVED) {
+    received.delete(received.keys().next().value as string)
+  }
+}
+
+/** Thumbnail src per artifact id for a grid page, fetched in one request. */
+export function useThumbnails(artifacts: Artifact[]) {
+  const ids = artifacts.filter((a) => a.thumbnail_path !== null).map((a) => a.id)
+  // Refetch when a thumbnail lands or changes, e.g. a deferred stage or its WebP derivatives
+  const version = artifacts.map((a) => `${a.id}:${a.thumbnail_path ?? ''}:${a.updated_at}`).join(',')
+
+  return useQuery({
+    queryKey: ['thumbnails', version],
+    queryFn: async () => {
+      const known: Record<string, string> = {}
+      for (const id of ids) {
+        const entry = received.get(id)
+        if (entry) known[id] = entry.etag
+      }
+      const batch = await fetchThumbnails(ids, known, Math.round(400 * window.devicePixelRatio))
+      const sources: Record<string, string> = {}
+      for (const id of ids) {
+        const entry = batch[id]
+        if (!entry) continue
+        const src = entry.data ?? entry.url ?? received.get(id)?.src
+        if (!src) continue
+        remember(id, { etag: entry.etag, src })
+        sources[id] = src
+      }
+      return sources
+    },
+    enabled: ids.length > 0,
+    staleTime: 30_000,
+    // Keep showing the current thumbnails while a changed page is fetched
+    placeholderData: keepPreviousData,
+  })
+}
@@ -41,6 +41,22 @@ export async function fetchCollections(): Promise<Collection[]> {
   return res.json()
 }
 
+export type ThumbnailEntry = { etag: string; data?: string; url?: string } | null
+
+export async function fetchThumbnails(
+  ids: string[],
+  known: Record<string, string>,
+  w?: number,
+): Promise<Record<string, ThumbnailEntry>> {
+  const res = await fetch('/api/artifacts/thumbnails', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ids, known, w }),
+  })
+  if (!res.ok) throw new Error('Failed to fetch thumbnails')
+  return res.json()
+}
+
 export async function searchArtifacts(q: string): Promise<Artifact[]> {
   const res = await fetch(`/api/search?q=${encodeURIComponent(q)}`)
   if (!res.ok) throw new Error('Search failed')
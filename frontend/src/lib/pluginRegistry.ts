@@ -1,5 +1,5 @@
 // Phase 1: hardcoded map. Phase 2: load dynamically from /api/plugins + frontend.json.
-import { Globe, Image, FileText, File } from 'lucide-react'
+import { Globe, Image, FileText, File, MessageSquare } from 'lucide-react'
 import type { ComponentType } from 'react'
 
 interface PluginMeta {
@@ -13,6 +13,7 @@ const PLUGIN_REGISTRY: Record<string, PluginMeta> = {
   image:   { Icon: Image,     accent: '#E67E22', label: 'Image'   },
   note:    { Icon: FileText,  accent: '#27AE60', label: 'Note'    },
   pdf:     { Icon: File,      accent: '#E74C3C', label: 'PDF'     },
+  'ai-chat': { Icon: MessageSquare, accent: '#8E44AD', label: 'AI chat' },
 }
 
 export function getPluginMeta(pluginType: string): PluginMeta {
@@ -21,12 +21,14 @@ export interface Artifact {
   excerpt: string | null
   thumbnail_path: string | null
   captured_at: string
+  updated_at: string
   source_url: string | null
   source_domain: string | null
   is_archived: boolean
   is_read: boolean
   importance: number
   tags: Tag[]
+  pending_tasks?: string[]   // deferred stages (screenshots, markdown, ...) still queued
 }
 
 export type GridItem =